@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class CartConfig(AppConfig):
     name = "apps.cart"
     verbose_name = _("Cart")
+
+    def ready(self):
+        import apps.cart.signals  # noqa: F401, PLC0415
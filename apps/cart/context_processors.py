@@ -0,0 +1,7 @@
+from django.utils.functional import SimpleLazyObject
+
+from .services import get_mini_cart
+
+
+def mini_cart_processor(request):
+    return {"mini_cart": SimpleLazyObject(lambda: get_mini_cart(request))}
@@ -0,0 +1,10 @@
+class InsufficientStockError(Exception):
+    """
+    Raised when a reservation asks for more than the available stock.
+
+    ``shortages`` maps variant ids to ``(requested, available)``.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(f"Insufficient stock for {len(shortages)} variant(s).")
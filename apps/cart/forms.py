@@ -1,2 +1,24 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
+
+
+class CartLineForm(forms.Form):
+    sku = forms.CharField(
+        label=_("SKU"),
+        max_length=50,
+    )
+    quantity = forms.IntegerField(
+        label=_("Quantity"),
+        min_value=0,
+        max_value=999,
+        initial=1,
+    )
+
+
+class CartAddForm(CartLineForm):
+    quantity = forms.IntegerField(
+        label=_("Quantity"),
+        min_value=1,
+        max_value=999,
+        initial=1,
+    )
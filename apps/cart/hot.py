@@ -0,0 +1,360 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+from functools import cache
+from itertools import chain
+from uuid import UUID
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from apps.products.models import ProductVariant
+
+from .models import Cart
+from .models import CartItem
+from .services import CartLine
+from .services import CartService
+from .services import CartTotals
+from .tasks import flush_hot_carts
+from .utils import get_hot_cart_dirty_key
+from .utils import get_hot_cart_flush_key
+from .utils import get_hot_cart_key
+from .utils import invalidate_mini_cart
+
+# KEYS: lines, prices, meta, dirty.
+# ARGV: variant id, quantity, stock, price, increment, now, cart id, ttl.
+# Returns the new quantity, or -1 when the cart must be loaded first.
+WRITE_LINE_SCRIPT = """
+if redis.call("HEXISTS", KEYS[3], "loaded") == 0 then
+    return -1
+end
+local quantity = tonumber(ARGV[2])
+if ARGV[5] == "1" then
+    quantity = quantity + tonumber(redis.call("HGET", KEYS[1], ARGV[1]) or "0")
+end
+quantity = math.min(quantity, tonumber(ARGV[3]))
+if quantity > 0 then
+    redis.call("HSET", KEYS[1], ARGV[1], quantity)
+    redis.call("HSETNX", KEYS[2], ARGV[1], ARGV[4])
+else
+    redis.call("HDEL", KEYS[1], ARGV[1])
+    redis.call("HDEL", KEYS[2], ARGV[1])
+end
+redis.call("HINCRBY", KEYS[3], "revision", 1)
+redis.call("ZADD", KEYS[4], "NX", ARGV[6], ARGV[7])
+for i = 1, 3 do
+    redis.call("EXPIRE", KEYS[i], ARGV[8])
+end
+return quantity
+"""
+
+# KEYS: lines, prices, meta.
+# ARGV: ttl, then (variant id, quantity, price) for every persisted line.
+LOAD_SCRIPT = """
+if redis.call("HSETNX", KEYS[3], "loaded", 1) == 0 then
+    return 0
+end
+for i = 2, #ARGV, 3 do
+    redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 1])
+    redis.call("HSET", KEYS[2], ARGV[i], ARGV[i + 2])
+end
+for i = 1, 3 do
+    redis.call("EXPIRE", KEYS[i], ARGV[1])
+end
+return 1
+"""
+
+# KEYS: lines, prices, meta, dirty.
+# ARGV: flushed revision, cart id, evict.
+# Returns 0 when the cart was written to since the flush read it.
+SETTLE_SCRIPT = """
+if (redis.call("HGET", KEYS[3], "revision") or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("ZREM", KEYS[4], ARGV[2])
+if ARGV[3] == "1" then
+    redis.call("DEL", KEYS[1], KEYS[2], KEYS[3])
+end
+return 1
+"""
+
+
+@cache
+def get_redis():
+    options = {"ssl_cert_reqs": "none"} if settings.REDIS_SSL else {}
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True, **options)
+
+
+@cache
+def get_script(source):
+    return get_redis().register_script(source)
+
+
+class RedisCartService(CartService):
+    """
+    Keep open carts in Redis and write them behind to the database.
+
+    A cart is a Redis hash of ``{variant_id: quantity}`` lines, a hash of the
+    prices captured when the lines were added, and a meta hash whose
+    ``revision`` counts writes. It is loaded from ``CartItem`` on first use.
+    A write is one stock read and one script call, clamped to stock like in
+    ``CartService``, and adds the cart to a dirty set. Adding a quantity
+    below 1 raises ``ValueError`` like in ``CartService``. ``flush_hot_carts``
+    runs at most once per ``CART_HOT_FLUSH_DELAY`` seconds and persists the
+    dirty carts in batches, so bursts of writes coalesce into one database
+    write per cart.
+
+    A cart only leaves the dirty set once the revision it flushed is
+    committed and still current. Carts whose flush was lost to a crashed
+    worker or broker are replayed by the periodic ``flush_hot_carts`` run.
+    Checkout flushes synchronously in ``reserve()``. Redis needs append-only
+    persistence for unflushed writes to survive its own restart. Totals are
+    priced at the current variant prices, like in ``CartService``.
+    """
+
+    @classmethod
+    def add(cls, cart, variant, quantity=1):
+        if quantity < 1:
+            msg = "Cart line quantities must be at least 1."
+            raise ValueError(msg)
+        return cls._write(cart, variant, quantity, increment=True)
+
+    @classmethod
+    def update(cls, cart, variant, quantity):
+        return cls._write(cart, variant, max(quantity, 0), increment=False)
+
+    @classmethod
+    def remove(cls, cart, variant):
+        return cls._write(cart, variant, 0, increment=False)
+
+    @classmethod
+    def get_totals(cls, cart):
+        return cls._get_totals(cart.pk)
+
+    @classmethod
+    def get_open_totals(cls, carts):
+        cart_id = carts.open().values_list("pk", flat=True).first()
+        if cart_id is None:
+            return CartTotals()
+        return cls._get_totals(cart_id)
+
+    @classmethod
+    def get_lines(cls, cart, skus=None):
+        lines, prices = cls._read(cart.pk)
+        variants = ProductVariant.objects.filter(pk__in=list(lines))
+        if skus is not None:
+            variants = variants.filter(sku__in=skus)
+        return [
+            CartItem(
+                cart=cart,
+                variant=variant,
+                quantity=lines[str(variant.pk)],
+                unit_price_at_add=prices[str(variant.pk)],
+            )
+            for variant in variants.select_related("product__category").order_by(
+                "sku",
+            )
+        ]
+
+    @staticmethod
+    def get_revision(cart_id):
+        return get_redis().hget(get_hot_cart_key(cart_id, "meta"), "revision")
+
+    @classmethod
+    def flush(cls, cart):
+        cls._flush(cart.pk)
+
+    @classmethod
+    def flush_pending(cls):
+        cart_ids = get_redis().zrange(
+            get_hot_cart_dirty_key(),
+            0,
+            settings.CART_HOT_FLUSH_BATCH_SIZE - 1,
+        )
+        for cart_id in cart_ids:
+            cls._flush(cart_id)
+        return len(cart_ids)
+
+    @classmethod
+    def release(cls, carts):
+        for cart_id in carts.values_list("pk", flat=True):
+            cls._flush(cart_id, evict=True)
+
+    @staticmethod
+    def _get_keys(cart_id):
+        return [get_hot_cart_key(cart_id, part) for part in ("lines", "prices", "meta")]
+
+    @staticmethod
+    def _get_ttl():
+        return int(timedelta(days=settings.CART_ABANDON_AFTER_DAYS).total_seconds())
+
+    @classmethod
+    def _write(cls, cart, variant, quantity, *, increment):
+        variant_id = getattr(variant, "pk", variant)
+        stock, price = 0, 0
+        if quantity > 0:
+            row = (
+                ProductVariant.objects.active()
+                .filter(pk=variant_id, stock_quantity__gt=0)
+                .values_list("stock_quantity", "price")
+                .first()
+            )
+            if row is None:
+                return None, cls.get_totals(cart)
+            stock, price = row
+        keys = [*cls._get_keys(cart.pk), get_hot_cart_dirty_key()]
+        args = [
+            str(variant_id),
+            quantity,
+            stock,
+            str(price),
+            int(increment),
+            time.time(),
+            str(cart.pk),
+            cls._get_ttl(),
+        ]
+        quantity = get_script(WRITE_LINE_SCRIPT)(keys=keys, args=args)
+        if quantity < 0:
+            cls._load(cart.pk)
+            quantity = get_script(WRITE_LINE_SCRIPT)(keys=keys, args=args)
+        invalidate_mini_cart(cart)
+        cls._schedule_flush()
+        line = CartLine(None, UUID(str(variant_id)), quantity) if quantity else None
+        return line, cls.get_totals(cart)
+
+    @classmethod
+    def _load(cls, cart_id):
+        rows = CartItem.lean.filter(cart_id=cart_id).values_list(
+            "variant_id",
+            "quantity",
+            "unit_price_at_add",
+        )
+        get_script(LOAD_SCRIPT)(
+            keys=cls._get_keys(cart_id),
+            args=[
+                cls._get_ttl(),
+                *chain.from_iterable(
+                    (str(variant_id), quantity, str(price))
+                    for variant_id, quantity, price in rows
+                ),
+            ],
+        )
+
+    @classmethod
+    def _read(cls, cart_id):
+        lines_key, prices_key, meta_key = cls._get_keys(cart_id)
+        with get_redis().pipeline() as pipe:
+            pipe.hgetall(lines_key)
+            pipe.hgetall(prices_key)
+            pipe.hexists(meta_key, "loaded")
+            lines, prices, loaded = pipe.execute()
+        if not loaded:
+            cls._load(cart_id)
+            return cls._read(cart_id)
+        return (
+            {variant_id: int(quantity) for variant_id, quantity in lines.items()},
+            {variant_id: Decimal(price) for variant_id, price in prices.items()},
+        )
+
+    @classmethod
+    def _get_totals(cls, cart_id):
+        lines, _ = cls._read(cart_id)
+        prices = {
+            str(variant_id): price
+            for variant_id, price in ProductVariant.objects.filter(
+                pk__in=list(lines),
+            ).values_list("pk", "price")
+        }
+        return CartTotals(
+            item_count=len(lines),
+            total_quantity=sum(lines.values()),
+            subtotal=sum(
+                (
+                    prices[variant_id] * quantity
+                    for variant_id, quantity in lines.items()
+                    if variant_id in prices
+                ),
+                Decimal("0.00"),
+            ),
+        )
+
+    @classmethod
+    def _flush(cls, cart_id, *, evict=False):
+        """
+        Persist the cart's lines until no write raced with the flush.
+
+        A cart whose hashes expired or were evicted is not loaded any more.
+        Its empty hashes say nothing about the persisted lines, so it only
+        leaves the dirty set. A load and write racing with that bumps the
+        revision, and the flush runs again.
+        """
+        keys = [*cls._get_keys(cart_id), get_hot_cart_dirty_key()]
+        while True:
+            with get_redis().pipeline() as pipe:
+                pipe.hgetall(keys[0])
+                pipe.hgetall(keys[1])
+                pipe.hget(keys[2], "revision")
+                pipe.hexists(keys[2], "loaded")
+                pipe.zscore(keys[3], str(cart_id))
+                lines, prices, revision, loaded, dirty = pipe.execute()
+            is_open = (
+                not loaded
+                or dirty is None
+                or cls._persist(cart_id, lines, prices, revision)
+            )
+            settled = get_script(SETTLE_SCRIPT)(
+                keys=keys,
+                args=[revision or "0", str(cart_id), int(evict or not is_open)],
+            )
+            if settled:
+                return
+
+    @classmethod
+    def _persist(cls, cart_id, lines, prices, revision):
+        """
+        Replace the cart's ``CartItem`` rows with ``lines`` read at ``revision``.
+
+        Flushes of one cart are serialized on its row lock. A snapshot that is
+        no longer the current revision once the lock is held is not written,
+        so a slow flush cannot overwrite the lines of a newer one that already
+        settled. Its settle then fails and the flush reads the cart again.
+        Returns ``False`` when the cart is no longer open, e.g. checked out.
+        """
+        with transaction.atomic():
+            cart = Cart.objects.open().select_for_update().filter(pk=cart_id).first()
+            if cart is None:
+                return False
+            if cls.get_revision(cart_id) != revision:
+                return True
+            variant_ids = {
+                str(pk)
+                for pk in ProductVariant.objects.filter(
+                    pk__in=list(lines),
+                ).values_list("pk", flat=True)
+            }
+            CartItem.lean.filter(cart_id=cart_id).exclude(
+                variant_id__in=variant_ids,
+            ).delete()
+            CartItem.lean.bulk_create(
+                [
+                    CartItem(
+                        cart_id=cart_id,
+                        variant_id=variant_id,
+                        quantity=int(lines[variant_id]),
+                        unit_price_at_add=Decimal(prices[variant_id]),
+                    )
+                    for variant_id in variant_ids
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "variant"],
+                update_fields=["quantity", "modified"],
+            )
+            cls.touch(cart)
+        return True
+
+    @staticmethod
+    def _schedule_flush():
+        delay = max(settings.CART_HOT_FLUSH_DELAY, 1)
+        if get_redis().set(get_hot_cart_flush_key(), 1, nx=True, ex=delay):
+            transaction.on_commit(lambda: flush_hot_carts.apply_async(countdown=delay))
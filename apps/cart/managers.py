@@ -1,8 +1,30 @@
+from datetime import timedelta
+from decimal import Decimal
+from uuid import uuid4
+
 from django.apps import apps
+from django.conf import settings
+from django.db import connections
 from django.db import models
+from django.db import router
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import OuterRef
 from django.db.models import Prefetch
+from django.db.models import Q
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import When
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from apps.core.managers import UPSERT_RETURNING_VENDORS
 
 from .choices import CartStatus
+from .exceptions import InsufficientStockError
+from .utils import invalidate_mini_cart
 
 
 class CartQuerySet(models.QuerySet):
@@ -11,19 +33,100 @@ class CartQuerySet(models.QuerySet):
 
     def with_items(self):
         CartItem = apps.get_model("cart", "CartItem")
-        queryset = CartItem.objects.select_related(
-            "variant",
-            "variant__product",
-            "variant__product__category",
-        ).order_by("created")
+        queryset = CartItem.lean.with_variant().order_by("created")
         return self.prefetch_related(Prefetch("items", queryset=queryset))
 
+    def with_totals(self):
+        return self.annotate(
+            item_count=Count("items"),
+            total_quantity=Sum("items__quantity", default=0),
+            subtotal=Sum(
+                F("items__quantity") * F("items__variant__price"),
+                default=Decimal("0.00"),
+            ),
+        )
+
 
 class CartManager(models.Manager.from_queryset(CartQuerySet)):
-    pass
+    def merge_into_user_cart(self, cart_id, user):
+        """
+        Fold the anonymous open cart ``cart_id`` into ``user``'s open cart.
+
+        Without a user cart the anonymous one is re-pointed to the user.
+        Otherwise its lines are merged with ``CartItem.objects.merge`` and it
+        is closed as abandoned, for the sweeper to purge, and its stock holds
+        are released. Runs a fixed number
+        of queries whatever the number of lines. Returns the user's open cart,
+        or ``None`` if there is none.
+        """
+        CartItem = apps.get_model("cart", "CartItem")
+        StockReservation = apps.get_model("cart", "StockReservation")
+        with transaction.atomic(using=self.db):
+            target = self.open().filter(user=user).select_for_update().first()
+            source = (
+                self.open()
+                .filter(pk=cart_id, user__isnull=True)
+                .select_for_update()
+                .first()
+                if cart_id
+                else None
+            )
+            if source is None:
+                return target
+            now = timezone.now()
+            if target is None:
+                self.filter(pk=source.pk).update(
+                    user=user,
+                    session_key=None,
+                    modified=now,
+                )
+                invalidate_mini_cart(source)
+                source.user, source.session_key, source.modified = user, None, now
+                return source
+            CartItem.objects.merge(source.pk, target.pk)
+            self.filter(pk=source.pk).update(status=CartStatus.ABANDONED)
+            StockReservation.objects.db_manager(self.db).release(source)
+            self.filter(pk=target.pk).update(modified=now)
+            invalidate_mini_cart(source)
+            invalidate_mini_cart(target)
+            return target
 
 
 class CartItemQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(cart__status=CartStatus.OPEN)
+
+    def with_current_state(self):
+        return self.annotate(
+            current_price=F("variant__price"),
+            available_stock=F("variant__stock_quantity"),
+            variant_is_active=F("variant__is_active"),
+        )
+
+    def needing_revalidation(self):
+        """
+        Lines whose variant changed price, lacks stock or was deactivated.
+        """
+        return self.filter(
+            ~Q(unit_price_at_add=F("variant__price"))
+            | Q(quantity__gt=F("variant__stock_quantity"))
+            | Q(variant__is_active=False),
+        )
+
+    def reprice(self):
+        """
+        Move ``unit_price_at_add`` to the variants' current prices.
+        """
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        return self.update(
+            unit_price_at_add=Subquery(
+                ProductVariant.objects.filter(pk=OuterRef("variant_id")).values(
+                    "price",
+                )[:1],
+            ),
+            modified=timezone.now(),
+        )
+
     def with_variant(self):
         return self.select_related(
             "variant",
@@ -35,6 +138,315 @@ class CartItemQuerySet(models.QuerySet):
         return self.select_related("cart").with_variant()
 
 
-class CartItemManager(models.Manager.from_queryset(CartItemQuerySet)):
+class LeanCartItemManager(models.Manager.from_queryset(CartItemQuerySet)):
+    """
+    ``CartItem`` manager without default joins, for counts and bulk writes.
+    """
+
+
+class CartItemManager(LeanCartItemManager):
     def get_queryset(self):
         return super().get_queryset().with_cart_and_variant()
+
+    def upsert(self, cart_id, variant_id, quantity, *, increment=True):
+        """
+        Insert or update the line for ``variant_id`` in one statement.
+
+        With ``increment`` the quantity is added to the existing one, otherwise
+        it replaces it. The result is clamped to the variant's stock. New lines
+        capture the variant's price in ``unit_price_at_add``. Returns
+        ``(pk, variant_id, quantity)``, or ``None`` if the variant is inactive
+        or out of stock. Raises ``ValueError`` for a quantity below 1, as
+        lines are removed with ``delete()`` instead.
+        """
+        if quantity < 1:
+            msg = "Cart line quantities must be at least 1."
+            raise ValueError(msg)
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        if connection.vendor not in UPSERT_RETURNING_VENDORS:
+            return self._upsert_locked(
+                cart_id,
+                variant_id,
+                quantity,
+                increment=increment,
+                using=using,
+            )
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        opts = self.model._meta  # noqa: SLF001
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        variant_table = qn(ProductVariant._meta.db_table)  # noqa: SLF001
+        least = "LEAST" if connection.vendor == "postgresql" else "MIN"
+        new_quantity = (
+            f"{table}.quantity + EXCLUDED.quantity"
+            if increment
+            else "EXCLUDED.quantity"
+        )
+        sql = (
+            f"INSERT INTO {table} "  # noqa: S608
+            f"(id, created, modified, cart_id, variant_id, quantity, "
+            f"unit_price_at_add) "
+            f"SELECT %s, %s, %s, %s, v.id, {least}(%s, v.stock_quantity), v.price "
+            f"FROM {variant_table} v "
+            f"WHERE v.id = %s AND v.is_active AND v.stock_quantity > 0 "
+            f"ON CONFLICT (cart_id, variant_id) DO UPDATE SET "
+            f"quantity = {least}({new_quantity}, (SELECT stock_quantity "
+            f"FROM {variant_table} WHERE id = {table}.variant_id)), "
+            f"modified = EXCLUDED.modified "
+            f"RETURNING id, variant_id, quantity"
+        )
+        now = timezone.now()
+        params = [
+            opts.pk.get_db_prep_value(uuid4(), connection),
+            opts.get_field("created").get_db_prep_value(now, connection),
+            opts.get_field("modified").get_db_prep_value(now, connection),
+            opts.get_field("cart").get_db_prep_value(cart_id, connection),
+            quantity,
+            opts.get_field("variant").get_db_prep_value(variant_id, connection),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return (
+            opts.pk.to_python(row[0]),
+            opts.get_field("variant").to_python(row[1]),
+            row[2],
+        )
+
+    def merge(self, source_cart_id, target_cart_id):
+        """
+        Add the lines of one cart to another with a single statement.
+
+        Quantities of variants present in both are summed and clamped to stock.
+        Lines of inactive or sold-out variants are not copied. The source cart
+        is left untouched.
+        """
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        if connection.vendor not in UPSERT_RETURNING_VENDORS:
+            return self._merge_locked(source_cart_id, target_cart_id, using=using)
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        opts = self.model._meta  # noqa: SLF001
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        variant_table = qn(ProductVariant._meta.db_table)  # noqa: SLF001
+        least = "LEAST" if connection.vendor == "postgresql" else "MIN"
+        new_id = (
+            "gen_random_uuid()"
+            if connection.vendor == "postgresql"
+            else "lower(hex(randomblob(16)))"
+        )
+        sql = (
+            f"INSERT INTO {table} "  # noqa: S608
+            f"(id, created, modified, cart_id, variant_id, quantity, "
+            f"unit_price_at_add) "
+            f"SELECT {new_id}, %s, %s, %s, i.variant_id, "
+            f"{least}(i.quantity, v.stock_quantity), i.unit_price_at_add "
+            f"FROM {table} i JOIN {variant_table} v ON v.id = i.variant_id "
+            f"WHERE i.cart_id = %s AND v.is_active AND v.stock_quantity > 0 "
+            f"ON CONFLICT (cart_id, variant_id) DO UPDATE SET "
+            f"quantity = {least}({table}.quantity + EXCLUDED.quantity, "
+            f"(SELECT stock_quantity FROM {variant_table} "
+            f"WHERE id = {table}.variant_id)), "
+            f"modified = EXCLUDED.modified"
+        )
+        now = timezone.now()
+        cart_field = opts.get_field("cart")
+        params = [
+            opts.get_field("created").get_db_prep_value(now, connection),
+            opts.get_field("modified").get_db_prep_value(now, connection),
+            cart_field.get_db_prep_value(target_cart_id, connection),
+            cart_field.get_db_prep_value(source_cart_id, connection),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def _merge_locked(self, source_cart_id, target_cart_id, *, using):
+        merged = 0
+        with transaction.atomic(using=using):
+            for variant_id, quantity in (
+                self.model.lean.db_manager(using)
+                .filter(cart_id=source_cart_id)
+                .values_list("variant_id", "quantity")
+            ):
+                row = self._upsert_locked(
+                    target_cart_id,
+                    variant_id,
+                    quantity,
+                    increment=True,
+                    using=using,
+                )
+                merged += row is not None
+        return merged
+
+    def _upsert_locked(self, cart_id, variant_id, quantity, *, increment, using):
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        with transaction.atomic(using=using):
+            variant = (
+                ProductVariant.objects.db_manager(using)
+                .select_for_update()
+                .filter(pk=variant_id, is_active=True, stock_quantity__gt=0)
+                .values_list("stock_quantity", "price")
+                .first()
+            )
+            if variant is None:
+                return None
+            stock, price = variant
+            queryset = self.model.lean.db_manager(using)
+            item, created = queryset.get_or_create(
+                cart_id=cart_id,
+                variant_id=variant_id,
+                defaults={
+                    "quantity": min(quantity, stock),
+                    "unit_price_at_add": price,
+                },
+            )
+            if not created:
+                queryset.filter(pk=item.pk).update(
+                    quantity=Least(
+                        models.F("quantity") + quantity if increment else quantity,
+                        stock,
+                    ),
+                    modified=timezone.now(),
+                )
+                item.refresh_from_db(fields=["quantity"])
+        return item.pk, item.variant_id, item.quantity
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def active(self, now=None):
+        return self.filter(expires_at__gt=now or timezone.now())
+
+    def expired(self, now=None):
+        return self.filter(expires_at__lte=now or timezone.now())
+
+
+class StockReservationManager(
+    models.Manager.from_queryset(StockReservationQuerySet),
+):
+    """
+    Ledger of stock held for carts until ``expires_at``.
+
+    A variant's available stock is its ``stock_quantity`` minus the active
+    holds on it. ``reserve`` and ``consume`` lock only the affected variant
+    rows, always in primary key order, so concurrent checkouts of overlapping
+    variants queue up instead of deadlocking.
+    """
+
+    def get_held(self, variant_ids, *, exclude_cart=None):
+        holds = self.active().filter(variant_id__in=variant_ids)
+        if exclude_cart is not None:
+            holds = holds.exclude(cart_id=exclude_cart.pk)
+        return dict(
+            holds.order_by()
+            .values("variant_id")
+            .annotate(held=Sum("quantity"))
+            .values_list("variant_id", "held"),
+        )
+
+    def get_available(self, variant_ids, *, exclude_cart=None):
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        held = self.get_held(variant_ids, exclude_cart=exclude_cart)
+        return {
+            pk: max(stock - held.get(pk, 0), 0)
+            for pk, stock in ProductVariant.objects.active()
+            .filter(pk__in=variant_ids)
+            .values_list("pk", "stock_quantity")
+        }
+
+    def lock_variants(self, variant_ids):
+        """
+        Lock the active variants' rows in primary key order and return their stock.
+        """
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        return dict(
+            ProductVariant.objects.active()
+            .select_for_update()
+            .filter(pk__in=variant_ids)
+            .order_by("pk")
+            .values_list("pk", "stock_quantity"),
+        )
+
+    def check_available(self, cart, lines):
+        stock = self.lock_variants(lines)
+        held = self.get_held(lines, exclude_cart=cart)
+        shortages = {}
+        for variant_id, quantity in lines.items():
+            available = max(stock.get(variant_id, 0) - held.get(variant_id, 0), 0)
+            if quantity > available:
+                shortages[variant_id] = (quantity, available)
+        if shortages:
+            raise InsufficientStockError(shortages)
+
+    def reserve(self, cart, lines, *, ttl=None):
+        """
+        Hold ``{variant: quantity}`` for ``cart``, replacing its earlier holds.
+
+        Variants may be given as instances or pks. Raises
+        ``InsufficientStockError`` without holding anything if any line exceeds
+        the stock available to the cart.
+        """
+        lines = {
+            getattr(variant, "pk", variant): quantity
+            for variant, quantity in lines.items()
+            if quantity > 0
+        }
+        expires_at = timezone.now() + (
+            ttl or timedelta(minutes=settings.CART_RESERVATION_MINUTES)
+        )
+        with transaction.atomic():
+            self.check_available(cart, lines)
+            return self.bulk_create(
+                [
+                    self.model(
+                        cart_id=cart.pk,
+                        variant_id=variant_id,
+                        quantity=quantity,
+                        expires_at=expires_at,
+                    )
+                    for variant_id, quantity in lines.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "variant"],
+                update_fields=["quantity", "expires_at", "modified"],
+            )
+
+    def release(self, cart, variants=None):
+        holds = self.filter(cart_id=cart.pk)
+        if variants is not None:
+            holds = holds.filter(
+                variant_id__in=[
+                    getattr(variant, "pk", variant) for variant in variants
+                ],
+            )
+        deleted, _ = holds.delete()
+        return deleted
+
+    def consume(self, cart):
+        """
+        Take the cart's held quantities out of stock and drop the holds.
+
+        Holds that expired in the meantime are honoured if the stock is still
+        there. Returns ``{variant_id: quantity}``.
+        """
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        with transaction.atomic():
+            holds = self.filter(cart_id=cart.pk)
+            lines = dict(holds.values_list("variant_id", "quantity"))
+            if not lines:
+                return lines
+            self.check_available(cart, lines)
+            ProductVariant.objects.filter(pk__in=lines).update(
+                stock_quantity=Case(
+                    *(
+                        When(pk=variant_id, then=F("stock_quantity") - quantity)
+                        for variant_id, quantity in lines.items()
+                    ),
+                ),
+            )
+            holds.delete()
+        return lines
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:10
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_unit_price_at_add(apps, schema_editor):
+    CartItem = apps.get_model('cart', 'CartItem')
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    CartItem.objects.update(
+        unit_price_at_add=Subquery(
+            ProductVariant.objects.filter(pk=OuterRef('variant_id')).values('price')[:1],
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+        ('products', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='unit_price_at_add',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Unit price when added'),
+        ),
+        migrations.RunPython(fill_unit_price_at_add, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='unit_price_at_add',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))], verbose_name='Unit price when added'),
+        ),
+    ]
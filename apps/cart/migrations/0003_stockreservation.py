@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:33
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cartitem_unit_price_at_add'),
+        ('products', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('id', model_utils.fields.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Quantity')),
+                ('expires_at', models.DateTimeField(verbose_name='Expires at')),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='cart.cart', verbose_name='Cart')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.productvariant', verbose_name='Product variant')),
+            ],
+            options={
+                'verbose_name': 'Stock reservation',
+                'verbose_name_plural': 'Stock reservations',
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['variant', 'expires_at'], name='cart_stockr_variant_a8eaba_idx'), models.Index(fields=['expires_at'], name='cart_stockr_expires_4e6eba_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cart', 'variant'), name='unique_reservation_per_cart_variant')],
+            },
+        ),
+    ]
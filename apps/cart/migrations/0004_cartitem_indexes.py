@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_stockreservation'),
+        ('products', '0004_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['cart', 'created'], name='cart_cartit_cart_id_1f17a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['variant', 'cart'], name='cart_cartit_variant_f7782b_idx'),
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='variant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='products.productvariant', verbose_name='Product variant'),
+        ),
+    ]
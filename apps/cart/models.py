@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -9,6 +11,8 @@ from model_utils.models import UUIDModel
 from .choices import CartStatus
 from .managers import CartItemManager
 from .managers import CartManager
+from .managers import LeanCartItemManager
+from .managers import StockReservationManager
 
 
 class Cart(UUIDModel, TimeStampedModel):
@@ -88,14 +92,22 @@ class CartItem(UUIDModel, TimeStampedModel):
         verbose_name=_("Product variant"),
         related_name="cart_items",
         on_delete=models.CASCADE,
+        db_index=False,
     )
     quantity = models.PositiveIntegerField(
         verbose_name=_("Quantity"),
         validators=[MinValueValidator(1)],
         default=1,
     )
+    unit_price_at_add = models.DecimalField(
+        verbose_name=_("Unit price when added"),
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal("0.00"))],
+    )
 
     objects = CartItemManager()
+    lean = LeanCartItemManager()
 
     class Meta:
         verbose_name = _("Cart item")
@@ -106,6 +118,10 @@ class CartItem(UUIDModel, TimeStampedModel):
                 name="unique_variant_per_cart",
             ),
         ]
+        indexes = [
+            models.Index(fields=["cart", "created"]),
+            models.Index(fields=["variant", "cart"]),
+        ]
         ordering = ["cart_id", "created"]
 
     def __str__(self):
@@ -114,3 +130,45 @@ class CartItem(UUIDModel, TimeStampedModel):
     @property
     def line_total(self):
         return self.variant.price * self.quantity
+
+
+class StockReservation(UUIDModel, TimeStampedModel):
+    cart = models.ForeignKey(
+        to=Cart,
+        verbose_name=_("Cart"),
+        related_name="reservations",
+        on_delete=models.CASCADE,
+    )
+    variant = models.ForeignKey(
+        to="products.ProductVariant",
+        verbose_name=_("Product variant"),
+        related_name="reservations",
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField(
+        verbose_name=_("Quantity"),
+        validators=[MinValueValidator(1)],
+    )
+    expires_at = models.DateTimeField(
+        verbose_name=_("Expires at"),
+    )
+
+    objects = StockReservationManager()
+
+    class Meta:
+        verbose_name = _("Stock reservation")
+        verbose_name_plural = _("Stock reservations")
+        indexes = [
+            models.Index(fields=["variant", "expires_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "variant"],
+                name="unique_reservation_per_cart_variant",
+            ),
+        ]
+        ordering = ["expires_at"]
+
+    def __str__(self):
+        return f"{self.cart_id} - {self.variant_id} x {self.quantity}"
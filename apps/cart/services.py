@@ -0,0 +1,511 @@
+import hashlib
+from dataclasses import dataclass
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.core.cache import get_cache_version
+from apps.products.models import ProductVariant
+from apps.products.utils import CATALOG_CACHE_NAMESPACE
+
+from .choices import CartStatus
+from .models import Cart
+from .models import CartItem
+from .models import StockReservation
+from .session import SessionCart
+from .utils import MINI_CART_TIMEOUT
+from .utils import get_mini_cart_key
+from .utils import invalidate_mini_cart
+
+
+@dataclass(frozen=True, slots=True)
+class CartLine:
+    id: UUID
+    variant_id: UUID
+    quantity: int
+
+
+CART_TOTALS_FIELDS = ("item_count", "total_quantity", "subtotal")
+
+
+@dataclass(frozen=True, slots=True)
+class CartTotals:
+    item_count: int = 0
+    total_quantity: int = 0
+    subtotal: Decimal = Decimal("0.00")
+
+
+@dataclass(frozen=True, slots=True)
+class CartLineChange:
+    cart_id: UUID
+    item_id: UUID
+    variant_id: UUID
+    sku: str
+    quantity: int
+    unit_price_at_add: Decimal
+    price: Decimal
+    stock_quantity: int
+    is_active: bool
+
+    @property
+    def shortfall(self):
+        return max(self.quantity - self.stock_quantity, 0)
+
+
+@dataclass(frozen=True, slots=True)
+class CartRevalidation:
+    changes: tuple = ()
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    @property
+    def price_changes(self):
+        return [
+            change
+            for change in self.changes
+            if change.is_active and change.price != change.unit_price_at_add
+        ]
+
+    @property
+    def stock_shortfalls(self):
+        return [
+            change for change in self.changes if change.is_active and change.shortfall
+        ]
+
+    @property
+    def deactivated(self):
+        return [change for change in self.changes if not change.is_active]
+
+
+def revalidate_carts(*, cart=None, variants=None):
+    """
+    Diff open cart lines against their variants' live price, stock and status.
+
+    Restrict to one ``cart`` or to lines of the given ``variants`` (instances or
+    pks), e.g. all open carts holding a SKU whose price just changed. Lines are
+    compared in a single query, whatever the number of carts.
+    """
+    items = CartItem.lean.open()
+    if cart is not None:
+        items = items.filter(cart_id=cart.pk)
+    if variants is not None:
+        items = items.filter(
+            variant_id__in=[getattr(variant, "pk", variant) for variant in variants],
+        )
+    rows = items.needing_revalidation().values_list(
+        "cart_id",
+        "pk",
+        "variant_id",
+        "variant__sku",
+        "quantity",
+        "unit_price_at_add",
+        "variant__price",
+        "variant__stock_quantity",
+        "variant__is_active",
+    )
+    return CartRevalidation(tuple(CartLineChange(*row) for row in rows))
+
+
+class CartService:
+    """
+    Write cart lines with one upsert statement each, safe under concurrency.
+
+    Quantities are clamped to the variant's ``stock_quantity`` inside the
+    statement, so double clicks and parallel requests can neither lose an
+    update nor overshoot the stock. Inactive and out-of-stock variants are
+    not added.
+
+    Totals are priced at the variants' current prices, which is what
+    checkout charges. ``unit_price_at_add`` only records the price a line
+    was added at, for ``revalidate_carts`` to report changes. Every service
+    must price totals the same way.
+
+    This is the default ``CART_SERVICE``. Alternative services, such as
+    ``apps.cart.hot.RedisCartService``, subclass it and may buffer writes,
+    which ``flush()`` persists to ``Cart`` and ``CartItem``.
+    """
+
+    @classmethod
+    def add(cls, cart, variant, quantity=1):
+        """
+        Add ``quantity`` to the line, and return ``(line, totals)``.
+
+        ``line`` is ``None`` when the variant could not be added. Raises
+        ``ValueError`` for a quantity below 1.
+        """
+        return cls._upsert(cart, variant, quantity, increment=True)
+
+    @classmethod
+    def update(cls, cart, variant, quantity):
+        """
+        Set the line to ``quantity``, removing it at zero. Return ``(line, totals)``.
+        """
+        if quantity <= 0:
+            return cls.remove(cart, variant)
+        return cls._upsert(cart, variant, quantity, increment=False)
+
+    @classmethod
+    def remove(cls, cart, variant):
+        with transaction.atomic():
+            CartItem.lean.filter(
+                cart_id=cart.pk,
+                variant_id=getattr(variant, "pk", variant),
+            ).delete()
+            cls.touch(cart)
+            return None, cls.get_totals(cart)
+
+    @classmethod
+    def reserve(cls, cart, ttl=None):
+        """
+        Hold stock for every line of ``cart``, see ``StockReservation.objects``.
+        """
+        cls.flush(cart)
+        lines = dict(
+            CartItem.lean.filter(cart_id=cart.pk).values_list("variant_id", "quantity"),
+        )
+        with transaction.atomic():
+            StockReservation.objects.release(cart)
+            return StockReservation.objects.reserve(cart, lines, ttl=ttl)
+
+    @classmethod
+    def reprice(cls, cart):
+        """
+        Accept the current prices for every line of ``cart``.
+        """
+        cls.release(Cart.objects.filter(pk=cart.pk))
+        with transaction.atomic():
+            CartItem.lean.filter(cart_id=cart.pk).reprice()
+            cls.touch(cart)
+
+    @staticmethod
+    def get_totals(cart):
+        return CartTotals(
+            **Cart.objects.filter(pk=cart.pk)
+            .with_totals()
+            .values(*CART_TOTALS_FIELDS)
+            .get(),
+        )
+
+    @staticmethod
+    def get_open_totals(carts):
+        """
+        Return the ``CartTotals`` of the open cart among the ``carts`` queryset.
+        """
+        row = carts.open().with_totals().values(*CART_TOTALS_FIELDS).first()
+        return CartTotals(**row) if row else CartTotals()
+
+    @staticmethod
+    def get_lines(cart, skus=None):
+        """
+        Return the lines of ``cart`` as ``CartItem`` objects, see ``get_cart_lines``.
+        """
+        items = CartItem.lean.with_variant().filter(cart_id=cart.pk).order_by("created")
+        if skus is not None:
+            items = items.filter(variant__sku__in=skus)
+        return list(items)
+
+    @staticmethod
+    def get_revision(cart_id):
+        """
+        Return a token for writes not reflected in the cart's ``modified`` yet.
+
+        ``None`` here, as every write touches the cart row.
+        """
+
+    @staticmethod
+    def flush(cart):
+        """
+        Persist the buffered writes of ``cart``. Nothing is buffered here.
+        """
+
+    @staticmethod
+    def flush_pending():
+        """
+        Persist the buffered writes of all carts, return the number of carts.
+        """
+        return 0
+
+    @staticmethod
+    def release(carts):
+        """
+        Flush and drop any buffered state of the ``carts`` queryset.
+
+        Called before carts are written without the service, e.g. merged at
+        login, so the buffer is reloaded from the database afterwards.
+        """
+
+    @staticmethod
+    def touch(cart):
+        Cart.objects.filter(pk=cart.pk).update(modified=timezone.now())
+        invalidate_mini_cart(cart)
+
+    @classmethod
+    def _upsert(cls, cart, variant, quantity, *, increment):
+        with transaction.atomic():
+            row = CartItem.objects.upsert(
+                cart.pk,
+                getattr(variant, "pk", variant),
+                quantity,
+                increment=increment,
+            )
+            line = CartLine(*row) if row else None
+            cls.touch(cart)
+            return line, cls.get_totals(cart)
+
+
+def get_cart_service():
+    """
+    Return the cart service class named by ``CART_SERVICE``.
+    """
+    return import_string(settings.CART_SERVICE)
+
+
+def get_user_cart(user):
+    cart, _ = Cart.objects.get_or_create(user=user, status=CartStatus.OPEN)
+    return cart
+
+
+def get_open_cart(request):
+    """
+    Return the request's open ``Cart`` row, or ``None`` if it has none yet.
+
+    Anonymous visitors only have one once their session cart was persisted,
+    so browsing traffic never queries the cart tables.
+    """
+    if request.user.is_authenticated:
+        return Cart.objects.open().filter(user=request.user).first()
+    cart_id = SessionCart(request.session).cart_id
+    if cart_id is None:
+        return None
+    return Cart.objects.open().filter(pk=cart_id, user__isnull=True).first()
+
+
+def merge_lines(cart, lines):
+    """
+    Add ``{sku: quantity}`` lines to ``cart``, summing quantities per variant.
+
+    Quantities are clamped to stock. Unknown, inactive and sold-out SKUs are
+    dropped. Runs a fixed number of queries whatever the number of lines.
+    """
+    variants = {
+        sku: (pk, price, stock)
+        for sku, pk, price, stock in ProductVariant.objects.active()
+        .filter(sku__in=list(lines), stock_quantity__gt=0)
+        .values_list("sku", "pk", "price", "stock_quantity")
+    }
+    if not variants:
+        return
+    now = timezone.now()
+    existing = {
+        item.variant_id: item
+        for item in CartItem.lean.filter(
+            cart=cart,
+            variant_id__in=[pk for pk, _, _ in variants.values()],
+        )
+    }
+    new_items = []
+    for sku, (variant_id, price, stock) in variants.items():
+        item = existing.get(variant_id)
+        if item is None:
+            new_items.append(
+                CartItem(
+                    cart=cart,
+                    variant_id=variant_id,
+                    quantity=min(lines[sku], stock),
+                    unit_price_at_add=price,
+                ),
+            )
+        else:
+            item.quantity = min(item.quantity + lines[sku], stock)
+            item.modified = now
+    CartItem.objects.bulk_update(existing.values(), ["quantity", "modified"])
+    CartItem.objects.bulk_create(new_items)
+    CartService.touch(cart)
+
+
+def persist_session_cart(request, user=None):
+    """
+    Move the session cart into a ``Cart`` row and return it.
+
+    ``user`` defaults to ``request.user``. Authenticated users get the lines
+    merged into their open cart, together with any anonymous cart persisted
+    earlier in the session, see ``Cart.objects.merge_into_user_cart``.
+    Anonymous visitors get a cart keyed by their session. Called at login, at
+    checkout and when the session cart grows past ``CART_SESSION_MAX_LINES``.
+    """
+    session_cart = SessionCart(request.session)
+    user = user or request.user
+    if user.is_authenticated:
+        if not session_cart and session_cart.cart_id is None:
+            return Cart.objects.open().filter(user=user).first()
+        get_cart_service().release(
+            Cart.objects.open().filter(Q(user=user) | Q(pk=session_cart.cart_id)),
+        )
+        with transaction.atomic():
+            cart = Cart.objects.merge_into_user_cart(session_cart.cart_id, user)
+            if session_cart:
+                cart = cart or get_user_cart(user)
+                merge_lines(cart, session_cart.lines)
+        session_cart.lines.clear()
+        session_cart.cart_id = None
+        return cart
+
+    cart = get_open_cart(request)
+    if not session_cart:
+        return cart
+    if request.session.session_key is None:
+        request.session.save()
+    if cart is not None:
+        get_cart_service().release(Cart.objects.filter(pk=cart.pk))
+    with transaction.atomic():
+        if cart is None:
+            cart, _ = Cart.objects.get_or_create(
+                session_key=request.session.session_key,
+                status=CartStatus.OPEN,
+            )
+        merge_lines(cart, session_cart.lines)
+    session_cart.lines.clear()
+    session_cart.cart_id = cart.pk
+    return cart
+
+
+def add_to_cart(request, sku, quantity=1):
+    """
+    Add ``quantity`` of ``sku`` to the request's cart and return the cart.
+
+    Anonymous visitors without a persisted cart only touch the session until
+    the cart crosses ``CART_SESSION_MAX_LINES``, and get a ``SessionCart``
+    back. Everyone else gets the ``Cart`` row.
+    """
+    session_cart = SessionCart(request.session)
+    if not request.user.is_authenticated:
+        cart = get_open_cart(request) if session_cart.cart_id else None
+        if cart is None:
+            session_cart.cart_id = None
+            session_cart.add(sku, quantity)
+            if session_cart.is_over_threshold:
+                return persist_session_cart(request)
+            return session_cart
+    else:
+        cart = persist_session_cart(request) or get_user_cart(request.user)
+    variant_id = (
+        ProductVariant.objects.filter(sku=sku).values_list("pk", flat=True).first()
+    )
+    if variant_id is not None:
+        get_cart_service().add(cart, variant_id, quantity)
+    return cart
+
+
+def get_mini_cart(request):
+    """
+    Return the ``CartTotals`` shown in the header badge.
+
+    Session carts are summarised without a query. Persisted carts cost one
+    cache read, or one indexed query on a miss. ``subtotal`` is ``None`` for
+    session carts, which do not know prices.
+    """
+    if request.user.is_authenticated:
+        key = get_mini_cart_key(user_id=request.user.pk)
+        carts = Cart.objects.filter(user=request.user)
+    else:
+        session_cart = SessionCart(request.session)
+        if session_cart.cart_id is None:
+            return CartTotals(
+                item_count=len(session_cart),
+                total_quantity=session_cart.total_quantity,
+                subtotal=None,
+            )
+        key = get_mini_cart_key(cart_id=session_cart.cart_id)
+        carts = Cart.objects.filter(pk=session_cart.cart_id, user__isnull=True)
+    totals = cache.get(key)
+    if totals is None:
+        totals = get_cart_service().get_open_totals(carts)
+        cache.set(key, totals, timeout=MINI_CART_TIMEOUT)
+    return totals
+
+
+def update_cart(request, sku, quantity):
+    """
+    Set ``sku`` to ``quantity`` in the request's cart and return the cart.
+
+    A quantity of zero removes the line. Mirrors ``add_to_cart``: session
+    carts are updated without touching the database.
+    """
+    session_cart = SessionCart(request.session)
+    if not request.user.is_authenticated:
+        cart = get_open_cart(request) if session_cart.cart_id else None
+        if cart is None:
+            session_cart.cart_id = None
+            session_cart.update(sku, quantity)
+            return session_cart
+    else:
+        cart = persist_session_cart(request) or get_user_cart(request.user)
+    variant_id = (
+        ProductVariant.objects.filter(sku=sku).values_list("pk", flat=True).first()
+    )
+    if variant_id is not None:
+        get_cart_service().update(cart, variant_id, quantity)
+    return cart
+
+
+def get_cart_lines(cart, skus=None):
+    """
+    Return the lines of a ``Cart`` or ``SessionCart`` as ``CartItem`` objects.
+
+    ``skus`` restricts the lines to those SKUs. Session lines are unsaved
+    instances, so templates render both kinds of cart alike.
+    """
+    if isinstance(cart, Cart):
+        return get_cart_service().get_lines(cart, skus)
+    lines = cart.lines
+    variants = ProductVariant.objects.filter(
+        sku__in=[sku for sku in lines if skus is None or sku in skus],
+    )
+    return [
+        CartItem(
+            variant=variant,
+            quantity=lines[variant.sku],
+            unit_price_at_add=variant.price,
+        )
+        for variant in variants.select_related("product").order_by("sku")
+    ]
+
+
+def get_cart_etag(request):
+    """
+    Return a weak ETag for the request's cart fragments.
+
+    Persisted carts are fingerprinted by id, ``modified`` timestamp and item
+    count, read in one query that never loads the items. Session carts are
+    fingerprinted by their lines without any query. The catalog cache version
+    is mixed in, as line totals follow the current variant prices.
+    """
+    session_cart = SessionCart(request.session)
+    if request.user.is_authenticated:
+        carts = Cart.objects.filter(user=request.user)
+    elif session_cart.cart_id is not None:
+        carts = Cart.objects.filter(pk=session_cart.cart_id, user__isnull=True)
+    else:
+        carts = None
+    if carts is None:
+        state = sorted(session_cart.lines.items())
+    else:
+        state = (
+            carts.open()
+            .annotate(item_count=Count("items"))
+            .values_list("pk", "modified", "item_count")
+            .first()
+        )
+        if state is not None:
+            state = (*state, get_cart_service().get_revision(state[0]))
+    version = get_cache_version(CATALOG_CACHE_NAMESPACE)
+    digest = hashlib.md5(f"{state}:{version}".encode(), usedforsecurity=False)
+    return f'W/"{digest.hexdigest()}"'
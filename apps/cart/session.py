@@ -0,0 +1,70 @@
+from django.conf import settings
+
+
+class SessionCart:
+    """
+    Anonymous cart kept in the session as a compact ``{sku: quantity}`` map.
+
+    Nothing is written to the database until the cart is persisted, see
+    ``apps.cart.services.persist_session_cart``. Once it has been, the session
+    only keeps the id of the ``Cart`` row under ``cart_id``.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.data = session.get(settings.CART_SESSION_KEY) or {}
+        self.lines = self.data.setdefault("lines", {})
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.items())
+
+    def __contains__(self, sku):
+        return sku in self.lines
+
+    @property
+    def total_quantity(self):
+        return sum(self.lines.values())
+
+    @property
+    def cart_id(self):
+        return self.data.get("cart_id")
+
+    @cart_id.setter
+    def cart_id(self, value):
+        if value is None:
+            self.data.pop("cart_id", None)
+        else:
+            self.data["cart_id"] = str(value)
+        self.save()
+
+    @property
+    def is_over_threshold(self):
+        return len(self.lines) > settings.CART_SESSION_MAX_LINES
+
+    def add(self, sku, quantity=1):
+        return self.update(sku, self.lines.get(sku, 0) + quantity)
+
+    def update(self, sku, quantity):
+        if quantity > 0:
+            self.lines[sku] = quantity
+        else:
+            self.lines.pop(sku, None)
+        self.save()
+        return quantity
+
+    def remove(self, sku):
+        self.update(sku, 0)
+
+    def clear(self):
+        self.lines.clear()
+        self.save()
+
+    def save(self):
+        if self.lines or self.cart_id:
+            self.session[settings.CART_SESSION_KEY] = self.data
+        else:
+            self.session.pop(settings.CART_SESSION_KEY, None)
+        self.session.modified = True
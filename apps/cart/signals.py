@@ -0,0 +1,29 @@
+from allauth.account.signals import user_logged_in
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Cart
+from .models import CartItem
+from .services import persist_session_cart
+from .utils import invalidate_mini_cart
+
+
+@receiver(user_logged_in)
+def merge_session_cart(sender, request, user, **kwargs):
+    persist_session_cart(request, user)
+
+
+@receiver([post_save, post_delete], sender=Cart)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    invalidate_mini_cart(instance)
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def invalidate_cart_item_summary(sender, instance, **kwargs):
+    if CartItem.cart.is_cached(instance):
+        cart = instance.cart
+    else:
+        cart = Cart.objects.only("user_id").filter(pk=instance.cart_id).first()
+    if cart is not None:
+        invalidate_mini_cart(cart)
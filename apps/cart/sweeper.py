@@ -0,0 +1,108 @@
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .choices import CartStatus
+from .models import Cart
+from .models import CartItem
+
+
+@dataclass
+class SweepStats:
+    marked_abandoned: int = 0
+    purged_carts: int = 0
+    purged_items: int = 0
+    batches: int = 0
+    complete: bool = True
+    seconds: float = 0.0
+
+
+class CartSweeper:
+    """
+    Mark stale open carts as abandoned and purge old anonymous abandoned carts.
+
+    Carts are walked in keyset order on ``(modified, id)`` and written in
+    batches of ``batch_size``, each in its own transaction, so locks on the
+    cart tables are short-lived. The sweep stops between batches once
+    ``time_budget`` seconds have passed, and the next run picks up the rest.
+    """
+
+    def __init__(
+        self,
+        *,
+        abandon_after=None,
+        purge_after=None,
+        batch_size=None,
+        time_budget=None,
+    ):
+        self.abandon_after = abandon_after or timedelta(
+            days=settings.CART_ABANDON_AFTER_DAYS,
+        )
+        self.purge_after = purge_after or timedelta(
+            days=settings.CART_PURGE_AFTER_DAYS,
+        )
+        self.batch_size = batch_size or settings.CART_SWEEP_BATCH_SIZE
+        self.time_budget = (
+            settings.CART_SWEEP_TIME_BUDGET if time_budget is None else time_budget
+        )
+        self.stats = SweepStats()
+
+    def run(self):
+        started = time.monotonic()
+        self.deadline = started + self.time_budget
+        now = timezone.now()
+        self.mark_abandoned(now - self.abandon_after)
+        self.purge_abandoned(now - self.purge_after)
+        self.stats.seconds = time.monotonic() - started
+        return self.stats
+
+    def is_out_of_time(self):
+        if time.monotonic() >= self.deadline:
+            self.stats.complete = False
+        return not self.stats.complete
+
+    def iter_batches(self, queryset):
+        """
+        Yield lists of cart ids from ``queryset``, one page per batch.
+        """
+        queryset = queryset.order_by("modified", "pk")
+        last = None
+        while not self.is_out_of_time():
+            page = queryset
+            if last is not None:
+                page = page.filter(
+                    Q(modified__gt=last[0]) | Q(modified=last[0], pk__gt=last[1]),
+                )
+            rows = list(page.values_list("modified", "pk")[: self.batch_size])
+            if not rows:
+                return
+            self.stats.batches += 1
+            yield [pk for _, pk in rows]
+            last = rows[-1]
+
+    def mark_abandoned(self, before):
+        stale = Cart.objects.open().filter(modified__lt=before)
+        for pks in self.iter_batches(stale):
+            # Re-check the filter, carts may have been touched since the read.
+            with transaction.atomic():
+                self.stats.marked_abandoned += stale.filter(pk__in=pks).update(
+                    status=CartStatus.ABANDONED,
+                )
+
+    def purge_abandoned(self, before):
+        expired = Cart.objects.filter(
+            status=CartStatus.ABANDONED,
+            user__isnull=True,
+            modified__lt=before,
+        )
+        for pks in self.iter_batches(expired):
+            with transaction.atomic():
+                _, deleted = CartItem.lean.filter(cart_id__in=pks).delete()
+                self.stats.purged_items += deleted.get(CartItem._meta.label, 0)  # noqa: SLF001
+                _, deleted = expired.filter(pk__in=pks).delete()
+                self.stats.purged_carts += deleted.get(Cart._meta.label, 0)  # noqa: SLF001
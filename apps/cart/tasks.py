@@ -0,0 +1,54 @@
+import logging
+from dataclasses import asdict
+
+from celery import shared_task
+from django.conf import settings
+
+from .models import StockReservation
+from .services import get_cart_service
+from .sweeper import CartSweeper
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def sweep_carts():
+    stats = asdict(CartSweeper().run())
+    logger.info(
+        "Cart sweep: %(marked_abandoned)d marked abandoned, %(purged_carts)d carts "
+        "and %(purged_items)d items purged in %(batches)d batches "
+        "(%(seconds).2fs, complete=%(complete)s).",
+        stats,
+        extra={"cart_sweep": stats},
+    )
+    return stats
+
+
+@shared_task
+def reap_stock_reservations():
+    deleted, _ = StockReservation.objects.expired().delete()
+    logger.info(
+        "Reaped %d expired stock reservations.",
+        deleted,
+        extra={"reaped_reservations": deleted},
+    )
+    return deleted
+
+
+@shared_task
+def flush_hot_carts():
+    """
+    Persist the carts buffered by the ``CART_SERVICE``, one batch per run.
+
+    Runs shortly after buffered writes and on a schedule, which replays carts
+    whose earlier flush was lost.
+    """
+    flushed = get_cart_service().flush_pending()
+    if flushed >= settings.CART_HOT_FLUSH_BATCH_SIZE:
+        flush_hot_carts.delay()
+    logger.info(
+        "Flushed %d hot carts.",
+        flushed,
+        extra={"flushed_hot_carts": flushed},
+    )
+    return flushed
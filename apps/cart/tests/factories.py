@@ -1,4 +1,5 @@
 from factory import Faker
+from factory import LazyAttribute
 from factory import Sequence
 from factory import SubFactory
 from factory import Trait
@@ -50,6 +51,7 @@ class CartItemFactory(DjangoModelFactory):
     cart = SubFactory(CartFactory)
     variant = SubFactory(ProductVariantFactory)
     quantity = Faker("random_int", min=1, max=5)
+    unit_price_at_add = LazyAttribute(lambda item: item.variant.price)
 
     class Meta:
         model = CartItem
@@ -0,0 +1,70 @@
+from importlib import import_module
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from apps.cart.context_processors import mini_cart_processor
+from apps.cart.services import CartService
+from apps.cart.session import SessionCart
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+from .factories import CartFactory
+from .factories import CartItemFactory
+
+
+@pytest.fixture
+def mini_cart():
+    def mini_cart(user=None, session=None):
+        request = RequestFactory().get("/")
+        request.user = user or AnonymousUser()
+        request.session = (
+            session or import_module(settings.SESSION_ENGINE).SessionStore()
+        )
+        return mini_cart_processor(request)["mini_cart"]
+
+    return mini_cart
+
+
+@pytest.mark.django_db
+class TestMiniCartProcessor:
+    def test_is_lazy(self, mini_cart, django_assert_num_queries):
+        user = UserFactory()
+        with django_assert_num_queries(0):
+            mini_cart(user=user)
+
+    def test_session_cart_needs_no_query(self, mini_cart, django_assert_num_queries):
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        SessionCart(session).add("SKU-1", 2)
+        with django_assert_num_queries(0):
+            assert mini_cart(session=session).total_quantity == 2  # noqa: PLR2004
+
+    def test_user_cart_is_read_once_then_cached(
+        self,
+        mini_cart,
+        django_assert_num_queries,
+    ):
+        cart = CartFactory(items=[{"quantity": 2}, {"quantity": 1}])
+        with django_assert_num_queries(1):
+            assert mini_cart(user=cart.user).total_quantity == 3  # noqa: PLR2004
+        with django_assert_num_queries(0):
+            assert mini_cart(user=cart.user).item_count == 2  # noqa: PLR2004
+
+    def test_is_invalidated_on_item_writes(self, mini_cart):
+        cart = CartFactory(items=[{"quantity": 2}])
+        assert mini_cart(user=cart.user).total_quantity == 2  # noqa: PLR2004
+        CartItemFactory(cart=cart, quantity=3)
+        assert mini_cart(user=cart.user).total_quantity == 5  # noqa: PLR2004
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartService.add(cart, variant, 4)
+        assert mini_cart(user=cart.user).total_quantity == 9  # noqa: PLR2004
+        cart.items.all().delete()
+        assert mini_cart(user=cart.user).total_quantity == 0
+
+    def test_user_without_cart(self, mini_cart):
+        user = UserFactory()
+        assert mini_cart(user=user).total_quantity == 0
+        CartFactory(user=user, items=[{"quantity": 1}])
+        assert mini_cart(user=user).total_quantity == 1
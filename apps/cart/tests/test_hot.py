@@ -0,0 +1,191 @@
+from decimal import Decimal
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+import redis
+from django.conf import settings
+from django.urls import reverse
+
+from apps.cart.hot import RedisCartService
+from apps.cart.hot import get_redis
+from apps.cart.models import Cart
+from apps.cart.models import CartItem
+from apps.cart.models import StockReservation
+from apps.cart.services import CartService
+from apps.cart.services import get_cart_service
+from apps.cart.tasks import flush_hot_carts
+from apps.cart.utils import get_hot_cart_dirty_key
+from apps.products.models import ProductVariant
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+from .factories import CartFactory
+
+
+def is_redis_available():
+    try:
+        return redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=0.2,
+        ).ping()
+    except redis.RedisError:
+        return False
+
+
+requires_redis = pytest.mark.skipif(
+    not is_redis_available(),
+    reason="needs a Redis server at REDIS_URL",
+)
+
+
+@pytest.fixture
+def hot_carts(settings):
+    settings.CART_SERVICE = "apps.cart.hot.RedisCartService"
+    settings.CART_HOT_KEY_PREFIX = f"test:cart:hot:{uuid4().hex}"
+    yield RedisCartService
+    client = get_redis()
+    for key in client.scan_iter(match=f"{settings.CART_HOT_KEY_PREFIX}:*"):
+        client.delete(key)
+
+
+class TestGetCartService:
+    def test_defaults_to_database_service(self):
+        assert get_cart_service() is CartService
+
+    def test_follows_setting(self, settings):
+        settings.CART_SERVICE = "apps.cart.hot.RedisCartService"
+        assert get_cart_service() is RedisCartService
+
+
+@requires_redis
+@pytest.mark.django_db
+class TestRedisCartService:
+    def test_writes_are_buffered_until_flushed(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(price=Decimal("2.50"), stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        line, totals = hot_carts.add(cart, variant, 3)
+        assert line.quantity == 5  # noqa: PLR2004
+        assert totals.subtotal == Decimal("12.50")
+        assert not CartItem.lean.filter(cart_id=cart.pk).exists()
+        assert [item.quantity for item in hot_carts.get_lines(cart)] == [5]
+        hot_carts.flush(cart)
+        item = CartItem.lean.get(cart_id=cart.pk)
+        assert item.quantity == 5  # noqa: PLR2004
+        assert item.unit_price_at_add == Decimal("2.50")
+
+    def test_loads_persisted_lines_and_clamps_to_stock(self, hot_carts):
+        variant = ProductVariantFactory(stock_quantity=4)
+        cart = CartFactory(items=[{"variant": variant, "quantity": 3}])
+        line, _ = hot_carts.add(cart, variant, 5)
+        assert line.quantity == 4  # noqa: PLR2004
+        line, totals = hot_carts.add(cart, ProductVariantFactory(is_active=False))
+        assert line is None
+        assert totals.item_count == 1
+
+    def test_flush_removes_dropped_lines(self, hot_carts):
+        kept, dropped = ProductVariantFactory.create_batch(2, stock_quantity=10)
+        cart = CartFactory(
+            items=[{"variant": kept, "quantity": 1}, {"variant": dropped}],
+        )
+        hot_carts.update(cart, kept, 2)
+        hot_carts.update(cart, dropped, 0)
+        hot_carts.flush(cart)
+        lines = CartItem.lean.filter(cart_id=cart.pk).values_list(
+            "variant_id",
+            "quantity",
+        )
+        assert dict(lines) == {kept.pk: 2}
+
+    def test_task_replays_unflushed_carts(self, hot_carts):
+        carts = CartFactory.create_batch(3)
+        variant = ProductVariantFactory(stock_quantity=10)
+        for cart in carts:
+            hot_carts.add(cart, variant)
+        # The write-behind tasks never ran, as after a worker crash.
+        assert flush_hot_carts.apply().get() == 3  # noqa: PLR2004
+        assert CartItem.lean.filter(variant=variant).count() == 3  # noqa: PLR2004
+        assert not get_redis().zcard(get_hot_cart_dirty_key())
+
+    def test_flush_of_evicted_cart_keeps_persisted_lines(self, hot_carts):
+        variant = ProductVariantFactory(stock_quantity=10)
+        cart = CartFactory(items=[{"variant": variant, "quantity": 3}])
+        hot_carts.add(cart, variant)
+        # Redis evicted the hashes before the write-behind flush ran.
+        get_redis().delete(*hot_carts._get_keys(cart.pk))  # noqa: SLF001
+        hot_carts.flush(cart)
+        assert CartItem.lean.get(cart_id=cart.pk).quantity == 3  # noqa: PLR2004
+        assert not get_redis().zcard(get_hot_cart_dirty_key())
+
+    def test_stale_flush_does_not_overwrite_newer_lines(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        lines, prices = hot_carts._read(cart.pk)  # noqa: SLF001
+        revision = hot_carts.get_revision(cart.pk)
+        hot_carts.add(cart, variant, 3)
+        hot_carts.flush(cart)
+        # A flush that read the cart before the second write persists late.
+        hot_carts._persist(cart.pk, lines, prices, revision)  # noqa: SLF001
+        assert CartItem.lean.get(cart_id=cart.pk).quantity == 5  # noqa: PLR2004
+
+    @pytest.mark.parametrize("quantity", [0, -1])
+    def test_add_rejects_quantities_below_one(self, hot_carts, quantity):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        with pytest.raises(ValueError, match="at least 1"):
+            hot_carts.add(cart, variant, quantity)
+        assert [item.quantity for item in hot_carts.get_lines(cart)] == [2]
+
+    def test_checkout_reserves_flushed_lines(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        hot_carts.reserve(cart)
+        assert StockReservation.objects.get(cart=cart).quantity == 2  # noqa: PLR2004
+
+    def test_release_reloads_from_database(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        hot_carts.release(Cart.objects.filter(pk=cart.pk))
+        CartItem.lean.filter(cart_id=cart.pk).update(quantity=5)
+        assert hot_carts.get_totals(cart).total_quantity == 5  # noqa: PLR2004
+
+    def test_totals_use_current_prices_like_the_database_service(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(price=Decimal("5.00"), stock_quantity=10)
+        hot_carts.add(cart, variant, 2)
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        assert hot_carts.get_totals(cart).subtotal == Decimal("8.00")
+        hot_carts.flush(cart)
+        assert CartService.get_totals(cart).subtotal == Decimal("8.00")
+
+    def test_reprice_drops_captured_prices(self, hot_carts):
+        cart = CartFactory()
+        variant = ProductVariantFactory(price=Decimal("5.00"), stock_quantity=10)
+        hot_carts.add(cart, variant)
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        hot_carts.reprice(cart)
+        assert hot_carts.get_totals(cart).subtotal == Decimal("4.00")
+
+
+@requires_redis
+@pytest.mark.django_db
+class TestRedisCartViews:
+    def test_cart_views_use_the_hot_cart(self, client, hot_carts):
+        user = UserFactory()
+        client.force_login(user)
+        variant = ProductVariantFactory(price=Decimal("2.00"), stock_quantity=10)
+        response = client.post(
+            reverse("cart:add"),
+            {"sku": variant.sku, "quantity": 3},
+            headers={"hx-request": "true"},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert "$6.00" in response.content.decode()
+        response = client.get(reverse("cart:detail"))
+        assert [line.quantity for line in response.context["lines"]] == [3]
+        assert not CartItem.lean.exists()
@@ -5,6 +5,7 @@ from django.db import IntegrityError
 from django.db import transaction
 
 from apps.cart.choices import CartStatus
+from apps.cart.models import Cart
 from apps.products.tests.factories import ProductVariantFactory
 from apps.users.tests.factories import UserFactory
 
@@ -80,3 +81,32 @@ class TestCartItemModel:
         item2 = CartItemFactory(variant=variant)
         assert item1.variant == item2.variant
         assert item1.cart != item2.cart
+
+
+@pytest.mark.django_db
+class TestCartQuerySet:
+    def test_with_totals_aggregates_in_database(self, django_assert_num_queries):
+        cart = CartFactory(
+            items=[
+                {
+                    "variant": ProductVariantFactory(price=Decimal("2.50")),
+                    "quantity": 2,
+                },
+                {
+                    "variant": ProductVariantFactory(price=Decimal("1.00")),
+                    "quantity": 3,
+                },
+            ],
+        )
+        CartFactory(items=1)
+        with django_assert_num_queries(1):
+            cart = Cart.objects.with_totals().get(pk=cart.pk)
+        assert cart.item_count == 2  # noqa: PLR2004
+        assert cart.total_quantity == 5  # noqa: PLR2004
+        assert cart.subtotal == Decimal("8.00")
+
+    def test_with_totals_for_empty_cart(self):
+        cart = Cart.objects.with_totals().get(pk=CartFactory().pk)
+        assert cart.item_count == 0
+        assert cart.total_quantity == 0
+        assert cart.subtotal == Decimal("0.00")
@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.cart.models import Cart
+from apps.cart.models import CartItem
+from apps.cart.services import CartService
+from apps.cart.services import get_cart_lines
+from apps.products.tests.factories import ProductVariantFactory
+
+from .factories import CartFactory
+
+
+def get_index_name(*fields):
+    return next(
+        index.name
+        for index in CartItem._meta.indexes  # noqa: SLF001
+        if index.fields == list(fields)
+    )
+
+
+def assert_plan(queryset, *expected, unexpected=()):
+    plan = queryset.explain()
+    for fragment in expected:
+        assert fragment in plan, f"{queryset.query}\n{plan}"
+    for fragment in unexpected:
+        assert fragment not in plan, f"{queryset.query}\n{plan}"
+
+
+@pytest.mark.django_db
+class TestLeanCartItemManager:
+    def test_default_manager_joins_cart_and_variant(self):
+        assert str(CartItem.objects.all().query).count("JOIN") == 4  # noqa: PLR2004
+
+    @pytest.mark.parametrize(
+        "run",
+        [
+            lambda items: items.count(),
+            lambda items: items.exists(),
+            lambda items: list(items.values_list("variant_id", "quantity")),
+            lambda items: items.update(quantity=1),
+            lambda items: items.delete(),
+        ],
+        ids=["count", "exists", "values", "update", "delete"],
+    )
+    def test_skips_default_joins(self, run):
+        cart = CartFactory(items=2)
+        with CaptureQueriesContext(connection) as context:
+            run(CartItem.lean.filter(cart_id=cart.pk))
+        assert context.captured_queries
+        assert not any("JOIN" in query["sql"] for query in context.captured_queries)
+
+    def test_cart_lines_load_in_one_query(self, django_assert_num_queries):
+        cart = CartFactory(items=5)
+        with django_assert_num_queries(1) as context:
+            lines = get_cart_lines(cart)
+        assert len(lines) == 5  # noqa: PLR2004
+        assert '"cart_cart"' not in context.captured_queries[0]["sql"]
+
+    def test_prefetched_items_do_not_join_the_cart(self, django_assert_num_queries):
+        CartFactory.create_batch(3, items=2)
+        with django_assert_num_queries(2) as context:
+            carts = list(Cart.objects.with_items())
+        assert sum(len(cart.items.all()) for cart in carts) == 6  # noqa: PLR2004
+        assert '"cart_cart"' not in context.captured_queries[1]["sql"]
+
+    def test_reserve_reads_lines_without_joins(self):
+        cart = CartFactory(
+            items=[{"variant": ProductVariantFactory(stock_quantity=10)}],
+        )
+        with CaptureQueriesContext(connection) as context:
+            CartService.reserve(cart)
+        reads = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "cart_cartitem"')
+        ]
+        assert len(reads) == 1
+        assert "JOIN" not in reads[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="asserts on SQLite's EXPLAIN QUERY PLAN output",
+)
+class TestCartQueryPlans:
+    def test_cart_lines_use_cart_created_index(self):
+        cart = CartFactory(items=2)
+        index = get_index_name("cart", "created")
+        assert_plan(
+            CartItem.lean.with_variant().filter(cart_id=cart.pk).order_by("created"),
+            f"SEARCH cart_cartitem USING INDEX {index}",
+            unexpected=["TEMP B-TREE"],
+        )
+
+    def test_variant_lookups_use_variant_index(self):
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartFactory.create_batch(2, items=[{"variant": variant}])
+        index = get_index_name("variant", "cart")
+        assert_plan(
+            CartItem.lean.open().filter(variant_id=variant.pk),
+            f"SEARCH cart_cartitem USING INDEX {index}",
+        )
+
+    def test_cart_totals_search_items_by_cart(self):
+        cart = CartFactory(items=2)
+        assert_plan(
+            Cart.objects.filter(pk=cart.pk).with_totals(),
+            get_index_name("cart", "created"),
+            unexpected=["SCAN cart_cartitem"],
+        )
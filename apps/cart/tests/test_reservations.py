@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.cart.exceptions import InsufficientStockError
+from apps.cart.models import StockReservation
+from apps.cart.services import CartService
+from apps.cart.tasks import reap_stock_reservations
+from apps.products.tests.factories import ProductVariantFactory
+
+from .factories import CartFactory
+
+
+@pytest.mark.django_db
+class TestStockReservationManager:
+    def test_available_stock_excludes_active_holds(self):
+        variant = ProductVariantFactory(stock_quantity=5)
+        StockReservation.objects.reserve(CartFactory(), {variant: 2})
+        StockReservation.objects.reserve(
+            CartFactory(),
+            {variant: 1},
+            ttl=timedelta(seconds=-1),
+        )
+        assert StockReservation.objects.get_available([variant.pk]) == {
+            variant.pk: 3,
+        }
+
+    def test_reserve_rejects_shortage_without_holding(self):
+        variant, other = ProductVariantFactory.create_batch(2, stock_quantity=2)
+        StockReservation.objects.reserve(CartFactory(), {variant: 2})
+        cart = CartFactory()
+        with pytest.raises(InsufficientStockError) as exc_info:
+            StockReservation.objects.reserve(cart, {variant: 1, other: 1})
+        assert exc_info.value.shortages == {variant.pk: (1, 0)}
+        assert not StockReservation.objects.filter(cart=cart).exists()
+
+    def test_reserve_again_replaces_cart_hold(self):
+        variant = ProductVariantFactory(stock_quantity=3)
+        cart = CartFactory()
+        StockReservation.objects.reserve(cart, {variant: 2})
+        StockReservation.objects.reserve(cart, {variant: 3})
+        assert StockReservation.objects.get(cart=cart).quantity == 3  # noqa: PLR2004
+
+    def test_consume_decrements_stock_and_drops_holds(self):
+        variant = ProductVariantFactory(stock_quantity=5)
+        cart = CartFactory()
+        StockReservation.objects.reserve(cart, {variant: 2})
+        assert StockReservation.objects.consume(cart) == {variant.pk: 2}
+        variant.refresh_from_db()
+        assert variant.stock_quantity == 3  # noqa: PLR2004
+        assert not StockReservation.objects.exists()
+
+    def test_cart_service_reserves_cart_lines(self):
+        variant = ProductVariantFactory(stock_quantity=5)
+        cart = CartFactory(items=[{"variant": variant, "quantity": 2}])
+        CartService.reserve(cart)
+        assert StockReservation.objects.get(cart=cart).quantity == 2  # noqa: PLR2004
+
+    def test_reaper_deletes_expired_holds(self):
+        variant = ProductVariantFactory(stock_quantity=5)
+        StockReservation.objects.reserve(CartFactory(), {variant: 1})
+        StockReservation.objects.reserve(
+            CartFactory(),
+            {variant: 1},
+            ttl=timedelta(seconds=-1),
+        )
+        assert reap_stock_reservations.apply().get() == 1
+        assert StockReservation.objects.get().expires_at > timezone.now()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentCheckouts:
+    def test_last_units_are_sold_once(self, run_concurrently):
+        stock = 5
+        shoppers = 12
+        variant = ProductVariantFactory(stock_quantity=stock)
+        carts = CartFactory.create_batch(shoppers)
+
+        def checkout(cart):
+            try:
+                StockReservation.objects.reserve(cart, {variant.pk: 1})
+                StockReservation.objects.consume(cart)
+            except InsufficientStockError:
+                return False
+            return True
+
+        results = run_concurrently(checkout, carts)
+        variant.refresh_from_db()
+        assert results.count(True) == stock
+        assert variant.stock_quantity == 0
+        assert not StockReservation.objects.exists()
@@ -0,0 +1,321 @@
+from decimal import Decimal
+from http import HTTPStatus
+from importlib import import_module
+
+import pytest
+from allauth.account.models import EmailAddress
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.cart.choices import CartStatus
+from apps.cart.models import Cart
+from apps.cart.models import CartItem
+from apps.cart.models import StockReservation
+from apps.cart.services import CartService
+from apps.cart.services import CartTotals
+from apps.cart.services import add_to_cart
+from apps.cart.services import persist_session_cart
+from apps.cart.services import revalidate_carts
+from apps.cart.session import SessionCart
+from apps.products.models import ProductVariant
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+from .factories import CartFactory
+
+
+@pytest.fixture
+def make_request():
+    def make_request(user=None, session=None):
+        request = RequestFactory().get("/")
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = session or engine.SessionStore()
+        request.user = user or AnonymousUser()
+        return request
+
+    return make_request
+
+
+@pytest.mark.django_db
+class TestAddToCart:
+    def test_anonymous_add_only_touches_session(
+        self,
+        make_request,
+        django_assert_num_queries,
+    ):
+        request = make_request()
+        with django_assert_num_queries(0):
+            cart = add_to_cart(request, "SKU-1", 2)
+            cart = add_to_cart(request, "SKU-1")
+        assert isinstance(cart, SessionCart)
+        assert dict(cart) == {"SKU-1": 3}
+        assert not Cart.objects.exists()
+
+    def test_anonymous_cart_is_persisted_past_threshold(self, make_request, settings):
+        settings.CART_SESSION_MAX_LINES = 1
+        first, second = ProductVariantFactory.create_batch(2, stock_quantity=10)
+        request = make_request()
+        add_to_cart(request, first.sku)
+        cart = add_to_cart(request, second.sku, 2)
+        assert isinstance(cart, Cart)
+        assert cart.session_key == request.session.session_key
+        assert sorted(cart.items.values_list("quantity", flat=True)) == [1, 2]
+        assert len(SessionCart(request.session)) == 0
+        add_to_cart(request, first.sku)
+        assert cart.items.get(variant=first).quantity == 2  # noqa: PLR2004
+
+    def test_authenticated_add_writes_user_cart(self, make_request):
+        variant = ProductVariantFactory(stock_quantity=10)
+        user = UserFactory()
+        cart = add_to_cart(make_request(user=user), variant.sku, 2)
+        assert cart.user == user
+        assert cart.items.get().quantity == 2  # noqa: PLR2004
+
+    def test_unknown_sku_is_dropped(self, make_request):
+        cart = add_to_cart(make_request(user=UserFactory()), "MISSING")
+        assert not cart.items.exists()
+
+
+@pytest.mark.django_db
+class TestPersistSessionCart:
+    def test_merges_session_lines_into_open_user_cart(self, make_request):
+        variant, other = ProductVariantFactory.create_batch(2, stock_quantity=10)
+        user = UserFactory()
+        cart = CartFactory(user=user, items=[{"variant": variant, "quantity": 1}])
+        request = make_request(user=user)
+        SessionCart(request.session).add(variant.sku, 2)
+        SessionCart(request.session).add(other.sku)
+        assert persist_session_cart(request) == cart
+        quantities = dict(cart.items.values_list("variant__sku", "quantity"))
+        assert quantities == {variant.sku: 3, other.sku: 1}
+        assert Cart.objects.count() == 1
+
+    def test_repoints_persisted_anonymous_cart(self, make_request):
+        variant = ProductVariantFactory(stock_quantity=10)
+        request = make_request()
+        SessionCart(request.session).add(variant.sku, 2)
+        anonymous_cart = persist_session_cart(request)
+        request.user = UserFactory()
+        cart = persist_session_cart(request)
+        assert cart.pk == anonymous_cart.pk
+        cart.refresh_from_db()
+        assert cart.user == request.user
+        assert cart.session_key is None
+        assert cart.items.get().quantity == 2  # noqa: PLR2004
+
+    def test_merges_persisted_anonymous_cart_into_user_cart(
+        self,
+        make_request,
+        django_assert_num_queries,
+    ):
+        shared, extra = ProductVariantFactory.create_batch(2, stock_quantity=10)
+        user = UserFactory()
+        cart = CartFactory(user=user, items=[{"variant": shared, "quantity": 1}])
+        anonymous_cart = CartFactory(
+            is_anonymous=True,
+            items=[
+                {"variant": shared, "quantity": 2},
+                {"variant": extra, "quantity": 3},
+                *({"quantity": 1} for _ in range(5)),
+            ],
+        )
+        # Savepoint, two cart reads, merge, close, release holds, touch and
+        # release the savepoint.
+        with django_assert_num_queries(8):
+            merged = Cart.objects.merge_into_user_cart(anonymous_cart.pk, user)
+        assert merged == cart
+        quantities = dict(cart.items.values_list("variant_id", "quantity"))
+        assert quantities[shared.pk] == 3  # noqa: PLR2004
+        assert quantities[extra.pk] == 3  # noqa: PLR2004
+        anonymous_cart.refresh_from_db()
+        assert anonymous_cart.status == CartStatus.ABANDONED
+
+    def test_merge_releases_anonymous_cart_holds(self):
+        variant = ProductVariantFactory(stock_quantity=10)
+        user = UserFactory()
+        CartFactory(user=user)
+        anonymous_cart = CartFactory(
+            is_anonymous=True,
+            items=[{"variant": variant, "quantity": 2}],
+        )
+        StockReservation.objects.reserve(anonymous_cart, {variant: 2})
+        Cart.objects.merge_into_user_cart(anonymous_cart.pk, user)
+        assert not StockReservation.objects.filter(cart=anonymous_cart).exists()
+
+    def test_login_merges_session_cart(self, client):
+        variant = ProductVariantFactory(stock_quantity=10)
+        session = client.session
+        SessionCart(session).add(variant.sku, 2)
+        session.save()
+        user = UserFactory(password="s3cret-Passw0rd")  # noqa: S106
+        EmailAddress.objects.create(
+            user=user,
+            email=user.email,
+            verified=True,
+            primary=True,
+        )
+        response = client.post(
+            reverse("account_login"),
+            {"login": user.email, "password": "s3cret-Passw0rd"},
+        )
+        assert response.status_code == HTTPStatus.FOUND
+        cart = Cart.objects.get(user=user)
+        assert cart.items.get().quantity == 2  # noqa: PLR2004
+        assert settings.CART_SESSION_KEY not in client.session
+
+
+@pytest.mark.django_db
+class TestCartService:
+    def test_add_creates_then_increments_line(self):
+        cart = CartFactory()
+        variant = ProductVariantFactory(price=Decimal("2.50"), stock_quantity=10)
+        CartService.add(cart, variant, 2)
+        line, totals = CartService.add(cart, variant, 3)
+        assert line.variant_id == variant.pk
+        assert line.quantity == 5  # noqa: PLR2004
+        assert totals == CartTotals(
+            item_count=1,
+            total_quantity=5,
+            subtotal=Decimal("12.50"),
+        )
+
+    def test_add_is_a_single_write(self):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartService.add(cart, variant)
+        with CaptureQueriesContext(connection) as context:
+            CartService.add(cart, variant)
+        writes = [
+            query["sql"]
+            for query in context.captured_queries
+            if "cart_cartitem" in query["sql"].split(" SET ")[0]
+            and not query["sql"].startswith("SELECT")
+        ]
+        assert len(writes) == 1
+
+    def test_quantity_is_clamped_to_stock(self):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=3)
+        line, _ = CartService.add(cart, variant, 5)
+        assert line.quantity == 3  # noqa: PLR2004
+        line, _ = CartService.add(cart, variant, 1)
+        assert line.quantity == 3  # noqa: PLR2004
+
+    def test_inactive_or_sold_out_variant_is_not_added(self):
+        cart = CartFactory()
+        line, totals = CartService.add(cart, ProductVariantFactory(is_active=False))
+        assert line is None
+        line, totals = CartService.add(cart, ProductVariantFactory(stock_quantity=0))
+        assert line is None
+        assert totals.item_count == 0
+
+    @pytest.mark.parametrize("quantity", [0, -2])
+    def test_add_rejects_quantities_below_one(self, quantity):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartService.add(cart, variant, 2)
+        with pytest.raises(ValueError, match="at least 1"):
+            CartService.add(cart, variant, quantity)
+        assert cart.items.get().quantity == 2  # noqa: PLR2004
+
+    @pytest.mark.parametrize("increment", [True, False])
+    def test_upsert_rejects_zero_quantity(self, increment):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        with pytest.raises(ValueError, match="at least 1"):
+            CartItem.objects.upsert(cart.pk, variant.pk, 0, increment=increment)
+        assert not cart.items.exists()
+
+    def test_update_sets_and_removes_line(self):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartService.add(cart, variant, 4)
+        line, _ = CartService.update(cart, variant, 2)
+        assert line.quantity == 2  # noqa: PLR2004
+        line, totals = CartService.update(cart, variant, 0)
+        assert line is None
+        assert not cart.items.exists()
+        assert totals.subtotal == Decimal("0.00")
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCartServiceConcurrency:
+    def test_concurrent_adds_do_not_lose_updates(self, run_concurrently):
+        cart = CartFactory()
+        variant = ProductVariantFactory(stock_quantity=1000)
+        workers = 8
+        adds = 40
+
+        run_concurrently(
+            lambda _: CartService.add(cart, variant.pk),
+            range(adds),
+            workers=workers,
+        )
+        item = CartItem.objects.get(cart=cart)
+        assert item.quantity == adds
+
+
+@pytest.mark.django_db
+class TestRevalidateCarts:
+    def test_add_captures_unit_price(self):
+        cart = CartFactory()
+        variant = ProductVariantFactory(price=Decimal("3.00"), stock_quantity=10)
+        CartService.add(cart, variant)
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        CartService.add(cart, variant)
+        assert cart.items.get().unit_price_at_add == Decimal("3.00")
+
+    def test_reports_price_stock_and_status_changes(self, django_assert_num_queries):
+        cart = CartFactory()
+        repriced, short, deactivated, unchanged = ProductVariantFactory.create_batch(
+            4,
+            price=Decimal("5.00"),
+            stock_quantity=10,
+        )
+        for variant in (repriced, short, deactivated, unchanged):
+            CartService.add(cart, variant, 2)
+        ProductVariant.objects.filter(pk=repriced.pk).update(price=Decimal("6.00"))
+        ProductVariant.objects.filter(pk=short.pk).update(stock_quantity=1)
+        ProductVariant.objects.filter(pk=deactivated.pk).update(is_active=False)
+        with django_assert_num_queries(1):
+            revalidation = revalidate_carts(cart=cart)
+        assert [change.sku for change in revalidation.price_changes] == [repriced.sku]
+        assert revalidation.price_changes[0].price == Decimal("6.00")
+        assert [change.shortfall for change in revalidation.stock_shortfalls] == [1]
+        assert [change.sku for change in revalidation.deactivated] == [
+            deactivated.sku,
+        ]
+
+    def test_revalidates_all_open_carts_holding_a_variant(
+        self,
+        django_assert_num_queries,
+    ):
+        variant = ProductVariantFactory(price=Decimal("5.00"), stock_quantity=10)
+        carts = CartFactory.create_batch(3, items=[{"variant": variant}])
+        CartFactory(is_checked_out=True, items=[{"variant": variant}])
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        with django_assert_num_queries(1):
+            revalidation = revalidate_carts(variants=[variant])
+        assert {change.cart_id for change in revalidation.price_changes} == {
+            cart.pk for cart in carts
+        }
+
+    def test_totals_use_current_prices(self):
+        variant = ProductVariantFactory(price=Decimal("5.00"), stock_quantity=10)
+        cart = CartFactory()
+        CartService.add(cart, variant, 2)
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        assert CartService.get_totals(cart).subtotal == Decimal("8.00")
+
+    def test_reprice_accepts_current_prices(self):
+        variant = ProductVariantFactory(price=Decimal("5.00"), stock_quantity=10)
+        cart = CartFactory(items=[{"variant": variant}])
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("4.00"))
+        assert revalidate_carts(cart=cart)
+        CartService.reprice(cart)
+        assert not revalidate_carts(cart=cart)
+        assert cart.items.get().unit_price_at_add == Decimal("4.00")
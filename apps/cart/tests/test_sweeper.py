@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.cart.choices import CartStatus
+from apps.cart.models import Cart
+from apps.cart.models import CartItem
+from apps.cart.sweeper import CartSweeper
+from apps.cart.tasks import sweep_carts
+
+from .factories import CartFactory
+
+
+def age(cart, days):
+    Cart.objects.filter(pk=cart.pk).update(
+        modified=timezone.now() - timedelta(days=days),
+    )
+
+
+@pytest.mark.django_db
+class TestCartSweeper:
+    def test_marks_stale_open_carts_abandoned(self):
+        stale = CartFactory()
+        fresh = CartFactory()
+        age(stale, 8)
+        stats = CartSweeper(abandon_after=timedelta(days=7)).run()
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        assert stale.status == CartStatus.ABANDONED
+        assert fresh.status == CartStatus.OPEN
+        assert stats.marked_abandoned == 1
+        assert stats.complete
+
+    def test_purges_old_anonymous_abandoned_carts(self):
+        anonymous = CartFactory(is_anonymous=True, is_abandoned=True, items=2)
+        owned = CartFactory(is_abandoned=True, items=1)
+        recent = CartFactory(is_anonymous=True, is_abandoned=True)
+        age(anonymous, 31)
+        age(owned, 31)
+        stats = CartSweeper(purge_after=timedelta(days=30)).run()
+        assert set(Cart.objects.values_list("pk", flat=True)) == {owned.pk, recent.pk}
+        assert not CartItem.objects.filter(cart_id=anonymous.pk).exists()
+        assert stats.purged_carts == 1
+        assert stats.purged_items == 2  # noqa: PLR2004
+
+    def test_walks_carts_in_batches(self):
+        carts = CartFactory.create_batch(5)
+        for cart in carts:
+            age(cart, 8)
+        stats = CartSweeper(batch_size=2).run()
+        assert stats.marked_abandoned == 5  # noqa: PLR2004
+        assert stats.batches == 3  # noqa: PLR2004
+        assert not Cart.objects.open().exists()
+
+    def test_stops_when_out_of_time(self):
+        age(CartFactory(), 8)
+        stats = CartSweeper(time_budget=0).run()
+        assert not stats.complete
+        assert stats.marked_abandoned == 0
+        assert Cart.objects.open().exists()
+
+
+@pytest.mark.django_db
+class TestSweepCartsTask:
+    def test_returns_run_metrics(self, caplog):
+        age(CartFactory(), 30)
+        with caplog.at_level("INFO", logger="apps.cart.tasks"):
+            stats = sweep_carts.apply().get()
+        assert stats["marked_abandoned"] == 1
+        assert "1 marked abandoned" in caplog.text
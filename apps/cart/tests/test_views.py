@@ -0,0 +1,145 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.cart.models import Cart
+from apps.cart.session import SessionCart
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+from .factories import CartFactory
+
+HTMX = {"hx-request": "true"}
+
+
+@pytest.fixture
+def user_client(client):
+    user = UserFactory()
+    client.force_login(user)
+    client.user = user
+    return client
+
+
+@pytest.mark.django_db
+class TestCartDetailView:
+    def test_renders_user_cart(self, user_client):
+        variant = ProductVariantFactory(price=Decimal("2.50"), stock_quantity=10)
+        CartFactory(user=user_client.user, items=[{"variant": variant, "quantity": 2}])
+        response = user_client.get(reverse("cart:detail"))
+        assert response.status_code == HTTPStatus.OK
+        assert f'id="cart-line-{variant.pk}"' in response.content.decode()
+        assert response.context["totals"].subtotal == Decimal("5.00")
+
+    def test_renders_session_cart(self, client):
+        variant = ProductVariantFactory(price=Decimal("3.00"), stock_quantity=10)
+        session = client.session
+        SessionCart(session).add(variant.sku, 2)
+        session.save()
+        response = client.get(reverse("cart:detail"))
+        assert [line.quantity for line in response.context["lines"]] == [2]
+        assert response.context["totals"].subtotal == Decimal("6.00")
+        assert not Cart.objects.exists()
+
+
+@pytest.mark.django_db
+class TestCartLineViews:
+    def test_htmx_add_returns_only_changed_partials(self, user_client):
+        variant = ProductVariantFactory(price=Decimal("2.00"), stock_quantity=10)
+        response = user_client.post(
+            reverse("cart:add"),
+            {"sku": variant.sku, "quantity": 3},
+            headers=HTMX,
+        )
+        content = response.content.decode()
+        assert response.status_code == HTTPStatus.OK
+        assert "<html" not in content
+        assert f'id="cart-line-{variant.pk}"' in content
+        assert 'id="cart-summary"' in content
+        assert 'id="mini-cart"' in content
+        assert content.count('hx-swap-oob="true"') == 2  # noqa: PLR2004
+        assert "$6.00" in content
+
+    def test_htmx_update_to_zero_drops_the_row(self, user_client):
+        variant = ProductVariantFactory(stock_quantity=10)
+        CartFactory(user=user_client.user, items=[{"variant": variant, "quantity": 2}])
+        response = user_client.post(
+            reverse("cart:update"),
+            {"sku": variant.sku, "quantity": 0},
+            headers=HTMX,
+        )
+        assert 'id="cart-line-' not in response.content.decode()
+        assert not Cart.objects.get(user=user_client.user).items.exists()
+
+    def test_plain_post_redirects_to_cart(self, client):
+        response = client.post(reverse("cart:add"), {"sku": "SKU-1", "quantity": 2})
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == reverse("cart:detail")
+        assert dict(SessionCart(client.session)) == {"SKU-1": 2}
+
+    def test_add_rejects_zero_quantity(self, client):
+        response = client.post(
+            reverse("cart:add"),
+            {"sku": "SKU-1", "quantity": 0},
+            headers=HTMX,
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not dict(SessionCart(client.session))
+
+    def test_invalid_htmx_post_is_rejected(self, client):
+        response = client.post(
+            reverse("cart:update"),
+            {"sku": "SKU-1", "quantity": -1},
+            headers=HTMX,
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCartFragmentViews:
+    @pytest.mark.parametrize("name", ["cart:summary", "cart:badge"])
+    def test_matching_etag_short_circuits(self, user_client, name):
+        CartFactory(user=user_client.user, items=2)
+        url = reverse(name)
+        etag = user_client.get(url, headers=HTMX).headers["ETag"]
+        assert etag.startswith('W/"')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(
+                url,
+                headers={**HTMX, "if-none-match": etag},
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert not response.content
+        assert response.headers["ETag"] == etag
+        # Session, user and the cart fingerprint, never the items themselves.
+        selects = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+        assert len(selects) == 3  # noqa: PLR2004
+        assert not any(sql.startswith('SELECT "cart_cartitem"') for sql in selects)
+
+    def test_etag_changes_with_the_cart(self, user_client):
+        variant = ProductVariantFactory(stock_quantity=10)
+        url = reverse("cart:summary")
+        etag = user_client.get(url).headers["ETag"]
+        user_client.post(reverse("cart:add"), {"sku": variant.sku, "quantity": 1})
+        response = user_client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["ETag"] != etag
+        assert "no-cache" in response.headers["Cache-Control"]
+
+    def test_session_cart_etag(self, client):
+        url = reverse("cart:badge")
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"if-none-match": etag}).status_code == (
+            HTTPStatus.NOT_MODIFIED
+        )
+        client.post(reverse("cart:add"), {"sku": "SKU-1", "quantity": 2})
+        response = client.get(url, headers={"if-none-match": etag})
+        assert response.status_code == HTTPStatus.OK
+        assert ">2</span>" in response.content.decode()
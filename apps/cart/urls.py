@@ -1,5 +1,37 @@
 from django.urls import path
 
+from .views import CartAddView
+from .views import CartBadgeView
+from .views import CartDetailView
+from .views import CartSummaryView
+from .views import CartUpdateView
+
 app_name = "cart"
 
-urlpatterns = []
+urlpatterns = [
+    path(
+        route="",
+        view=CartDetailView.as_view(),
+        name="detail",
+    ),
+    path(
+        route="add/",
+        view=CartAddView.as_view(),
+        name="add",
+    ),
+    path(
+        route="update/",
+        view=CartUpdateView.as_view(),
+        name="update",
+    ),
+    path(
+        route="summary/",
+        view=CartSummaryView.as_view(),
+        name="summary",
+    ),
+    path(
+        route="badge/",
+        view=CartBadgeView.as_view(),
+        name="badge",
+    ),
+]
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+MINI_CART_CACHE_PREFIX = "cart:mini"
+MINI_CART_TIMEOUT = 60 * 60
+
+
+def get_mini_cart_key(*, user_id=None, cart_id=None):
+    if user_id is not None:
+        return f"{MINI_CART_CACHE_PREFIX}:user:{user_id}"
+    return f"{MINI_CART_CACHE_PREFIX}:cart:{cart_id}"
+
+
+def invalidate_mini_cart(cart):
+    keys = [get_mini_cart_key(cart_id=cart.pk)]
+    if cart.user_id is not None:
+        keys.append(get_mini_cart_key(user_id=cart.user_id))
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_hot_cart_key(cart_id, part):
+    return f"{settings.CART_HOT_KEY_PREFIX}:{cart_id}:{part}"
+
+
+def get_hot_cart_dirty_key():
+    return f"{settings.CART_HOT_KEY_PREFIX}:dirty"
+
+
+def get_hot_cart_flush_key():
+    return f"{settings.CART_HOT_KEY_PREFIX}:flush-scheduled"
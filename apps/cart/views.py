@@ -0,0 +1,134 @@
+import uuid
+from decimal import Decimal
+
+from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.shortcuts import redirect
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.views.generic import TemplateView
+from django.views.generic import View
+
+from .forms import CartAddForm
+from .forms import CartLineForm
+from .services import CartTotals
+from .services import add_to_cart
+from .services import get_cart_etag
+from .services import get_cart_lines
+from .services import get_mini_cart
+from .services import get_open_cart
+from .services import update_cart
+from .session import SessionCart
+
+CART_TEMPLATE = "cart/cart_detail.html"
+
+
+def get_cart(request):
+    return get_open_cart(request) or SessionCart(request.session)
+
+
+def get_cart_totals(request, lines=None):
+    """
+    Return the cart's ``CartTotals``, pricing session carts from ``lines``.
+    """
+    totals = get_mini_cart(request)
+    if totals.subtotal is not None:
+        return totals
+    if lines is None:
+        lines = get_cart_lines(SessionCart(request.session))
+    return CartTotals(
+        item_count=totals.item_count,
+        total_quantity=totals.total_quantity,
+        subtotal=sum((line.line_total for line in lines), Decimal("0.00")),
+    )
+
+
+class CartDetailView(TemplateView):
+    template_name = CART_TEMPLATE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["lines"] = get_cart_lines(get_cart(self.request))
+        context["totals"] = get_cart_totals(self.request, context["lines"])
+        context["checkout_key"] = uuid.uuid4()
+        return context
+
+
+class CartLineView(View):
+    """
+    Change one cart line from a ``form_class`` POST.
+
+    HTMX requests get the changed line row back, with the cart summary and
+    the header badge swapped out of band. Other requests are redirected to
+    the cart page. Subclasses set ``change_line`` to the cart service
+    function that applies the change.
+    """
+
+    http_method_names = ["post"]
+    form_class = CartLineForm
+
+    def post(self, request, *args, **kwargs):
+        form = self.form_class(request.POST)
+        if not form.is_valid():
+            if request.htmx:
+                return HttpResponseBadRequest()
+            return redirect("cart:detail")
+        sku = form.cleaned_data["sku"]
+        cart = self.change_line(request, sku, form.cleaned_data["quantity"])
+        if not request.htmx:
+            return redirect("cart:detail")
+        lines = get_cart_lines(cart, skus=[sku])
+        context = {
+            "line": lines[0] if lines else None,
+            "totals": get_cart_totals(request),
+            "mini_cart": get_mini_cart(request),
+            "oob": True,
+        }
+        return HttpResponse(
+            [
+                render_to_string(f"{CART_TEMPLATE}#{name}", context, request)
+                for name in ("cart-line", "cart-summary")
+            ]
+            + [render_to_string("partials/header.html#mini-cart", context, request)],
+        )
+
+
+class CartAddView(CartLineView):
+    form_class = CartAddForm
+    change_line = staticmethod(add_to_cart)
+
+
+class CartUpdateView(CartLineView):
+    change_line = staticmethod(update_cart)
+
+
+class CartFragmentView(TemplateView):
+    """
+    Render a cart fragment polled by HTMX, short-circuited by a weak ETag.
+
+    A matching ``If-None-Match`` returns 304 before any cart line is loaded
+    or any template is rendered.
+    """
+
+    def get(self, request, *args, **kwargs):
+        etag = get_cart_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CartSummaryView(CartFragmentView):
+    template_name = f"{CART_TEMPLATE}#cart-summary"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["totals"] = get_cart_totals(self.request)
+        return context
+
+
+class CartBadgeView(CartFragmentView):
+    template_name = "partials/header.html#mini-cart"
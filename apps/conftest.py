@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import OperationalError
+from django.db import connection
+
+
+@pytest.fixture
+def run_concurrently():
+    """
+    Return ``run(func, args, workers=None)``, mapping ``func`` over threads.
+
+    Each call is retried on ``OperationalError``, because SQLite's shared
+    in-memory test database rejects concurrent writers instead of queueing
+    them. Threads close their database connection when done. Returns the
+    results in the order of ``args``.
+    """
+
+    def call(func, arg):
+        try:
+            while True:
+                try:
+                    return func(arg)
+                except OperationalError:
+                    time.sleep(0.001)
+        finally:
+            connection.close()
+
+    def run(func, args, workers=None):
+        args = list(args)
+        with ThreadPoolExecutor(max_workers=workers or len(args)) as executor:
+            return list(executor.map(lambda arg: call(func, arg), args))
+
+    return run
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import Counter
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+MISSING = object()
+
+
+def get_version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_cache_version(namespace):
+    """
+    Return the current version of ``namespace`` for use as ``cache.get(version=)``.
+
+    A missing version is seeded from the clock instead of restarting at 1, so
+    entries written under an evicted version can never become current again.
+    """
+    key = get_version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    key = get_version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+class TieredCache:
+    """
+    Versioned cache with an in-process LRU in front of ``CACHES["default"]``.
+
+    Local entries are served without any round trip for ``local_timeout``
+    seconds. After that the namespace version is checked against the shared
+    cache, and the value is only reloaded when the version has moved on.
+    ``invalidate()`` bumps the version and drops the local entries of the
+    current process; other processes catch up within ``local_timeout``.
+    """
+
+    def __init__(self, namespace, maxsize=128, local_timeout=5, timeout=None):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.local_timeout = local_timeout
+        self.timeout = timeout
+        self.stats = Counter()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, default):
+        """
+        Return the value for ``key``, computing it with ``default()`` on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+                self.stats["local_hits"] += 1
+                return entry[1]
+            self.stats["local_misses"] += 1
+        version = get_cache_version(self.namespace)
+        if entry is not None and entry[0] == version:
+            value = entry[1]
+            self._count("version_hits")
+        else:
+            cache_key = f"{self.namespace}:{key}"
+            value = cache.get(cache_key, MISSING, version=version)
+            if value is MISSING:
+                self._count("shared_misses")
+                value = default()
+                cache.set(cache_key, value, timeout=self.timeout, version=version)
+            else:
+                self._count("shared_hits")
+        with self._lock:
+            self._entries[key] = (version, value, now + self.local_timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def invalidate(self):
+        bump_cache_version(self.namespace)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
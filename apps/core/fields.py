@@ -1,27 +1,77 @@
+from collections import defaultdict
+
+from django.apps import apps
 from django.db import models
+from django.db import router
+from django.db.models import F
 
 
 class OrderField(models.PositiveIntegerField):
-    def __init__(self, for_fields=None, *args, **kwargs):
+    MAX = "max"
+    COUNTER = "counter"
+    ALLOCATIONS = (MAX, COUNTER)
+
+    def __init__(self, for_fields=None, *args, allocation=MAX, **kwargs):
+        if allocation not in self.ALLOCATIONS:
+            msg = f"Unknown allocation '{allocation}' for OrderField."
+            raise ValueError(msg)
         self.for_fields = for_fields or []
+        self.allocation = allocation
         super().__init__(*args, **kwargs)
 
     def pre_save(self, model_instance, add):
         value = getattr(model_instance, self.attname)
         if value is None:
-            qs = model_instance.__class__.objects.all()
-            if self.for_fields:
-                filters = {
-                    field: getattr(model_instance, field) for field in self.for_fields
-                }
-                qs = qs.filter(**filters)
-            last_item = qs.order_by(f"-{self.attname}").first()
-            value = getattr(last_item, self.attname) + 1 if last_item is not None else 0
-            setattr(model_instance, self.attname, value)
+            using = router.db_for_write(
+                model_instance.__class__,
+                instance=model_instance,
+            )
+            self.allocate([model_instance], using=using)
+            value = getattr(model_instance, self.attname)
         return value
 
+    def allocate(self, objs, using=None):
+        """
+        Assign consecutive values to ``objs``, reserving one block per scope.
+        """
+        scopes = defaultdict(list)
+        for obj in objs:
+            scopes[self._get_scope(obj)].append(obj)
+        for scope, scoped_objs in scopes.items():
+            start = self._reserve(dict(scope), len(scoped_objs), using)
+            for offset, obj in enumerate(scoped_objs):
+                setattr(obj, self.attname, start + offset)
+
+    def _get_scope(self, obj):
+        attnames = (obj._meta.get_field(name).attname for name in self.for_fields)  # noqa: SLF001
+        return tuple((attname, getattr(obj, attname)) for attname in attnames)
+
+    def _reserve(self, filters, count, using):
+        qs = (
+            self.model._base_manager.db_manager(using)  # noqa: SLF001
+            .filter(**filters)
+            .exclude(**{f"{self.attname}__isnull": True})
+            .order_by(f"-{self.attname}")
+        )
+        if self.allocation == self.COUNTER:
+            Counter = apps.get_model("core", "Counter")
+            floor_qs = qs.annotate(next_value=F(self.attname) + 1).values(
+                "next_value",
+            )[:1]
+            floor = floor_qs.query.get_compiler(using=floor_qs.db).as_sql()
+            key = self._get_counter_key(filters)
+            return Counter.objects.db_manager(using).reserve(key, count, floor=floor)
+        last_value = qs.values_list(self.attname, flat=True).first()
+        return last_value + 1 if last_value is not None else 0
+
+    def _get_counter_key(self, filters):
+        scope = ":".join(str(value) for value in filters.values())
+        return f"{self.model._meta.label_lower}.{self.attname}:{scope}"  # noqa: SLF001
+
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         if self.for_fields:
             kwargs["for_fields"] = self.for_fields
+        if self.allocation != self.MAX:
+            kwargs["allocation"] = self.allocation
         return name, path, args, kwargs
@@ -0,0 +1,70 @@
+from django.db import connections
+from django.db import models
+from django.db import router
+from django.db import transaction
+
+from .fields import OrderField
+
+UPSERT_RETURNING_VENDORS = {"postgresql", "sqlite"}
+
+
+class CounterManager(models.Manager):
+    def reserve(self, key, count=1, floor=None):
+        """
+        Reserve ``count`` consecutive values for ``key`` and return the first one.
+
+        ``floor`` is an optional ``(sql, params)`` scalar subquery giving the lowest
+        value the block may start at. It lets a counter seed itself from existing
+        rows and catch up when values were assigned by hand.
+        """
+        if count < 1:
+            msg = "count must be a positive integer."
+            raise ValueError(msg)
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        if connection.vendor not in UPSERT_RETURNING_VENDORS:
+            return self._reserve_locked(key, count, floor, using)
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)  # noqa: SLF001
+        key_column = qn("key")
+        value_column = qn("value")
+        greatest = "GREATEST" if connection.vendor == "postgresql" else "MAX"
+        floor_sql, floor_params = floor or ("SELECT 0", [])
+        sql = (
+            f"INSERT INTO {table} ({key_column}, {value_column}) "  # noqa: S608
+            f"VALUES (%s, COALESCE(({floor_sql}), 0) + %s) "
+            f"ON CONFLICT ({key_column}) DO UPDATE SET {value_column} = "
+            f"{greatest}({table}.{value_column} + %s, EXCLUDED.{value_column}) "
+            f"RETURNING {value_column}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [key, *floor_params, count, count])
+            (next_value,) = cursor.fetchone()
+        return next_value - count
+
+    def _reserve_locked(self, key, count, floor, using):
+        connection = connections[using]
+        with transaction.atomic(using=using):
+            floor_value = 0
+            if floor is not None:
+                with connection.cursor() as cursor:
+                    cursor.execute(*floor)
+                    row = cursor.fetchone()
+                floor_value = (row and row[0]) or 0
+            counter, _ = (
+                self.db_manager(using).select_for_update().get_or_create(key=key)
+            )
+            start = max(counter.value, floor_value)
+            counter.value = start + count
+            counter.save(update_fields=["value"])
+        return start
+
+
+class OrderedQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for field in self.model._meta.concrete_fields:  # noqa: SLF001
+            if isinstance(field, OrderField):
+                pending = [obj for obj in objs if getattr(obj, field.attname) is None]
+                field.allocate(pending, using=self.db)
+        return super().bulk_create(objs, *args, **kwargs)
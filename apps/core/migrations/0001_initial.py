@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Key')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='Next value')),
+            ],
+            options={
+                'verbose_name': 'Counter',
+                'verbose_name_plural': 'Counters',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .managers import CounterManager
+
+
+class Counter(models.Model):
+    key = models.CharField(
+        verbose_name=_("Key"),
+        max_length=255,
+        primary_key=True,
+    )
+    value = models.PositiveBigIntegerField(
+        verbose_name=_("Next value"),
+        default=0,
+    )
+
+    objects = CounterManager()
+
+    class Meta:
+        verbose_name = _("Counter")
+        verbose_name_plural = _("Counters")
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
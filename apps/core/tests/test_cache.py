@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+
+from apps.core.cache import TieredCache
+from apps.core.cache import bump_cache_version
+from apps.core.cache import get_cache_version
+
+
+@pytest.fixture
+def tiered_cache():
+    cache.clear()
+    return TieredCache("tests:tiered", maxsize=2, local_timeout=60)
+
+
+class TestCacheVersion:
+    def test_bump_changes_version(self):
+        version = get_cache_version("tests:version")
+        assert bump_cache_version("tests:version") != version
+        assert get_cache_version("tests:version") != version
+
+    def test_bump_recovers_from_missing_version(self):
+        cache.delete("version:tests:missing")
+        assert bump_cache_version("tests:missing") == get_cache_version(
+            "tests:missing",
+        )
+
+
+class TestTieredCache:
+    def test_local_hit_skips_shared_cache(self, tiered_cache):
+        calls = []
+        tiered_cache.get_or_set("key", lambda: calls.append(1) or "value")
+        assert tiered_cache.get_or_set("key", lambda: "other") == "value"
+        assert calls == [1]
+        assert tiered_cache.get_stats() == {
+            "local_hits": 1,
+            "local_misses": 1,
+            "shared_misses": 1,
+        }
+
+    def test_shared_hit_after_local_clear(self, tiered_cache):
+        tiered_cache.get_or_set("key", lambda: "value")
+        tiered_cache.clear()
+        assert tiered_cache.get_or_set("key", lambda: "other") == "value"
+        assert tiered_cache.get_stats()["shared_hits"] == 1
+
+    def test_invalidate_recomputes_value(self, tiered_cache):
+        tiered_cache.get_or_set("key", lambda: "value")
+        tiered_cache.invalidate()
+        assert tiered_cache.get_or_set("key", lambda: "other") == "other"
+
+    def test_expired_local_entry_is_revalidated_by_version(self, tiered_cache):
+        tiered_cache.local_timeout = 0
+        tiered_cache.get_or_set("key", lambda: "value")
+        assert tiered_cache.get_or_set("key", lambda: "other") == "value"
+        assert tiered_cache.get_stats()["version_hits"] == 1
+
+    def test_caches_none(self, tiered_cache):
+        tiered_cache.get_or_set("key", lambda: None)
+        tiered_cache.clear()
+        assert tiered_cache.get_or_set("key", lambda: "other") is None
+
+    def test_evicts_least_recently_used(self, tiered_cache):
+        tiered_cache.get_or_set("first", lambda: 1)
+        tiered_cache.get_or_set("second", lambda: 2)
+        tiered_cache.get_or_set("first", lambda: 1)
+        tiered_cache.get_or_set("third", lambda: 3)
+        tiered_cache.reset_stats()
+        tiered_cache.get_or_set("first", lambda: 1)
+        tiered_cache.get_or_set("second", lambda: 2)
+        assert tiered_cache.get_stats() == {
+            "local_hits": 1,
+            "local_misses": 1,
+            "shared_hits": 1,
+        }
@@ -0,0 +1,39 @@
+import pytest
+from django.db import connection
+
+from apps.core.models import Counter
+
+
+@pytest.mark.django_db
+class TestCounter:
+    def test_str_method_returns_key_and_value(self):
+        counter = Counter.objects.create(key="orders", value=5)
+        assert str(counter) == "orders: 5"
+
+    def test_reserve_returns_consecutive_blocks(self):
+        assert Counter.objects.reserve("blocks", 3) == 0
+        assert Counter.objects.reserve("blocks", 2) == 3  # noqa: PLR2004
+        assert Counter.objects.get(key="blocks").value == 5  # noqa: PLR2004
+
+    def test_reserve_keeps_keys_independent(self):
+        Counter.objects.reserve("first", 10)
+        assert Counter.objects.reserve("second") == 0
+
+    def test_reserve_starts_at_floor(self):
+        floor = ("SELECT %s", [42])
+        assert Counter.objects.reserve("seeded", floor=floor) == 42  # noqa: PLR2004
+        assert Counter.objects.reserve("seeded", floor=floor) == 43  # noqa: PLR2004
+
+    def test_reserve_catches_up_with_floor(self):
+        Counter.objects.reserve("behind", 2)
+        assert Counter.objects.reserve("behind", floor=("SELECT %s", [10])) == 10  # noqa: PLR2004
+
+    def test_reserve_runs_a_single_query(self, django_assert_num_queries):
+        if connection.vendor not in {"postgresql", "sqlite"}:
+            pytest.skip("Upsert with RETURNING is not available.")
+        with django_assert_num_queries(1):
+            Counter.objects.reserve("single", 100)
+
+    def test_reserve_rejects_empty_blocks(self):
+        with pytest.raises(ValueError, match="count"):
+            Counter.objects.reserve("empty", 0)
@@ -1,5 +1,12 @@
+from itertools import batched
+
 from django.templatetags.static import static
 
 
 def get_default_image_url():
     return static("images/default-image.png")
+
+
+def values_list_in_batches(queryset, lookup, values, *fields, batch_size=1000):
+    for batch in batched(values, batch_size, strict=False):
+        yield from queryset.filter(**{f"{lookup}__in": batch}).values_list(*fields)
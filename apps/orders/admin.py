@@ -1,2 +1,97 @@
 from django.contrib import admin
+from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
+
+from .choices import OrderStatus
+from .models import Order
+from .models import OrderEvent
+from .models import OrderLine
+
+
+def make_transition_action(status, description):
+    @admin.action(description=description, permissions=["change"])
+    def transition(modeladmin, request, queryset):
+        selected = queryset.count()
+        moved = queryset.transition(status, actor=request.user)
+        modeladmin.message_user(
+            request,
+            _("%(moved)d of %(selected)d orders marked as %(status)s.")
+            % {"moved": moved, "selected": selected, "status": status.label.lower()},
+            messages.SUCCESS if moved == selected else messages.WARNING,
+        )
+
+    transition.__name__ = f"mark_{status.value.lower()}"
+    return transition
+
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    fields = ("sku", "product_name", "unit_price", "quantity")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    extra = 0
+    fields = ("created", "from_status", "to_status", "actor", "note")
+    readonly_fields = fields
+    can_delete = False
+    ordering = ("created",)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    fieldsets = (
+        (
+            _("General information"),
+            {
+                "fields": (
+                    "number",
+                    "user",
+                    "status",
+                    "total_quantity",
+                    "subtotal",
+                ),
+            },
+        ),
+    )
+    list_display = ["number", "user", "status", "subtotal", "created"]
+    list_filter = ["status"]
+    list_select_related = ["user"]
+    search_fields = ["number", "user__email"]
+    readonly_fields = [
+        "id",
+        "number",
+        "user",
+        "status",
+        "total_quantity",
+        "subtotal",
+        "created",
+        "modified",
+    ]
+    inlines = [OrderLineInline, OrderEventInline]
+    actions = [
+        make_transition_action(OrderStatus.PAID, _("Mark selected orders as paid")),
+        make_transition_action(
+            OrderStatus.SHIPPED,
+            _("Mark selected orders as shipped"),
+        ),
+        make_transition_action(
+            OrderStatus.DELIVERED,
+            _("Mark selected orders as delivered"),
+        ),
+        make_transition_action(OrderStatus.CANCELLED, _("Cancel selected orders")),
+    ]
+    show_full_result_count = False
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,15 @@
+class CheckoutError(Exception):
+    """
+    Raised when a cart cannot be checked out, e.g. it is empty or closed.
+    """
+
+
+class InvalidTransitionError(Exception):
+    """
+    Raised when an order cannot move from its status to the requested one.
+    """
+
+    def __init__(self, from_status, to_status):
+        self.from_status = from_status
+        self.to_status = to_status
+        super().__init__(f"Cannot move an order from {from_status} to {to_status}.")
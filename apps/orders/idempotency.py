@@ -0,0 +1,133 @@
+import hashlib
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db import transaction
+from django.http import HttpResponse
+
+from .models import IdempotencyKey
+from .utils import get_idempotency_cache_key
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_FIELD = "idempotency_key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+STORED_HEADERS = ("Content-Type", "Location")
+
+
+def get_request_fingerprint(request):
+    """
+    Hash the request's method, path and body.
+
+    Reads ``request.body``, so call it before ``request.POST``.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        request.method.encode(),
+        request.get_full_path().encode(),
+        request.body,
+    ):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_idempotency_scope(request):
+    user_id = request.user.pk if request.user.is_authenticated else ""
+    return f"{request.resolver_match.view_name}:{user_id}"
+
+
+def get_stored_response(record):
+    return {
+        "fingerprint": record.fingerprint,
+        "status_code": record.status_code,
+        "headers": record.headers,
+        "content": bytes(record.content),
+    }
+
+
+def replay_response(stored):
+    response = HttpResponse(stored["content"], status=stored["status_code"])
+    for name, value in stored["headers"].items():
+        response.headers[name] = value
+    response.headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+    return response
+
+
+class IdempotencyMixin:
+    """
+    Run unsafe requests that carry an idempotency key at most once.
+
+    The key is read from the ``Idempotency-Key`` header or the
+    ``idempotency_key`` form field, and is scoped to the view and the user.
+    The first request inserts an ``IdempotencyKey`` row in its transaction
+    and stores the response on it, so the record commits or rolls back with
+    the work it guards. A concurrent duplicate blocks on the row's unique
+    index until then and replays the stored response instead of running the
+    view again. Committed responses are cached as well, so most replays skip
+    the database. A key reused for a different request gets a 422.
+
+    Server errors and streaming responses are not stored, so those requests
+    can be retried.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in UNSAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        fingerprint = get_request_fingerprint(request)
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER) or request.POST.get(
+            IDEMPOTENCY_KEY_FIELD,
+        )
+        if not key:
+            return super().dispatch(request, *args, **kwargs)
+        scope = get_idempotency_scope(request)
+        cache_key = get_idempotency_cache_key(scope, key)
+        stored = cache.get(cache_key)
+        if stored is None:
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(
+                            scope=scope,
+                            key=key,
+                            fingerprint=fingerprint,
+                        )
+                except IntegrityError:
+                    record = IdempotencyKey.objects.get(scope=scope, key=key)
+                else:
+                    response = super().dispatch(request, *args, **kwargs)
+                    self.store_response(record, response, cache_key)
+                    return response
+            stored = get_stored_response(record)
+            cache.set(cache_key, stored, timeout=self.get_cache_timeout())
+        if stored["fingerprint"] != fingerprint:
+            return HttpResponse(status=HTTPStatus.UNPROCESSABLE_ENTITY)
+        return replay_response(stored)
+
+    def store_response(self, record, response, cache_key):
+        if (
+            response.streaming
+            or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        ):
+            record.delete()
+            return
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        record.status_code = response.status_code
+        record.headers = {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        }
+        record.content = response.content
+        record.save(update_fields=["status_code", "headers", "content", "modified"])
+        stored = get_stored_response(record)
+        transaction.on_commit(
+            lambda: cache.set(cache_key, stored, timeout=self.get_cache_timeout()),
+        )
+
+    def get_cache_timeout(self):
+        return int(timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS).total_seconds())
@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import models
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .choices import OrderStatus
+from .choices import get_transition_sources
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_lines(self):
+        return self.prefetch_related("lines")
+
+    def for_user(self, user):
+        """
+        Return ``user``'s orders newest first, in the order ``before`` seeks.
+        """
+        return self.filter(user=user).order_by("-created", "-pk")
+
+    def before(self, created, pk):
+        """
+        Return the orders that come after ``(created, pk)`` in newest-first order.
+
+        This is the keyset filter for history pages, so deep pages use the
+        ``(user, created, id)`` index instead of an OFFSET scan.
+        """
+        return self.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+
+    def transition(self, status, actor=None, note=""):
+        """
+        Move the orders that may go to ``status`` there, and log an event each.
+
+        The orders are locked and read once, moved with a single ``UPDATE``
+        guarded on their current statuses, and their events are written with
+        one ``bulk_create``. No ``save()`` is called and no signals are sent.
+        Orders that cannot make the transition are left alone. Cancelled
+        orders are taken out of their users' summaries and their lines are
+        restocked in the same transaction. Returns the number of orders moved.
+        """
+        OrderEvent = apps.get_model("orders", "OrderEvent")
+        OrderSummary = apps.get_model("orders", "OrderSummary")
+        sources = get_transition_sources(status)
+        with transaction.atomic(using=self.db):
+            rows = list(
+                self.filter(status__in=sources)
+                .select_for_update(of=("self",))
+                .order_by("pk")
+                .values_list("pk", "status", "user_id", "subtotal"),
+            )
+            if not rows:
+                return 0
+            now = timezone.now()
+            moved = (
+                self.model._base_manager.using(self.db)  # noqa: SLF001
+                .filter(pk__in=[pk for pk, *_ in rows], status__in=sources)
+                .update(status=status, modified=now)
+            )
+            OrderEvent.objects.using(self.db).bulk_create(
+                [
+                    OrderEvent(
+                        order_id=pk,
+                        from_status=from_status,
+                        to_status=status,
+                        actor=actor,
+                        note=note,
+                        created=now,
+                        modified=now,
+                    )
+                    for pk, from_status, _, _ in rows
+                ],
+            )
+            if status == OrderStatus.CANCELLED:
+                totals = {}
+                for _, _, user_id, subtotal in rows:
+                    if user_id is not None:
+                        count, total = totals.get(user_id, (0, 0))
+                        totals[user_id] = (count + 1, total + subtotal)
+                for user_id, (count, total) in totals.items():
+                    OrderSummary.objects.db_manager(self.db).record(
+                        user_id,
+                        -total,
+                        count=-count,
+                    )
+                self._restock([pk for pk, *_ in rows])
+        return moved
+
+    def _restock(self, order_ids):
+        """
+        Put the quantities of the orders' lines back in stock.
+
+        The lines are summed per variant in one query and added back with one
+        ``UPDATE`` through the stock-only path. Lines whose variant was
+        deleted are skipped.
+        """
+        OrderLine = apps.get_model("orders", "OrderLine")
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        quantities = dict(
+            OrderLine.objects.using(self.db)
+            .filter(order_id__in=order_ids, variant__isnull=False)
+            .order_by()
+            .values("variant_id")
+            .annotate(quantity=Sum("quantity"))
+            .values_list("variant_id", "quantity"),
+        )
+        if not quantities:
+            return
+        ProductVariant.objects.using(self.db).filter(
+            pk__in=quantities,
+        ).update_stock(
+            stock_quantity=Case(
+                *(
+                    When(pk=variant_id, then=F("stock_quantity") + quantity)
+                    for variant_id, quantity in quantities.items()
+                ),
+            ),
+        )
+
+
+class OrderManager(models.Manager.from_queryset(OrderQuerySet)):
+    pass
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        now = now or timezone.now()
+        return self.filter(
+            created__lt=now - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        )
+
+
+class IdempotencyKeyManager(models.Manager.from_queryset(IdempotencyKeyQuerySet)):
+    pass
+
+
+class OrderSummaryManager(models.Manager):
+    def get_for_user(self, user):
+        """
+        Return ``user``'s summary, or an unsaved empty one if they have no orders.
+        """
+        return self.filter(user=user).first() or self.model(user=user)
+
+    def record(self, user_id, total, count=1, placed_at=None):
+        """
+        Add ``count`` orders worth ``total`` to ``user_id``'s summary.
+
+        The counters are updated in place, so concurrent checkouts do not
+        lose each other's changes. Negative values take orders back out.
+        """
+        updates = {
+            "order_count": F("order_count") + count,
+            "lifetime_total": F("lifetime_total") + total,
+        }
+        if placed_at is not None:
+            updates["last_order_at"] = Greatest(
+                Coalesce("last_order_at", Value(placed_at)),
+                Value(placed_at),
+            )
+        if self.filter(user_id=user_id).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                self.create(
+                    user_id=user_id,
+                    order_count=max(count, 0),
+                    lifetime_total=max(total, 0),
+                    last_order_at=placed_at,
+                )
+        except IntegrityError:
+            self.filter(user_id=user_id).update(**updates)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+ORDER_NUMBER_SEQUENCE = 'orders_order_number_seq'
+ORDER_NUMBER_COUNTER_KEY = 'orders.order.number'
+
+
+def number_orders(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    Counter = apps.get_model('core', 'Counter')
+    orders = list(Order.objects.order_by('created', 'pk').only('pk', 'created'))
+    for value, order in enumerate(orders, start=1):
+        order.number = f'{settings.ORDER_NUMBER_PREFIX}-{order.created.year}-{value:06d}'
+    Order.objects.bulk_update(orders, ['number'], batch_size=500)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'CREATE SEQUENCE {ORDER_NUMBER_SEQUENCE} START WITH {len(orders) + 1}')
+    else:
+        Counter.objects.update_or_create(key=ORDER_NUMBER_COUNTER_KEY, defaults={'value': len(orders)})
+
+
+def drop_order_number_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {ORDER_NUMBER_SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('orders', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='number',
+            field=models.CharField(editable=False, max_length=32, null=True, verbose_name='Number'),
+        ),
+        migrations.RunPython(number_orders, drop_order_number_sequence),
+        migrations.AlterField(
+            model_name='order',
+            name='number',
+            field=models.CharField(editable=False, max_length=32, unique=True, verbose_name='Number'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.10 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def fill_order_summaries(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderSummary = apps.get_model('orders', 'OrderSummary')
+    rows = (
+        Order.objects.filter(user__isnull=False)
+        .exclude(status='CANCELLED')
+        .values('user_id')
+        .annotate(order_count=Count('pk'), lifetime_total=Sum('subtotal'), last_order_at=Max('created'))
+        .order_by()
+    )
+    OrderSummary.objects.bulk_create([OrderSummary(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_cartitem_indexes'),
+        ('orders', '0003_order_number'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_summary', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Order count')),
+                ('lifetime_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14, verbose_name='Lifetime total')),
+                ('last_order_at', models.DateTimeField(blank=True, null=True, verbose_name='Last order date')),
+            ],
+            options={
+                'verbose_name': 'Order summary',
+                'verbose_name_plural': 'Order summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created', '-id'], name='orders_orde_user_id_305468_idx'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to=settings.AUTH_USER_MODEL, verbose_name='User'),
+        ),
+        migrations.RunPython(fill_order_summaries, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,307 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db import router
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from model_utils.models import TimeStampedModel
 from model_utils.models import UUIDModel
+
+from .choices import ORDER_STATUS_TRANSITIONS
+from .choices import OrderStatus
+from .exceptions import InvalidTransitionError
+from .managers import IdempotencyKeyManager
+from .managers import OrderManager
+from .managers import OrderSummaryManager
+from .numbers import format_order_number
+from .numbers import order_numbers
+
+
+class Order(UUIDModel, TimeStampedModel):
+    number = models.CharField(
+        verbose_name=_("Number"),
+        max_length=32,
+        unique=True,
+        editable=False,
+    )
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        verbose_name=_("User"),
+        related_name="orders",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        db_index=False,
+    )
+    cart = models.OneToOneField(
+        to="cart.Cart",
+        verbose_name=_("Cart"),
+        related_name="order",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=20,
+        choices=OrderStatus.choices,
+        default=OrderStatus.PENDING,
+    )
+    total_quantity = models.PositiveIntegerField(
+        verbose_name=_("Total quantity"),
+        default=0,
+    )
+    subtotal = models.DecimalField(
+        verbose_name=_("Subtotal"),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        validators=[MinValueValidator(Decimal("0.00"))],
+    )
+
+    objects = OrderManager()
+
+    class Meta:
+        verbose_name = _("Order")
+        verbose_name_plural = _("Orders")
+        indexes = [
+            models.Index(fields=["status"]),
+            models.Index(fields=["user", "-created", "-id"]),
+        ]
+        ordering = ["-created"]
+
+    def __str__(self):
+        return f"Order {self.number} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        if not self.number:
+            using = kwargs.get("using") or router.db_for_write(Order, instance=self)
+            value = order_numbers.allocate(using=using)
+            self.number = format_order_number(value, self.created.year)
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse("orders:detail", kwargs={"pk": self.pk})
+
+    def can_transition(self, status):
+        return status in ORDER_STATUS_TRANSITIONS[self.status]
+
+    def transition(self, status, actor=None, note=""):
+        """
+        Move the order to ``status`` and log the change as an ``OrderEvent``.
+
+        Raises ``InvalidTransitionError`` if the order cannot make the move,
+        including when its status changed in the database in the meantime.
+        """
+        if not self.can_transition(status):
+            raise InvalidTransitionError(self.status, status)
+        moved = Order.objects.filter(pk=self.pk, status=self.status).transition(
+            status,
+            actor=actor,
+            note=note,
+        )
+        if not moved:
+            raise InvalidTransitionError(self.status, status)
+        self.refresh_from_db(fields=["status", "modified"])
+
+
+class OrderLine(UUIDModel, TimeStampedModel):
+    """
+    A checked out cart line, snapshotting the variant as it was sold.
+    """
+
+    order = models.ForeignKey(
+        to=Order,
+        verbose_name=_("Order"),
+        related_name="lines",
+        on_delete=models.CASCADE,
+    )
+    variant = models.ForeignKey(
+        to="products.ProductVariant",
+        verbose_name=_("Product variant"),
+        related_name="order_lines",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    sku = models.CharField(
+        verbose_name=_("SKU"),
+        max_length=50,
+    )
+    product_name = models.CharField(
+        verbose_name=_("Product name"),
+        max_length=255,
+    )
+    attributes = models.JSONField(
+        verbose_name=_("Attributes"),
+        default=dict,
+        blank=True,
+    )
+    unit_price = models.DecimalField(
+        verbose_name=_("Unit price"),
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal("0.00"))],
+    )
+    quantity = models.PositiveIntegerField(
+        verbose_name=_("Quantity"),
+        validators=[MinValueValidator(1)],
+    )
+
+    class Meta:
+        verbose_name = _("Order line")
+        verbose_name_plural = _("Order lines")
+        ordering = ["order_id", "sku"]
+
+    def __str__(self):
+        return f"{self.order_id} - {self.sku} x {self.quantity}"
+
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
+
+
+class OrderEvent(UUIDModel, TimeStampedModel):
+    """
+    An order status change. Events are only ever appended.
+    """
+
+    order = models.ForeignKey(
+        to=Order,
+        verbose_name=_("Order"),
+        related_name="events",
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    from_status = models.CharField(
+        verbose_name=_("From status"),
+        max_length=20,
+        choices=OrderStatus.choices,
+    )
+    to_status = models.CharField(
+        verbose_name=_("To status"),
+        max_length=20,
+        choices=OrderStatus.choices,
+    )
+    actor = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        verbose_name=_("Actor"),
+        related_name="+",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    note = models.CharField(
+        verbose_name=_("Note"),
+        max_length=255,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _("Order event")
+        verbose_name_plural = _("Order events")
+        indexes = [
+            models.Index(fields=["order", "created"]),
+        ]
+        ordering = ["order_id", "created"]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            msg = "Order events cannot be changed."
+            raise ValueError(msg)
+        super().save(*args, **kwargs)
+
+
+class OrderSummary(models.Model):
+    """
+    Running totals of a user's orders, kept up to date as orders change.
+    """
+
+    user = models.OneToOneField(
+        to=settings.AUTH_USER_MODEL,
+        verbose_name=_("User"),
+        related_name="order_summary",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    order_count = models.IntegerField(
+        verbose_name=_("Order count"),
+        default=0,
+    )
+    lifetime_total = models.DecimalField(
+        verbose_name=_("Lifetime total"),
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+    last_order_at = models.DateTimeField(
+        verbose_name=_("Last order date"),
+        blank=True,
+        null=True,
+    )
+
+    objects = OrderSummaryManager()
+
+    class Meta:
+        verbose_name = _("Order summary")
+        verbose_name_plural = _("Order summaries")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.order_count} orders"
+
+
+class IdempotencyKey(UUIDModel, TimeStampedModel):
+    """
+    The response sent for an idempotency key, replayed to retried requests.
+    """
+
+    scope = models.CharField(
+        verbose_name=_("Scope"),
+        max_length=255,
+    )
+    key = models.CharField(
+        verbose_name=_("Key"),
+        max_length=255,
+    )
+    fingerprint = models.CharField(
+        verbose_name=_("Request fingerprint"),
+        max_length=64,
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name=_("Response status code"),
+        blank=True,
+        null=True,
+    )
+    headers = models.JSONField(
+        verbose_name=_("Response headers"),
+        default=dict,
+        blank=True,
+    )
+    content = models.BinaryField(
+        verbose_name=_("Response content"),
+        default=bytes,
+        blank=True,
+    )
+
+    objects = IdempotencyKeyManager()
+
+    class Meta:
+        verbose_name = _("Idempotency key")
+        verbose_name_plural = _("Idempotency keys")
+        indexes = [
+            models.Index(fields=["created"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key"],
+                name="unique_idempotency_key_per_scope",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
@@ -0,0 +1,67 @@
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+from django.db import transaction
+
+from apps.core.models import Counter
+
+ORDER_NUMBER_SEQUENCE = "orders_order_number_seq"
+ORDER_NUMBER_COUNTER_KEY = "orders.order.number"
+
+
+def format_order_number(value, year):
+    return f"{settings.ORDER_NUMBER_PREFIX}-{year}-{value:06d}"
+
+
+class OrderNumberAllocator:
+    """
+    Hand out order numbers from blocks reserved once per process.
+
+    On PostgreSQL a block is one ``nextval`` call per number, batched into a
+    single query. Sequences never take locks or roll back, so numbers lost
+    to a failed checkout or a process exit leave gaps. Other backends reserve
+    blocks from a ``Counter`` row. That reservation commits with the
+    surrounding transaction, so the rest of a block is only handed out once
+    it has committed. A rolled back block is given out again by the counter.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self._values = deque()
+
+    def allocate(self, using="default"):
+        try:
+            return self._values.popleft()
+        except IndexError:
+            pass
+        block = self._reserve(using)
+        first, rest = block[0], block[1:]
+        connection = connections[using]
+        if connection.vendor == "postgresql" or not connection.in_atomic_block:
+            self._values.extend(rest)
+        else:
+            transaction.on_commit(lambda: self._values.extend(rest), using=using)
+        return first
+
+    def clear(self):
+        self._values.clear()
+
+    def _reserve(self, using):
+        count = self.block_size or settings.ORDER_NUMBER_BLOCK_SIZE
+        connection = connections[using]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT nextval(%s) FROM generate_series(1, %s)",
+                    [ORDER_NUMBER_SEQUENCE, count],
+                )
+                return [value for (value,) in cursor.fetchall()]
+        start = Counter.objects.db_manager(using).reserve(
+            ORDER_NUMBER_COUNTER_KEY,
+            count,
+        )
+        return list(range(start + 1, start + count + 1))
+
+
+order_numbers = OrderNumberAllocator()
@@ -0,0 +1,148 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.cart.choices import CartStatus
+from apps.cart.exceptions import InsufficientStockError
+from apps.cart.models import Cart
+from apps.cart.models import CartItem
+from apps.cart.models import StockReservation
+from apps.cart.services import get_cart_service
+from apps.cart.utils import invalidate_mini_cart
+from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttributeValue
+
+from .exceptions import CheckoutError
+from .models import Order
+from .models import OrderLine
+from .models import OrderSummary
+
+
+def get_variant_attributes(variant_ids):
+    """
+    Return ``{variant_id: {attribute name: value}}`` in one query.
+    """
+    attributes = defaultdict(dict)
+    for variant_id, name, value in (
+        ProductVariantAttributeValue.objects.filter(product_variant_id__in=variant_ids)
+        .order_by("attribute__name")
+        .values_list("product_variant_id", "attribute__name", "attribute_value__value")
+    ):
+        attributes[variant_id][name] = value
+    return attributes
+
+
+def checkout(cart):
+    """
+    Turn the open ``cart`` into a pending ``Order`` and return it.
+
+    Everything happens in one transaction with a fixed number of queries,
+    whatever the number of lines. The cart is closed first with a guarded
+    update, which also serialises concurrent checkouts of the same cart. The
+    variant rows are then locked in primary key order, so checkouts sharing
+    variants queue up instead of deadlocking. Stock is decremented with one
+    conditional ``F()`` update and the lines are bulk inserted. Stock held
+    for other carts is not sold.
+
+    Raises ``CheckoutError`` for carts that are empty or no longer open, and
+    ``InsufficientStockError`` on shortages. Nothing is written then.
+    """
+    get_cart_service().flush(cart)
+    with transaction.atomic():
+        closed = (
+            Cart.objects.open()
+            .filter(pk=cart.pk)
+            .update(status=CartStatus.CHECKED_OUT, modified=timezone.now())
+        )
+        if not closed:
+            raise CheckoutError(_("This cart is no longer open."))
+        quantities = dict(
+            CartItem.lean.filter(cart_id=cart.pk).values_list("variant_id", "quantity"),
+        )
+        if not quantities:
+            raise CheckoutError(_("This cart is empty."))
+        variants = {
+            pk: (sku, price, stock, product_name)
+            for pk, sku, price, stock, product_name in ProductVariant.objects.active()
+            .select_for_update(of=("self",))
+            .filter(pk__in=quantities)
+            .order_by("pk")
+            .values_list("pk", "sku", "price", "stock_quantity", "product__name")
+        }
+        held = StockReservation.objects.get_held(quantities, exclude_cart=cart)
+        shortages = {}
+        for variant_id, quantity in quantities.items():
+            stock = variants[variant_id][2] if variant_id in variants else 0
+            available = max(stock - held.get(variant_id, 0), 0)
+            if quantity > available:
+                shortages[variant_id] = (quantity, available)
+        if shortages:
+            raise InsufficientStockError(shortages)
+
+        decremented = ProductVariant.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(pk=variant_id, stock_quantity__gte=quantity)
+                    for variant_id, quantity in quantities.items()
+                ),
+            ),
+        ).update_stock(
+            stock_quantity=Case(
+                *(
+                    When(pk=variant_id, then=F("stock_quantity") - quantity)
+                    for variant_id, quantity in quantities.items()
+                ),
+            ),
+        )
+        # The rows are locked and were checked above, so this only trips if
+        # the database does not honour the locks.
+        if decremented != len(quantities):
+            raise InsufficientStockError(
+                {
+                    variant_id: (quantity, 0)
+                    for variant_id, quantity in quantities.items()
+                },
+            )
+
+        attributes = get_variant_attributes(quantities)
+        order = Order.objects.create(
+            user_id=cart.user_id,
+            cart_id=cart.pk,
+            total_quantity=sum(quantities.values()),
+            subtotal=sum(
+                variants[variant_id][1] * quantity
+                for variant_id, quantity in quantities.items()
+            ),
+        )
+        OrderLine.objects.bulk_create(
+            [
+                OrderLine(
+                    order=order,
+                    variant_id=variant_id,
+                    sku=variants[variant_id][0],
+                    product_name=variants[variant_id][3],
+                    attributes=attributes.get(variant_id, {}),
+                    unit_price=variants[variant_id][1],
+                    quantity=quantity,
+                )
+                for variant_id, quantity in quantities.items()
+            ],
+        )
+        if order.user_id is not None:
+            OrderSummary.objects.record(
+                order.user_id,
+                order.subtotal,
+                placed_at=order.created,
+            )
+        StockReservation.objects.release(cart)
+        invalidate_mini_cart(cart)
+    return order
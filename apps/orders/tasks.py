@@ -0,0 +1,18 @@
+import logging
+
+from celery import shared_task
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_idempotency_keys():
+    deleted, _ = IdempotencyKey.objects.expired().delete()
+    logger.info(
+        "Purged %d expired idempotency keys.",
+        deleted,
+        extra={"purged_idempotency_keys": deleted},
+    )
+    return deleted
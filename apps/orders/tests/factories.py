@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from factory import LazyAttribute
+from factory import SubFactory
+from factory import post_generation
+from factory.django import DjangoModelFactory
+
+from apps.orders.choices import OrderStatus
+from apps.orders.models import Order
+from apps.orders.models import OrderLine
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+
+class OrderFactory(DjangoModelFactory):
+    user = SubFactory(UserFactory)
+    cart = None
+    status = OrderStatus.PENDING
+    total_quantity = 0
+    subtotal = Decimal("0.00")
+
+    class Meta:
+        model = Order
+        skip_postgeneration_save = True
+
+    @post_generation
+    def lines(self, create, extracted, **kwargs):
+        if not create or not extracted:
+            return
+
+        if isinstance(extracted, int):
+            lines = [OrderLineFactory(order=self) for _ in range(extracted)]
+        else:
+            lines = [OrderLineFactory(order=self, **line) for line in extracted]
+        self.total_quantity = sum(line.quantity for line in lines)
+        self.subtotal = sum((line.line_total for line in lines), Decimal("0.00"))
+        self.save(update_fields=["total_quantity", "subtotal"])
+
+
+class OrderLineFactory(DjangoModelFactory):
+    order = SubFactory(OrderFactory)
+    variant = SubFactory(ProductVariantFactory)
+    sku = LazyAttribute(lambda line: line.variant.sku)
+    product_name = LazyAttribute(lambda line: line.variant.product.name)
+    unit_price = LazyAttribute(lambda line: line.variant.price)
+    quantity = 1
+
+    class Meta:
+        model = OrderLine
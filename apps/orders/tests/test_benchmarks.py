@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from apps.cart.tests.factories import CartFactory
+from apps.orders.models import Order
+from apps.orders.services import checkout
+from apps.products.models import ProductVariant
+from apps.products.tests.factories import ProductVariantFactory
+
+CHECKOUT_COUNT = 200
+LINES_PER_CART = 5
+WORKERS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="checkout throughput is only meaningful on PostgreSQL",
+)
+class TestCheckoutBenchmark:
+    def test_concurrent_checkouts_per_second(self):
+        variants = ProductVariantFactory.create_batch(
+            LINES_PER_CART * 2,
+            price=Decimal("1.00"),
+            stock_quantity=CHECKOUT_COUNT,
+        )
+        # Carts overlap on half of their variants to exercise the row locks.
+        carts = [
+            CartFactory(
+                items=[
+                    {"variant": variant, "quantity": 1}
+                    for variant in variants[n % LINES_PER_CART :][:LINES_PER_CART]
+                ],
+            )
+            for n in range(CHECKOUT_COUNT)
+        ]
+
+        def run(cart):
+            try:
+                checkout(cart)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            list(executor.map(run, carts))
+        elapsed = time.perf_counter() - started
+        print(  # noqa: T201
+            f"{CHECKOUT_COUNT / elapsed:.0f} checkouts/s "
+            f"({CHECKOUT_COUNT} carts x {LINES_PER_CART} lines, {WORKERS} workers)",
+        )
+        assert Order.objects.count() == CHECKOUT_COUNT
+        sold = sum(
+            CHECKOUT_COUNT - stock
+            for stock in ProductVariant.objects.values_list("stock_quantity", flat=True)
+        )
+        assert sold == CHECKOUT_COUNT * LINES_PER_CART
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.orders.models import OrderSummary
+from apps.orders.services import checkout
+from apps.orders.utils import decode_order_cursor
+from apps.orders.utils import encode_order_cursor
+from apps.users.tests.factories import UserFactory
+
+from .factories import OrderFactory
+from .test_services import make_cart
+
+
+def make_history(user, count):
+    orders = OrderFactory.create_batch(count, user=user, lines=1)
+    # Pairs of orders share a timestamp, so pages must break ties on the id.
+    now = timezone.now()
+    for index, order in enumerate(orders):
+        Order.objects.filter(pk=order.pk).update(
+            created=now - timedelta(minutes=index // 2),
+        )
+    return list(Order.objects.for_user(user))
+
+
+@pytest.mark.django_db
+class TestOrderHistory:
+    def test_cursor_round_trips(self):
+        order = OrderFactory()
+        assert decode_order_cursor(encode_order_cursor(order)) == (
+            order.created,
+            order.pk,
+        )
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "Zm9vfGJhcg"])
+    def test_invalid_cursor_is_ignored(self, cursor):
+        assert decode_order_cursor(cursor) is None
+
+    def test_pages_walk_every_order_once(self):
+        user = UserFactory()
+        expected = make_history(user, 7)
+        OrderFactory()
+        seen = []
+        orders = Order.objects.for_user(user)
+        while page := list(orders[:3]):
+            seen.extend(page)
+            orders = Order.objects.for_user(user).before(page[-1].created, page[-1].pk)
+        assert seen == expected
+
+    def test_list_view_pages_with_cursor(self, client):
+        user = UserFactory()
+        expected = make_history(user, 12)
+        client.force_login(user)
+        first = client.get(reverse("orders:list"))
+        assert first.status_code == HTTPStatus.OK
+        assert first.context["orders"] == expected[:10]
+        second = client.get(
+            reverse("orders:list"),
+            {"after": first.context["next_cursor"]},
+        )
+        assert second.context["orders"] == expected[10:]
+        assert second.context["next_cursor"] is None
+
+    def test_deep_pages_cost_the_same_as_the_first(self, client):
+        user = UserFactory()
+        make_history(user, 30)
+        client.force_login(user)
+        counts = []
+        cursor = ""
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(reverse("orders:list"), {"after": cursor})
+            counts.append(
+                sum('"orders_' in query["sql"] for query in context.captured_queries),
+            )
+            cursor = response.context["next_cursor"]
+        assert counts[0] == counts[1] == counts[2]
+        lines = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "orders_orderline"')
+        ]
+        assert len(lines) == 1
+        assert "OFFSET" not in " ".join(q["sql"] for q in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestOrderSummary:
+    def test_checkout_updates_summary(self):
+        first, _ = make_cart(2)
+        order = checkout(first)
+        second, _ = make_cart(1)
+        second.user = first.user
+        second.save()
+        latest = checkout(second)
+        summary = OrderSummary.objects.get(user=first.user)
+        assert summary.order_count == 2  # noqa: PLR2004
+        assert summary.lifetime_total == order.subtotal + latest.subtotal
+        assert summary.last_order_at == latest.created
+
+    def test_record_takes_orders_back_out(self):
+        user = UserFactory()
+        placed_at = timezone.now()
+        OrderSummary.objects.record(user.pk, Decimal("10.00"), placed_at=placed_at)
+        OrderSummary.objects.record(user.pk, Decimal("-10.00"), count=-1)
+        summary = OrderSummary.objects.get(user=user)
+        assert summary.order_count == 0
+        assert summary.lifetime_total == Decimal("0.00")
+        assert summary.last_order_at == placed_at
+
+    def test_users_without_orders_get_empty_summary(self):
+        summary = OrderSummary.objects.get_for_user(UserFactory())
+        assert summary.order_count == 0
+        assert summary.last_order_at is None
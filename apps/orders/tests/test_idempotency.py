@@ -0,0 +1,152 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.cart.session import SessionCart
+from apps.orders.idempotency import IDEMPOTENCY_REPLAYED_HEADER
+from apps.orders.models import IdempotencyKey
+from apps.orders.models import Order
+from apps.orders.tasks import purge_idempotency_keys
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+
+@pytest.fixture
+def shopper(client):
+    cache.clear()
+    user = UserFactory()
+    client.force_login(user)
+    session = client.session
+    SessionCart(session).add(ProductVariantFactory(stock_quantity=10).sku, 2)
+    session.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestIdempotentCheckout:
+    def test_replay_returns_stored_response(self, client, shopper):
+        data = {"idempotency_key": "checkout-1"}
+        first = client.post(reverse("orders:checkout"), data)
+        second = client.post(reverse("orders:checkout"), data)
+        order = Order.objects.get(user=shopper)
+        assert second.status_code == HTTPStatus.FOUND
+        assert first["Location"] == second["Location"] == order.get_absolute_url()
+        assert IDEMPOTENCY_REPLAYED_HEADER not in first.headers
+        assert second.headers[IDEMPOTENCY_REPLAYED_HEADER] == "true"
+        assert IdempotencyKey.objects.get().status_code == HTTPStatus.FOUND
+
+    def test_replay_from_database_after_cache_miss(self, client, shopper):
+        headers = {"Idempotency-Key": "checkout-1"}
+        first = client.post(reverse("orders:checkout"), headers=headers)
+        cache.clear()
+        second = client.post(reverse("orders:checkout"), headers=headers)
+        assert second["Location"] == first["Location"]
+        assert second.headers[IDEMPOTENCY_REPLAYED_HEADER] == "true"
+        assert Order.objects.count() == 1
+
+    def test_cached_replay_skips_the_key_table(
+        self,
+        client,
+        shopper,
+        django_capture_on_commit_callbacks,
+    ):
+        data = {"idempotency_key": "checkout-1"}
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("orders:checkout"), data)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(reverse("orders:checkout"), data)
+        assert response.headers[IDEMPOTENCY_REPLAYED_HEADER] == "true"
+        assert not any(
+            "orders_idempotencykey" in query["sql"]
+            for query in context.captured_queries
+        )
+
+    def test_reused_key_with_different_request_is_rejected(self, client, shopper):
+        headers = {"Idempotency-Key": "checkout-1"}
+        client.post(reverse("orders:checkout"), headers=headers)
+        response = client.post(
+            reverse("orders:checkout"),
+            {"note": "again"},
+            headers=headers,
+        )
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert Order.objects.count() == 1
+
+    def test_keys_are_scoped_to_the_user(self, client, shopper):
+        data = {"idempotency_key": "checkout-1"}
+        client.post(reverse("orders:checkout"), data)
+        client.force_login(UserFactory())
+        response = client.post(reverse("orders:checkout"), data)
+        assert IDEMPOTENCY_REPLAYED_HEADER not in response.headers
+        assert IdempotencyKey.objects.count() == 2  # noqa: PLR2004
+
+    def test_failed_request_is_not_stored(self, client, shopper, monkeypatch):
+        def fail(cart):
+            raise RuntimeError
+
+        monkeypatch.setattr("apps.orders.views.checkout", fail)
+        with pytest.raises(RuntimeError):
+            client.post(reverse("orders:checkout"), {"idempotency_key": "checkout-1"})
+        assert not IdempotencyKey.objects.exists()
+        monkeypatch.undo()
+        response = client.post(
+            reverse("orders:checkout"),
+            {"idempotency_key": "checkout-1"},
+        )
+        assert response.url == Order.objects.get().get_absolute_url()
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="SQLite rejects concurrent writers instead of blocking them",
+)
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentIdempotentCheckout:
+    def test_concurrent_duplicates_wait_on_the_lock(
+        self,
+        client,
+        shopper,
+        run_concurrently,
+    ):
+        duplicates = 6
+
+        def post(_):
+            duplicate = Client()
+            duplicate.cookies = client.cookies
+            return duplicate.post(
+                reverse("orders:checkout"),
+                {"idempotency_key": "checkout-1"},
+            )
+
+        responses = run_concurrently(post, range(duplicates))
+        order = Order.objects.get(user=shopper)
+        assert {response["Location"] for response in responses} == {
+            order.get_absolute_url(),
+        }
+        replayed = [
+            response
+            for response in responses
+            if IDEMPOTENCY_REPLAYED_HEADER in response.headers
+        ]
+        assert len(replayed) == duplicates - 1
+        assert IdempotencyKey.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestPurgeIdempotencyKeys:
+    def test_deletes_expired_keys(self, settings):
+        settings.IDEMPOTENCY_KEY_TTL_HOURS = 1
+        IdempotencyKey.objects.create(scope="s", key="fresh", fingerprint="f")
+        stale = IdempotencyKey.objects.create(scope="s", key="stale", fingerprint="f")
+        IdempotencyKey.objects.filter(pk=stale.pk).update(
+            created=timezone.now() - timedelta(hours=2),
+        )
+        assert purge_idempotency_keys.apply().get() == 1
+        assert IdempotencyKey.objects.get().key == "fresh"
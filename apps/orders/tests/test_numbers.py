@@ -0,0 +1,67 @@
+import re
+
+import pytest
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import Counter
+from apps.orders.numbers import OrderNumberAllocator
+from apps.orders.numbers import format_order_number
+
+from .factories import OrderFactory
+
+
+def count_counter_queries(context):
+    table = Counter._meta.db_table  # noqa: SLF001
+    return sum(table in query["sql"] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestOrderNumbers:
+    def test_orders_get_readable_numbers(self):
+        first, second = OrderFactory.create_batch(2)
+        assert re.fullmatch(rf"EE-{first.created.year}-\d{{6}}", first.number)
+        assert first.number != second.number
+
+    def test_format_pads_value(self, settings):
+        settings.ORDER_NUMBER_PREFIX = "EE"
+        assert format_order_number(123, 2026) == "EE-2026-000123"
+
+    @pytest.mark.skipif(
+        connection.vendor == "postgresql",
+        reason="PostgreSQL reserves blocks from a sequence",
+    )
+    def test_block_is_served_without_queries(self, django_capture_on_commit_callbacks):
+        allocator = OrderNumberAllocator(block_size=3)
+        with CaptureQueriesContext(connection) as context:
+            with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+                first = allocator.allocate()
+            values = [first, allocator.allocate(), allocator.allocate()]
+            assert count_counter_queries(context) == 1
+            values.append(allocator.allocate())
+        assert values == list(range(first, first + 4))
+        assert count_counter_queries(context) == 2  # noqa: PLR2004
+
+    def test_processes_get_disjoint_blocks(self):
+        first, second = OrderNumberAllocator(5), OrderNumberAllocator(5)
+        values = [first.allocate(), second.allocate(), first.allocate()]
+        assert len(set(values)) == len(values)
+
+    @pytest.mark.skipif(
+        connection.vendor == "postgresql",
+        reason="sequence values are not rolled back",
+    )
+    def test_rolled_back_block_is_not_reused_in_process(self):
+        allocator = OrderNumberAllocator(block_size=3)
+
+        def allocate_and_fail():
+            with transaction.atomic():
+                values.append(allocator.allocate())
+                raise RuntimeError
+
+        values = []
+        with pytest.raises(RuntimeError):
+            allocate_and_fail()
+        assert not allocator._values  # noqa: SLF001
+        assert OrderNumberAllocator(block_size=3).allocate() == values[0]
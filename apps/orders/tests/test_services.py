@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.cart.choices import CartStatus
+from apps.cart.exceptions import InsufficientStockError
+from apps.cart.models import StockReservation
+from apps.cart.tests.factories import CartFactory
+from apps.orders.exceptions import CheckoutError
+from apps.orders.models import Order
+from apps.orders.numbers import order_numbers
+from apps.orders.services import checkout
+from apps.products.models import ProductVariant
+from apps.products.tests.factories import AttributeValueFactory
+from apps.products.tests.factories import ProductVariantFactory
+
+
+def make_cart(line_count, quantity=2):
+    variants = ProductVariantFactory.create_batch(
+        line_count,
+        price=Decimal("1.50"),
+        stock_quantity=10,
+    )
+    cart = CartFactory(
+        items=[{"variant": variant, "quantity": quantity} for variant in variants],
+    )
+    return cart, variants
+
+
+@pytest.mark.django_db
+class TestCheckout:
+    def test_creates_order_and_closes_cart(self):
+        cart, variants = make_cart(2)
+        order = checkout(cart)
+        assert order.user_id == cart.user_id
+        assert order.total_quantity == 4  # noqa: PLR2004
+        assert order.subtotal == Decimal("6.00")
+        assert set(order.lines.values_list("variant_id", flat=True)) == {
+            variant.pk for variant in variants
+        }
+        cart.refresh_from_db()
+        assert cart.status == CartStatus.CHECKED_OUT
+
+    def test_decrements_stock(self):
+        cart, variants = make_cart(2, quantity=3)
+        checkout(cart)
+        assert set(
+            ProductVariant.objects.filter(pk__in=[v.pk for v in variants]).values_list(
+                "stock_quantity",
+                flat=True,
+            ),
+        ) == {7}
+
+    def test_snapshots_the_variant(self):
+        color = AttributeValueFactory(attribute__name="Color", value="Negro")
+        variant = ProductVariantFactory(
+            price=Decimal("9.90"),
+            stock_quantity=5,
+            attribute_values=[color],
+        )
+        cart = CartFactory(items=[{"variant": variant, "quantity": 1}])
+        line = checkout(cart).lines.get()
+        ProductVariant.objects.filter(pk=variant.pk).update(price=Decimal("12.00"))
+        line.refresh_from_db()
+        assert line.sku == variant.sku
+        assert line.product_name == variant.product.name
+        assert line.unit_price == Decimal("9.90")
+        assert line.attributes == {"Color": "Negro"}
+
+    def test_rejects_closed_and_empty_carts(self):
+        with pytest.raises(CheckoutError):
+            checkout(CartFactory())
+        cart, _ = make_cart(1)
+        checkout(cart)
+        with pytest.raises(CheckoutError):
+            checkout(cart)
+        assert Order.objects.count() == 1
+
+    def test_shortage_rolls_back(self):
+        cart, (variant, short) = make_cart(2, quantity=3)
+        ProductVariant.objects.filter(pk=short.pk).update(stock_quantity=2)
+        with pytest.raises(InsufficientStockError) as exc_info:
+            checkout(cart)
+        assert exc_info.value.shortages == {short.pk: (3, 2)}
+        variant.refresh_from_db()
+        cart.refresh_from_db()
+        assert variant.stock_quantity == 10  # noqa: PLR2004
+        assert cart.status == CartStatus.OPEN
+        assert not Order.objects.exists()
+
+    def test_respects_stock_held_for_other_carts(self):
+        cart, (variant,) = make_cart(1, quantity=3)
+        StockReservation.objects.reserve(CartFactory(), {variant: 8})
+        with pytest.raises(InsufficientStockError):
+            checkout(cart)
+
+    def test_consumes_own_holds(self):
+        cart, (variant,) = make_cart(1, quantity=3)
+        StockReservation.objects.reserve(cart, {variant: 3})
+        checkout(cart)
+        assert not StockReservation.objects.exists()
+
+    def test_query_count_does_not_depend_on_line_count(self):
+        counts = []
+        for line_count in (1, 10):
+            cart, _ = make_cart(line_count)
+            # Reserve a fresh block of order numbers on every checkout.
+            order_numbers.clear()
+            with CaptureQueriesContext(connection) as context:
+                checkout(cart)
+            counts.append(
+                sum(
+                    "SAVEPOINT" not in query["sql"]
+                    for query in context.captured_queries
+                ),
+            )
+        # Close the cart, read lines, lock variants, read holds, decrement
+        # stock and refresh the products' total stock (3), read attributes,
+        # reserve order numbers, insert order and lines, record the summary
+        # (2) and release the holds.
+        assert counts == [14, 14]
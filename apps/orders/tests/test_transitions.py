@@ -0,0 +1,144 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.orders.choices import OrderStatus
+from apps.orders.exceptions import InvalidTransitionError
+from apps.orders.models import Order
+from apps.orders.models import OrderEvent
+from apps.orders.models import OrderSummary
+from apps.orders.services import checkout
+from apps.products.models import ProductVariant
+from apps.users.tests.factories import UserFactory
+
+from .factories import OrderFactory
+from .test_services import make_cart
+
+
+@pytest.mark.django_db
+class TestOrderTransition:
+    def test_moves_order_and_logs_event(self):
+        order = OrderFactory()
+        actor = UserFactory()
+        order.transition(OrderStatus.PAID, actor=actor, note="Bank transfer")
+        assert order.status == OrderStatus.PAID
+        event = order.events.get()
+        assert (event.from_status, event.to_status) == (
+            OrderStatus.PENDING,
+            OrderStatus.PAID,
+        )
+        assert event.actor == actor
+        assert event.note == "Bank transfer"
+
+    def test_rejects_invalid_transition(self):
+        order = OrderFactory(status=OrderStatus.DELIVERED)
+        with pytest.raises(InvalidTransitionError):
+            order.transition(OrderStatus.PAID)
+        assert not OrderEvent.objects.exists()
+
+    def test_rejects_stale_status(self):
+        order = OrderFactory()
+        Order.objects.filter(pk=order.pk).update(status=OrderStatus.CANCELLED)
+        with pytest.raises(InvalidTransitionError):
+            order.transition(OrderStatus.PAID)
+        assert not OrderEvent.objects.exists()
+
+    def test_events_are_append_only(self):
+        order = OrderFactory()
+        order.transition(OrderStatus.CANCELLED)
+        event = order.events.get()
+        event.note = "Changed"
+        with pytest.raises(ValueError, match="cannot be changed"):
+            event.save()
+
+    def test_cancelling_takes_order_out_of_summary(self):
+        order = OrderFactory(subtotal=Decimal("8.00"))
+        OrderSummary.objects.record(order.user_id, order.subtotal)
+        order.transition(OrderStatus.CANCELLED)
+        summary = OrderSummary.objects.get(user=order.user)
+        assert summary.order_count == 0
+        assert summary.lifetime_total == Decimal("0.00")
+
+    def test_cancelling_restocks_lines(self):
+        cart, variants = make_cart(2, quantity=3)
+        order = checkout(cart)
+        Order.objects.filter(pk=order.pk).transition(OrderStatus.CANCELLED)
+        stock = ProductVariant.objects.filter(
+            pk__in=[variant.pk for variant in variants],
+        ).values_list("stock_quantity", "product__total_stock")
+        assert set(stock) == {(10, 10)}
+
+    def test_paying_does_not_restock(self):
+        cart, variants = make_cart(1, quantity=3)
+        checkout(cart).transition(OrderStatus.PAID)
+        variants[0].refresh_from_db()
+        assert variants[0].stock_quantity == 7  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+class TestBulkTransition:
+    def test_moves_only_eligible_orders(self):
+        paid = OrderFactory.create_batch(3, status=OrderStatus.PAID)
+        pending = OrderFactory(status=OrderStatus.PENDING)
+        moved = Order.objects.all().transition(OrderStatus.SHIPPED)
+        assert moved == 3  # noqa: PLR2004
+        assert set(
+            Order.objects.filter(status=OrderStatus.SHIPPED).values_list(
+                "pk",
+                flat=True,
+            ),
+        ) == {order.pk for order in paid}
+        pending.refresh_from_db()
+        assert pending.status == OrderStatus.PENDING
+        assert OrderEvent.objects.filter(from_status=OrderStatus.PAID).count() == 3  # noqa: PLR2004
+
+    def test_query_count_does_not_depend_on_order_count(self):
+        counts = []
+        for batch_size in (2, 20):
+            OrderFactory.create_batch(batch_size, status=OrderStatus.PAID)
+            with CaptureQueriesContext(connection) as context:
+                Order.objects.filter(status=OrderStatus.PAID).transition(
+                    OrderStatus.SHIPPED,
+                )
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1]
+
+    def test_sends_no_save_signals(self):
+        OrderFactory.create_batch(3)
+        saved = []
+
+        def receiver(sender, **kwargs):
+            saved.append(sender)
+
+        post_save.connect(receiver)
+        try:
+            Order.objects.all().transition(OrderStatus.PAID)
+        finally:
+            post_save.disconnect(receiver)
+        assert not saved
+
+    def test_admin_action_marks_orders_shipped(self, client):
+        orders = OrderFactory.create_batch(2, status=OrderStatus.PAID)
+        OrderFactory(status=OrderStatus.PENDING)
+        admin = UserFactory(is_staff=True, is_superuser=True)
+        client.force_login(admin)
+        response = client.post(
+            reverse("admin:orders_order_changelist"),
+            {
+                "action": "mark_shipped",
+                "_selected_action": [str(order.pk) for order in Order.objects.all()],
+            },
+        )
+        assert response.status_code == HTTPStatus.FOUND
+        assert set(
+            Order.objects.filter(status=OrderStatus.SHIPPED).values_list(
+                "pk",
+                flat=True,
+            ),
+        ) == {order.pk for order in orders}
+        assert set(OrderEvent.objects.values_list("actor", flat=True)) == {admin.pk}
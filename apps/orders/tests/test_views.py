@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from apps.cart.session import SessionCart
+from apps.cart.tests.factories import CartFactory
+from apps.orders.models import Order
+from apps.products.tests.factories import ProductVariantFactory
+from apps.users.tests.factories import UserFactory
+
+from .factories import OrderFactory
+
+
+@pytest.mark.django_db
+class TestCheckoutView:
+    def test_checks_out_the_session_cart(self, client):
+        variant = ProductVariantFactory(stock_quantity=10)
+        user = UserFactory()
+        client.force_login(user)
+        session = client.session
+        SessionCart(session).add(variant.sku, 2)
+        session.save()
+        response = client.post(reverse("orders:checkout"))
+        order = Order.objects.get(user=user)
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.url == order.get_absolute_url()
+        assert order.lines.get().quantity == 2  # noqa: PLR2004
+
+    def test_empty_cart_returns_to_cart(self, client):
+        client.force_login(UserFactory())
+        response = client.post(reverse("orders:checkout"))
+        assert response.url == reverse("cart:detail")
+        assert not Order.objects.exists()
+
+    def test_shortage_returns_to_cart(self, client):
+        variant = ProductVariantFactory(stock_quantity=1)
+        cart = CartFactory(items=[{"variant": variant, "quantity": 1}])
+        variant.stock_quantity = 0
+        variant.save()
+        client.force_login(cart.user)
+        response = client.post(reverse("orders:checkout"))
+        assert response.url == reverse("cart:detail")
+
+    def test_requires_login(self, client):
+        response = client.post(reverse("orders:checkout"))
+        assert response.status_code == HTTPStatus.FOUND
+        assert reverse("account_login") in response.url
+
+
+@pytest.mark.django_db
+class TestOrderDetailView:
+    def test_shows_own_order(self, client):
+        order = OrderFactory(lines=2)
+        client.force_login(order.user)
+        response = client.get(order.get_absolute_url())
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.context["order"].lines.all()) == 2  # noqa: PLR2004
+
+    def test_hides_other_users_orders(self, client):
+        client.force_login(UserFactory())
+        response = client.get(OrderFactory().get_absolute_url())
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,5 +1,25 @@
 from django.urls import path
 
+from .views import CheckoutView
+from .views import OrderDetailView
+from .views import OrderListView
+
 app_name = "orders"
 
-urlpatterns = []
+urlpatterns = [
+    path(
+        route="",
+        view=OrderListView.as_view(),
+        name="list",
+    ),
+    path(
+        route="checkout/",
+        view=CheckoutView.as_view(),
+        name="checkout",
+    ),
+    path(
+        route="<uuid:pk>/",
+        view=OrderDetailView.as_view(),
+        name="detail",
+    ),
+]
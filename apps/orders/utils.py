@@ -0,0 +1,30 @@
+import binascii
+import hashlib
+import uuid
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from datetime import datetime
+
+IDEMPOTENCY_CACHE_PREFIX = "orders:idempotency"
+
+
+def get_idempotency_cache_key(scope, key):
+    digest = hashlib.sha256(f"{scope}\0{key}".encode()).hexdigest()
+    return f"{IDEMPOTENCY_CACHE_PREFIX}:{digest}"
+
+
+def encode_order_cursor(order):
+    value = f"{order.created.isoformat()}|{order.pk.hex}"
+    return urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor):
+    """
+    Return the ``(created, pk)`` encoded in ``cursor``, or ``None`` if it is invalid.
+    """
+    try:
+        value = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created, pk = value.split("|")
+        return datetime.fromisoformat(created), uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
@@ -0,0 +1,76 @@
+from braces.views import LoginRequiredMixin
+from django.contrib import messages
+from django.shortcuts import redirect
+from django.utils.translation import gettext_lazy as _
+from django.views.generic import DetailView
+from django.views.generic import TemplateView
+from django.views.generic import View
+
+from apps.cart.exceptions import InsufficientStockError
+from apps.cart.services import get_open_cart
+from apps.cart.services import persist_session_cart
+
+from .exceptions import CheckoutError
+from .idempotency import IdempotencyMixin
+from .models import Order
+from .models import OrderSummary
+from .services import checkout
+from .utils import decode_order_cursor
+from .utils import encode_order_cursor
+
+
+class CheckoutView(LoginRequiredMixin, IdempotencyMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, *args, **kwargs):
+        cart = persist_session_cart(request) or get_open_cart(request)
+        try:
+            order = checkout(cart) if cart else None
+        except CheckoutError as error:
+            messages.error(request, str(error))
+        except InsufficientStockError:
+            messages.error(
+                request,
+                _("Some products in your cart are no longer available."),
+            )
+        else:
+            if order is not None:
+                return redirect(order)
+            messages.error(request, _("This cart is empty."))
+        return redirect("cart:detail")
+
+
+class OrderListView(LoginRequiredMixin, TemplateView):
+    """
+    List the user's orders newest first, with their order summary.
+
+    Pages are seeked with an ``after`` cursor instead of an offset, so deep
+    pages cost the same as the first. The lines of a page load in one query.
+    """
+
+    template_name = "orders/order_list.html"
+    paginate_by = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        orders = Order.objects.for_user(self.request.user)
+        after = decode_order_cursor(self.request.GET.get("after", ""))
+        if after is not None:
+            orders = orders.before(*after)
+        orders = list(orders.with_lines()[: self.paginate_by + 1])
+        context["orders"] = orders[: self.paginate_by]
+        context["next_cursor"] = (
+            encode_order_cursor(orders[self.paginate_by - 1])
+            if len(orders) > self.paginate_by
+            else None
+        )
+        context["summary"] = OrderSummary.objects.get_for_user(self.request.user)
+        return context
+
+
+class OrderDetailView(LoginRequiredMixin, DetailView):
+    template_name = "orders/order_detail.html"
+    context_object_name = "order"
+
+    def get_queryset(self):
+        return Order.objects.filter(user=self.request.user).with_lines()
@@ -9,6 +9,7 @@ from .models import Product
 from .models import ProductImage
 from .models import ProductVariant
 from .models import ProductVariantAttributeValue
+from .search import search_products
 
 
 @admin.register(Category)
@@ -216,18 +217,17 @@ class ProductAdmin(nested_admin.NestedModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.with_category().with_variants_summary()
+        return qs.with_category()
 
-    @admin.display(description=_("Price range"))
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return search_products(search_term, queryset), False
+
+    @admin.display(description=_("Price range"), ordering="min_price")
     def price_range(self, obj):
-        min_price = getattr(obj, "min_price", None)
-        max_price = getattr(obj, "max_price", None)
-        if min_price is None:
+        if obj.min_price is None:
             return _("N/A")
-        if min_price == max_price:
-            return f"${min_price:.2f}"
-        return f"${min_price:.2f} - ${max_price:.2f}"
-
-    @admin.display(description=_("Total stock"), ordering="total_stock")
-    def total_stock(self, obj):
-        return getattr(obj, "total_stock", 0)
+        if obj.min_price == obj.max_price:
+            return f"${obj.min_price:.2f}"
+        return f"${obj.min_price:.2f} - ${obj.max_price:.2f}"
@@ -17,3 +17,11 @@ class AttributeGroup(models.TextChoices):
     WEIGHT = "WEIGHT", _("Weight")
     WIDTH = "WIDTH", _("Width")
     OTHER = "OTHER", _("Other")
+
+
+class ProductSort(models.TextChoices):
+    RELEVANCE = "relevance", _("Relevance")
+    NAME = "name", _("Name")
+    PRICE_ASC = "price", _("Lowest price")
+    PRICE_DESC = "-price", _("Highest price")
+    NEWEST = "newest", _("Newest")
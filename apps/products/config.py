@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class ProductsConfig(AppConfig):
     name = "apps.products"
     verbose_name = _("Products")
+
+    def ready(self):
+        import apps.products.signals  # noqa: F401, PLC0415
@@ -1,6 +1,21 @@
+from django.utils.functional import SimpleLazyObject
+
 from .models import Category
+from .utils import category_nav_cache
+
+
+def build_category_nav():
+    return [
+        {"name": name, "slug": slug, "url": Category(slug=slug).get_absolute_url()}
+        for name, slug in Category.objects.active()
+        .order_by("name")
+        .values_list("name", "slug")
+    ]
+
+
+def get_category_nav():
+    return category_nav_cache.get_or_set("nav", build_category_nav)
 
 
 def categories_processor(request):
-    categories = Category.objects.active().only("name", "slug").order_by("name")
-    return {"product_categories": categories}
+    return {"product_categories": SimpleLazyObject(get_category_nav)}
@@ -0,0 +1,188 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import batched
+from itertools import groupby
+
+from .importers import CSV_ATTRIBUTE_PREFIX
+from .importers import CSV_COLUMNS
+from .models import Attribute
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+
+EXPORT_FORMATS = ("csv", "jsonl", "columnar")
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "columnar": "application/x-ndjson",
+}
+
+EXPORT_FIELDS = [
+    "product__category__name",
+    "product__slug",
+    "product__name",
+    "product__short_description",
+    "product__full_description",
+    "product__is_active",
+    "sku",
+    "price",
+    "stock_quantity",
+    "sort_order",
+    "is_active",
+]
+
+
+class Echo:
+    """
+    File-like object whose ``write`` returns the value, for ``csv.writer``.
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_attributes():
+    return {
+        pk: (name, group)
+        for pk, name, group in Attribute.objects.order_by("group", "name").values_list(
+            "pk",
+            "name",
+            "group",
+        )
+    }
+
+
+def get_attribute_column(name, group):
+    return f"{CSV_ATTRIBUTE_PREFIX}{group}:{name}"
+
+
+def iter_variant_chunks(chunk_size=2000):
+    """
+    Yield lists of variant rows, each with a trailing ``{attribute_id: value}``.
+
+    Variants are read with a server-side cursor where available and ordered by
+    product, so all rows of one product are adjacent. Attribute values are
+    fetched with one query per chunk.
+    """
+    rows = (
+        ProductVariant.objects.order_by("product__slug", "sort_order", "sku")
+        .values_list("pk", *EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in batched(rows, chunk_size, strict=False):
+        values = defaultdict(dict)
+        links = ProductVariantAttributeValue.objects.filter(
+            product_variant_id__in=[row[0] for row in chunk],
+        ).values_list("product_variant_id", "attribute_id", "attribute_value__value")
+        for variant_id, attribute_id, value in links:
+            values[variant_id][attribute_id] = value
+        yield [(*row[1:], values[row[0]]) for row in chunk]
+
+
+def export_csv(chunk_size=2000):
+    attributes = get_attributes()
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        [
+            *CSV_COLUMNS,
+            *(get_attribute_column(*attribute) for attribute in attributes.values()),
+        ],
+    )
+    for chunk in iter_variant_chunks(chunk_size):
+        yield "".join(
+            writer.writerow(
+                [
+                    *row[:-1],
+                    *(row[-1].get(attribute_id, "") for attribute_id in attributes),
+                ],
+            )
+            for row in chunk
+        )
+
+
+def export_jsonl(chunk_size=2000):
+    """
+    Yield one product record per line, in the shape ``import_catalog`` reads.
+
+    A product whose variants straddle two chunks is written as two records;
+    importing them yields the same rows.
+    """
+    attributes = get_attributes()
+    for chunk in iter_variant_chunks(chunk_size):
+        lines = []
+        for _, group in groupby(chunk, key=lambda row: row[1]):
+            rows = list(group)
+            first = rows[0]
+            attribute_ids = {attribute_id for row in rows for attribute_id in row[-1]}
+            record = {
+                "category": first[0],
+                "slug": first[1],
+                "name": first[2],
+                "short_description": first[3],
+                "full_description": first[4],
+                "is_active": first[5],
+                "attributes": [
+                    {"name": name, "group": attribute_group}
+                    for attribute_id, (name, attribute_group) in attributes.items()
+                    if attribute_id in attribute_ids
+                ],
+                "variants": [
+                    {
+                        "sku": row[6],
+                        "price": str(row[7]),
+                        "stock_quantity": row[8],
+                        "sort_order": row[9],
+                        "is_active": row[10],
+                        "attribute_values": {
+                            attributes[attribute_id][0]: value
+                            for attribute_id, value in row[-1].items()
+                        },
+                    }
+                    for row in rows
+                ],
+            }
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        yield "".join(lines)
+
+
+def export_columnar(chunk_size=2000):
+    """
+    Yield one row group per line: ``{"rows": n, "columns": {name: [...]}}``.
+
+    Each group holds one chunk of variants column by column, under the same
+    column names as the CSV export, so it loads straight into a data frame.
+    """
+    attributes = get_attributes()
+    for chunk in iter_variant_chunks(chunk_size):
+        columns = {
+            column: [row[index] for row in chunk]
+            for index, column in enumerate(CSV_COLUMNS)
+        }
+        columns["price"] = [str(price) for price in columns["price"]]
+        for attribute_id, attribute in attributes.items():
+            columns[get_attribute_column(*attribute)] = [
+                row[-1].get(attribute_id) for row in chunk
+            ]
+        yield (
+            json.dumps({"rows": len(chunk), "columns": columns}, ensure_ascii=False)
+            + "\n"
+        )
+
+
+EXPORTERS = {
+    "csv": export_csv,
+    "jsonl": export_jsonl,
+    "columnar": export_columnar,
+}
+
+
+def export_catalog(file_format, chunk_size=2000):
+    """
+    Yield the catalog as text pieces, holding at most one chunk in memory.
+    """
+    try:
+        exporter = EXPORTERS[file_format]
+    except KeyError:
+        msg = f"Unknown export format '{file_format}'."
+        raise ValueError(msg) from None
+    return exporter(chunk_size)
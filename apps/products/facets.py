@@ -0,0 +1,209 @@
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import groupby
+
+from django.core.cache import cache
+
+from apps.core.cache import get_cache_version
+
+from .models import AttributeValue
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+from .utils import CATALOG_CACHE_NAMESPACE
+
+FACET_INDEX_TIMEOUT = 60 * 60 * 24
+
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+def iter_bits(mask):
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            for bit in BYTE_BITS[byte]:
+                yield offset * 8 + bit
+
+
+@dataclass(frozen=True)
+class FacetValue:
+    id: int
+    value: str
+    count: int
+    selected: bool
+
+
+@dataclass(frozen=True)
+class Facet:
+    attribute_id: int
+    name: str
+    group: str
+    values: list
+
+
+@dataclass(frozen=True)
+class FacetResult:
+    product_ids: list
+    facets: list
+    variant_count: int
+
+
+class FacetIndex:
+    """
+    In-memory inverted index of active variants for one category (or all).
+
+    Variants are numbered by ascending price, so every attribute value maps to a
+    bitmap of variant numbers and a price range maps to a contiguous bit range.
+    Filtering and facet counting are then bitwise operations on Python ints.
+    """
+
+    def __init__(self, product_ids, variant_products, prices, bitmaps, attributes):
+        self.product_ids = product_ids
+        self.variant_products = variant_products
+        self.prices = prices
+        self.bitmaps = bitmaps
+        self.attributes = attributes
+        self.value_attributes = {
+            value_id: attribute_id
+            for attribute_id, _, _, values in attributes
+            for value_id, _ in values
+        }
+
+    @classmethod
+    def build(cls, category=None):
+        variants = ProductVariant.objects.active().filter(product__is_active=True)
+        if category is not None:
+            variants = variants.filter(product__category=category)
+        rows = list(
+            variants.order_by("price", "pk").values_list("pk", "product_id", "price"),
+        )
+        positions = {
+            variant_id: position for position, (variant_id, *_) in enumerate(rows)
+        }
+        product_positions = {}
+        variant_products = [
+            product_positions.setdefault(product_id, len(product_positions))
+            for _, product_id, _ in rows
+        ]
+        bitmaps = defaultdict(int)
+        links = ProductVariantAttributeValue.objects.filter(
+            product_variant__in=variants.values("pk"),
+        ).values_list("product_variant_id", "attribute_value_id")
+        for variant_id, value_id in links:
+            # Variants activated after the first query have no position yet.
+            position = positions.get(variant_id)
+            if position is not None:
+                bitmaps[value_id] |= 1 << position
+        values = (
+            AttributeValue.objects.filter(pk__in=bitmaps)
+            .order_by("attribute__group", "attribute__name", "sort_order", "value")
+            .values_list(
+                "attribute_id",
+                "attribute__name",
+                "attribute__group",
+                "pk",
+                "value",
+            )
+        )
+        attributes = [
+            (attribute_id, name, group, [(row[3], row[4]) for row in group_rows])
+            for (attribute_id, name, group), group_rows in groupby(
+                values,
+                key=lambda row: row[:3],
+            )
+        ]
+        return cls(
+            product_ids=list(product_positions),
+            variant_products=variant_products,
+            prices=[price for *_, price in rows],
+            bitmaps=dict(bitmaps),
+            attributes=attributes,
+        )
+
+    def search(self, value_ids=(), min_price=None, max_price=None, product_ids=None):
+        """
+        Match variants against the selection and count products per facet value.
+
+        Values of the same attribute are OR-ed and attributes are AND-ed. Each
+        facet is counted against the other attributes' selections only, so
+        selecting a value does not hide its siblings. ``product_ids`` restricts
+        the whole result, e.g. to the matches of a text search.
+        """
+        selected = defaultdict(int)
+        selected_ids = set()
+        for value_id in value_ids:
+            attribute_id = self.value_attributes.get(value_id)
+            if attribute_id is not None:
+                selected[attribute_id] |= self.bitmaps[value_id]
+                selected_ids.add(value_id)
+        base = self.get_price_mask(min_price, max_price)
+        if product_ids is not None:
+            base &= self.get_products_mask(product_ids)
+        matches = base
+        for mask in selected.values():
+            matches &= mask
+        facets = []
+        for attribute_id, name, group, values in self.attributes:
+            facet_base = base
+            for other_id, mask in selected.items():
+                if other_id != attribute_id:
+                    facet_base &= mask
+            facet_values = [
+                FacetValue(
+                    id=value_id,
+                    value=value,
+                    count=self.count_products(facet_base & self.bitmaps[value_id]),
+                    selected=value_id in selected_ids,
+                )
+                for value_id, value in values
+            ]
+            facets.append(Facet(attribute_id, name, group, facet_values))
+        return FacetResult(
+            product_ids=self.get_product_ids(matches),
+            facets=facets,
+            variant_count=matches.bit_count(),
+        )
+
+    def get_price_mask(self, min_price=None, max_price=None):
+        start = 0 if min_price is None else bisect_left(self.prices, min_price)
+        end = (
+            len(self.prices)
+            if max_price is None
+            else bisect_right(self.prices, max_price)
+        )
+        if start >= end:
+            return 0
+        return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    def get_products_mask(self, product_ids):
+        product_ids = set(product_ids)
+        positions = {
+            position
+            for position, product_id in enumerate(self.product_ids)
+            if product_id in product_ids
+        }
+        bits = "".join(
+            "1" if position in positions else "0"
+            for position in reversed(self.variant_products)
+        )
+        return int(bits or "0", 2)
+
+    def get_product_ids(self, mask):
+        positions = dict.fromkeys(self.variant_products[bit] for bit in iter_bits(mask))
+        return [self.product_ids[position] for position in positions]
+
+    def count_products(self, mask):
+        return len({self.variant_products[bit] for bit in iter_bits(mask)})
+
+
+def get_facet_index(category=None):
+    key = f"products:facets:{category.pk if category is not None else 'all'}"
+    version = get_cache_version(CATALOG_CACHE_NAMESPACE)
+    index = cache.get(key, version=version)
+    if index is None:
+        index = FacetIndex.build(category)
+        cache.set(key, index, timeout=FACET_INDEX_TIMEOUT, version=version)
+    return index
@@ -1,2 +1,64 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
+
+from .choices import ProductSort
+
+
+class ProductFilterForm(forms.Form):
+    q = forms.CharField(
+        label=_("Search"),
+        max_length=255,
+        required=False,
+    )
+    values = forms.TypedMultipleChoiceField(
+        label=_("Attributes"),
+        coerce=int,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+    min_price = forms.DecimalField(
+        label=_("Minimum price"),
+        min_value=0,
+        decimal_places=2,
+        required=False,
+    )
+    max_price = forms.DecimalField(
+        label=_("Maximum price"),
+        min_value=0,
+        decimal_places=2,
+        required=False,
+    )
+    sort = forms.ChoiceField(
+        label=_("Sort by"),
+        choices=ProductSort.choices,
+        required=False,
+    )
+
+    def __init__(self, *args, facet_index, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["values"].choices = [
+            (value_id, value)
+            for *_, values in facet_index.attributes
+            for value_id, value in values
+        ]
+
+    def get_filters(self):
+        self.is_valid()
+        return {
+            "value_ids": self.cleaned_data.get("values") or [],
+            "min_price": self.cleaned_data.get("min_price"),
+            "max_price": self.cleaned_data.get("max_price"),
+        }
+
+    def get_query(self):
+        self.is_valid()
+        return (self.cleaned_data.get("q") or "").strip()
+
+    def get_sort(self):
+        self.is_valid()
+        sort = self.cleaned_data.get("sort")
+        if self.get_query():
+            return sort or ProductSort.RELEVANCE
+        if not sort or sort == ProductSort.RELEVANCE:
+            return ProductSort.NAME
+        return sort
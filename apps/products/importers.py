@@ -0,0 +1,593 @@
+import csv
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from decimal import InvalidOperation
+from itertools import batched
+from itertools import groupby
+
+from django.db import transaction
+from django.utils import timezone
+from slugify import slugify
+
+from .choices import AttributeGroup
+from .models import Attribute
+from .models import AttributeValue
+from .models import Category
+from .models import Product
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+from .utils import invalidate_catalog_cache
+from .utils import invalidate_category_nav
+from .utils import invalidate_variant_matrices
+
+CATALOG_FORMATS = ("csv", "json", "jsonl")
+
+CSV_ATTRIBUTE_PREFIX = "attribute:"
+CSV_COLUMNS = [
+    "category",
+    "product_slug",
+    "product_name",
+    "short_description",
+    "full_description",
+    "product_is_active",
+    "sku",
+    "price",
+    "stock_quantity",
+    "sort_order",
+    "is_active",
+]
+
+PRODUCT_FIELDS = [
+    "category_id",
+    "name",
+    "short_description",
+    "full_description",
+    "is_active",
+]
+VARIANT_FIELDS = ["product_id", "price", "stock_quantity", "sort_order", "is_active"]
+
+IMPORT_PHASES = (
+    "categories",
+    "attributes",
+    "attribute_values",
+    "products",
+    "product_attributes",
+    "variants",
+    "variant_attribute_values",
+)
+
+TRUE_VALUES = {"1", "true", "yes", "y", "t", "si", "sí"}
+FALSE_VALUES = {"0", "false", "no", "n", "f", ""}
+
+
+def parse_bool(value, *, default=True):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    msg = f"Invalid boolean value: {value!r}."
+    raise ValueError(msg)
+
+
+def parse_decimal(value):
+    try:
+        return Decimal(str(value).strip())
+    except (InvalidOperation, TypeError) as exc:
+        msg = f"Invalid decimal value: {value!r}."
+        raise ValueError(msg) from exc
+
+
+def parse_optional_int(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return int(value)
+
+
+def normalize_attribute(spec):
+    if isinstance(spec, str):
+        return {"name": spec, "group": AttributeGroup.OTHER}
+    return {"name": spec["name"], "group": spec.get("group") or AttributeGroup.OTHER}
+
+
+def normalize_product(entry):
+    """
+    Turn one product record into the shape the importer expects.
+
+    Accepts the records used by ``create_products`` (``category_name``, a single
+    ``attributes`` dict and ``attribute_values`` per variant) as well as the
+    shape written by ``read_csv_catalog`` and the catalog exporter.
+    """
+    try:
+        attributes = entry.get("attributes") or []
+        if isinstance(attributes, (dict, str)):
+            attributes = [attributes]
+        return {
+            "category": entry.get("category") or entry["category_name"],
+            "slug": entry["slug"],
+            "name": entry["name"],
+            "short_description": entry.get("short_description") or "",
+            "full_description": entry.get("full_description") or "",
+            "is_active": parse_bool(entry.get("is_active")),
+            "attributes": [normalize_attribute(spec) for spec in attributes],
+            "variants": [
+                {
+                    "sku": variant["sku"],
+                    "price": parse_decimal(variant["price"]),
+                    "stock_quantity": int(variant.get("stock_quantity") or 0),
+                    "sort_order": parse_optional_int(variant.get("sort_order")),
+                    "is_active": parse_bool(variant.get("is_active")),
+                    "attribute_values": dict(variant.get("attribute_values") or {}),
+                }
+                for variant in entry.get("variants") or []
+            ],
+        }
+    except KeyError as exc:
+        msg = f"Missing required field {exc} in product record."
+        raise ValueError(msg) from exc
+
+
+def parse_csv_attribute_column(column):
+    """
+    Split an ``attribute:GROUP:Name`` (or ``attribute:Name``) CSV header.
+    """
+    spec = column.removeprefix(CSV_ATTRIBUTE_PREFIX)
+    group, separator, name = spec.partition(":")
+    if not separator:
+        return {"name": spec, "group": AttributeGroup.OTHER}
+    return {"name": name, "group": group}
+
+
+def read_csv_catalog(stream):
+    """
+    Read one variant per row, grouping consecutive rows of the same product.
+    """
+    reader = csv.DictReader(stream)
+    attribute_columns = {
+        column: parse_csv_attribute_column(column)
+        for column in reader.fieldnames or []
+        if column.startswith(CSV_ATTRIBUTE_PREFIX)
+    }
+    for slug, group in groupby(reader, key=lambda row: row["product_slug"]):
+        rows = list(group)
+        first = rows[0]
+        attributes = {}
+        variants = []
+        for row in rows:
+            attribute_values = {}
+            for column, spec in attribute_columns.items():
+                if value := (row.get(column) or "").strip():
+                    attributes[spec["name"]] = spec
+                    attribute_values[spec["name"]] = value
+            variants.append(
+                {
+                    "sku": row["sku"],
+                    "price": row["price"],
+                    "stock_quantity": row.get("stock_quantity"),
+                    "sort_order": row.get("sort_order"),
+                    "is_active": row.get("is_active"),
+                    "attribute_values": attribute_values,
+                },
+            )
+        yield normalize_product(
+            {
+                "category": first["category"],
+                "slug": slug,
+                "name": first["product_name"],
+                "short_description": first.get("short_description"),
+                "full_description": first.get("full_description"),
+                "is_active": first.get("product_is_active"),
+                "attributes": list(attributes.values()),
+                "variants": variants,
+            },
+        )
+
+
+def read_catalog(stream, file_format):
+    if file_format == "csv":
+        yield from read_csv_catalog(stream)
+    elif file_format == "json":
+        for entry in json.load(stream):
+            yield normalize_product(entry)
+    elif file_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield normalize_product(json.loads(line))
+    else:
+        msg = f"Unknown catalog format '{file_format}'."
+        raise ValueError(msg)
+
+
+def merge_products(entries):
+    """
+    Merge records sharing a slug: the last one's fields win, variants add up.
+    """
+    merged = {}
+    for entry in entries:
+        previous = merged.get(entry["slug"])
+        if previous is not None:
+            entry = {  # noqa: PLW2901
+                **entry,
+                "attributes": [*previous["attributes"], *entry["attributes"]],
+                "variants": [*previous["variants"], *entry["variants"]],
+            }
+        merged[entry["slug"]] = entry
+    return list(merged.values())
+
+
+@dataclass
+class PhaseStats:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+class CatalogImporter:
+    """
+    Upsert product records in chunks, diffing against rows by natural keys.
+
+    Categories and attributes are matched by lowercased name, attribute values
+    by attribute and lowercased value, products by slug, variants by SKU and
+    variant links by variant and attribute. Only new or changed rows are
+    written, so re-importing unchanged data issues reads only. Nothing is
+    deleted: rows missing from the input are left alone.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.stats = {phase: PhaseStats() for phase in IMPORT_PHASES}
+
+    def run(self, products):
+        for chunk in batched(products, self.chunk_size, strict=False):
+            with transaction.atomic():
+                self.import_chunk(chunk)
+        return self.stats
+
+    def get_report(self):
+        return [
+            (
+                f"{phase}: {stats.created} created, {stats.updated} updated, "
+                f"{stats.unchanged} unchanged in {stats.seconds:.3f}s"
+            )
+            for phase, stats in self.stats.items()
+        ]
+
+    @contextmanager
+    def phase(self, name):
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+
+    def import_chunk(self, entries):
+        entries = merge_products(entries)
+        categories = self.import_categories(entries)
+        attributes = self.import_attributes(entries)
+        values = self.import_attribute_values(entries, attributes)
+        products, changed_products = self.import_products(entries, categories)
+        changed_products |= self.import_product_attributes(
+            entries,
+            products,
+            attributes,
+        )
+        variants = self.import_variants(entries, products)
+        changed_products |= self.import_variant_attribute_values(
+            entries,
+            variants,
+            attributes,
+            values,
+        )
+        if changed_products:
+            Product.objects.filter(pk__in=changed_products).refresh_search_vector()
+            invalidate_catalog_cache()
+            invalidate_variant_matrices(changed_products)
+
+    def import_categories(self, entries):
+        with self.phase("categories") as stats:
+            existing = {}
+            slugs = set()
+            for pk, name, slug in Category.objects.values_list("pk", "name", "slug"):
+                existing[name.lower()] = pk
+                slugs.add(slug)
+            new_categories = {}
+            for entry in entries:
+                key = entry["category"].lower()
+                if key in existing or key in new_categories:
+                    continue
+                slug = base_slug = slugify(entry["category"])
+                suffix = 2
+                while slug in slugs:
+                    slug = f"{base_slug}-{suffix}"
+                    suffix += 1
+                slugs.add(slug)
+                new_categories[key] = Category(name=entry["category"], slug=slug)
+            Category.objects.bulk_create(new_categories.values())
+            existing.update(
+                {key: category.pk for key, category in new_categories.items()},
+            )
+            stats.created += len(new_categories)
+            stats.unchanged += len(
+                {entry["category"].lower() for entry in entries},
+            ) - len(
+                new_categories,
+            )
+            if new_categories:
+                invalidate_category_nav()
+            return existing
+
+    def import_attributes(self, entries):
+        with self.phase("attributes") as stats:
+            specs = {}
+            for entry in entries:
+                for spec in entry["attributes"]:
+                    specs.setdefault(spec["name"].lower(), spec)
+                for variant in entry["variants"]:
+                    for name in variant["attribute_values"]:
+                        specs.setdefault(
+                            name.lower(),
+                            normalize_attribute(name),
+                        )
+            existing = {
+                name.lower(): pk
+                for pk, name in Attribute.objects.values_list("pk", "name")
+            }
+            new_attributes = [
+                Attribute(name=spec["name"], group=spec["group"])
+                for key, spec in specs.items()
+                if key not in existing
+            ]
+            Attribute.objects.bulk_create(new_attributes)
+            existing.update(
+                {attribute.name.lower(): attribute.pk for attribute in new_attributes},
+            )
+            stats.created += len(new_attributes)
+            stats.unchanged += len(specs) - len(new_attributes)
+            return existing
+
+    def import_attribute_values(self, entries, attributes):
+        with self.phase("attribute_values") as stats:
+            wanted = {}
+            for entry in entries:
+                for variant in entry["variants"]:
+                    for name, value in variant["attribute_values"].items():
+                        attribute_id = attributes[name.lower()]
+                        wanted.setdefault((attribute_id, value.lower()), value)
+            existing = {
+                (attribute_id, value.lower()): pk
+                for pk, attribute_id, value in AttributeValue.objects.filter(
+                    attribute_id__in={attribute_id for attribute_id, _ in wanted},
+                ).values_list("pk", "attribute_id", "value")
+            }
+            new_values = [
+                AttributeValue(attribute_id=key[0], value=value)
+                for key, value in wanted.items()
+                if key not in existing
+            ]
+            AttributeValue.objects.bulk_create(new_values)
+            existing.update(
+                {
+                    (value.attribute_id, value.value.lower()): value.pk
+                    for value in new_values
+                },
+            )
+            stats.created += len(new_values)
+            stats.unchanged += len(wanted) - len(new_values)
+            return existing
+
+    def import_products(self, entries, categories):
+        with self.phase("products") as stats:
+            existing = {
+                row["slug"]: row
+                for row in Product.objects.filter(
+                    slug__in=[entry["slug"] for entry in entries],
+                ).values("pk", "slug", *PRODUCT_FIELDS)
+            }
+            new_products = []
+            changed_products = []
+            for entry in entries:
+                fields = {
+                    "category_id": categories[entry["category"].lower()],
+                    "name": entry["name"],
+                    "short_description": entry["short_description"],
+                    "full_description": entry["full_description"],
+                    "is_active": entry["is_active"],
+                }
+                row = existing.get(entry["slug"])
+                if row is None:
+                    new_products.append(Product(slug=entry["slug"], **fields))
+                elif any(row[field] != value for field, value in fields.items()):
+                    changed_products.append(
+                        Product(pk=row["pk"], slug=entry["slug"], **fields),
+                    )
+            now = timezone.now()
+            for product in changed_products:
+                product.modified = now
+            Product.objects.bulk_update(
+                changed_products,
+                [*PRODUCT_FIELDS, "modified"],
+                batch_size=self.chunk_size,
+            )
+            products = {slug: row["pk"] for slug, row in existing.items()}
+            if new_products:
+                Product.objects.bulk_create(
+                    new_products,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=["slug"],
+                    update_fields=[*PRODUCT_FIELDS, "modified"],
+                )
+                # Re-read the keys: a concurrent insert may have won the slug.
+                products.update(
+                    Product.objects.filter(
+                        slug__in=[product.slug for product in new_products],
+                    ).values_list("slug", "pk"),
+                )
+            stats.created += len(new_products)
+            stats.updated += len(changed_products)
+            stats.unchanged += len(existing) - len(changed_products)
+            changed = {products[product.slug] for product in new_products}
+            changed.update(product.pk for product in changed_products)
+            return products, changed
+
+    def import_product_attributes(self, entries, products, attributes):
+        with self.phase("product_attributes") as stats:
+            through = Product.attributes.through
+            wanted = set()
+            for entry in entries:
+                product_id = products[entry["slug"]]
+                names = {spec["name"] for spec in entry["attributes"]}
+                for variant in entry["variants"]:
+                    names.update(variant["attribute_values"])
+                wanted.update((product_id, attributes[name.lower()]) for name in names)
+            existing = set(
+                through.objects.filter(
+                    product_id__in=products.values(),
+                ).values_list("product_id", "attribute_id"),
+            )
+            new_links = [
+                through(product_id=product_id, attribute_id=attribute_id)
+                for product_id, attribute_id in wanted - existing
+            ]
+            through.objects.bulk_create(
+                new_links,
+                batch_size=self.chunk_size,
+                ignore_conflicts=True,
+            )
+            stats.created += len(new_links)
+            stats.unchanged += len(wanted & existing)
+            return {link.product_id for link in new_links}
+
+    def import_variants(self, entries, products):
+        with self.phase("variants") as stats:
+            wanted = {}
+            for entry in entries:
+                for variant in entry["variants"]:
+                    wanted[variant["sku"]] = {
+                        "product_id": products[entry["slug"]],
+                        "price": variant["price"],
+                        "stock_quantity": variant["stock_quantity"],
+                        "sort_order": variant["sort_order"],
+                        "is_active": variant["is_active"],
+                    }
+            existing = {
+                row["sku"]: row
+                for row in ProductVariant.objects.filter(sku__in=wanted).values(
+                    "pk",
+                    "sku",
+                    *VARIANT_FIELDS,
+                )
+            }
+            new_variants = []
+            changed_variants = []
+            for sku, fields in wanted.items():
+                row = existing.get(sku)
+                if row is None:
+                    new_variants.append(ProductVariant(sku=sku, **fields))
+                    continue
+                if fields["sort_order"] is None:
+                    fields["sort_order"] = row["sort_order"]
+                if any(row[field] != value for field, value in fields.items()):
+                    changed_variants.append(
+                        ProductVariant(pk=row["pk"], sku=sku, **fields),
+                    )
+            now = timezone.now()
+            for variant in changed_variants:
+                variant.modified = now
+            ProductVariant.objects.bulk_update(
+                changed_variants,
+                [*VARIANT_FIELDS, "modified"],
+                batch_size=self.chunk_size,
+            )
+            variants = {sku: row["pk"] for sku, row in existing.items()}
+            if new_variants:
+                ProductVariant.objects.bulk_create(
+                    new_variants,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=["sku"],
+                    update_fields=[*VARIANT_FIELDS, "modified"],
+                )
+                variants.update(
+                    ProductVariant.objects.filter(
+                        sku__in=[variant.sku for variant in new_variants],
+                    ).values_list("sku", "pk"),
+                )
+            stats.created += len(new_variants)
+            stats.updated += len(changed_variants)
+            stats.unchanged += len(existing) - len(changed_variants)
+            return variants
+
+    def import_variant_attribute_values(self, entries, variants, attributes, values):
+        with self.phase("variant_attribute_values") as stats:
+            wanted = {}
+            variant_ids = set()
+            for entry in entries:
+                for variant in entry["variants"]:
+                    variant_id = variants[variant["sku"]]
+                    variant_ids.add(variant_id)
+                    for name, value in variant["attribute_values"].items():
+                        attribute_id = attributes[name.lower()]
+                        wanted[variant_id, attribute_id] = values[
+                            attribute_id,
+                            value.lower(),
+                        ]
+            existing = {
+                (variant_id, attribute_id): (pk, value_id)
+                for pk, variant_id, attribute_id, value_id in (
+                    ProductVariantAttributeValue.objects.filter(
+                        product_variant_id__in=variant_ids,
+                    ).values_list(
+                        "pk",
+                        "product_variant_id",
+                        "attribute_id",
+                        "attribute_value_id",
+                    )
+                )
+            }
+            new_links = []
+            changed_links = []
+            changed_variants = set()
+            for key, value_id in wanted.items():
+                link = existing.get(key)
+                if link is None:
+                    new_links.append((key[0], value_id))
+                    changed_variants.add(key[0])
+                elif link[1] != value_id:
+                    changed_links.append(
+                        ProductVariantAttributeValue(
+                            pk=link[0],
+                            attribute_value_id=value_id,
+                        ),
+                    )
+                    changed_variants.add(key[0])
+            ProductVariantAttributeValue.objects.bulk_update(
+                changed_links,
+                ["attribute_value"],
+                batch_size=self.chunk_size,
+            )
+            if new_links:
+                ProductVariantAttributeValue.objects.bulk_link(
+                    new_links,
+                    batch_size=self.chunk_size,
+                )
+            stats.created += len(new_links)
+            stats.updated += len(changed_links)
+            stats.unchanged += len(wanted) - len(new_links) - len(changed_links)
+            if not changed_variants:
+                return set()
+            return set(
+                ProductVariant.objects.filter(pk__in=changed_variants).values_list(
+                    "product_id",
+                    flat=True,
+                ),
+            )
@@ -1,16 +1,8 @@
 # ruff: noqa: E501
-from decimal import Decimal
-
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from slugify import slugify
 
-from apps.products.models import Attribute
-from apps.products.models import AttributeValue
-from apps.products.models import Category
-from apps.products.models import Product
-from apps.products.models import ProductVariant
-from apps.products.models import ProductVariantAttributeValue
+from apps.products.importers import CatalogImporter
+from apps.products.importers import normalize_product
 
 data = [
     {
@@ -1296,154 +1288,9 @@ data.extend(dummy_data)
 class Command(BaseCommand):
     help = "Create or update products and their variants in the database."
 
-    @transaction.atomic
-    def handle(self, *args, **kwargs):  # noqa: C901, PLR0912
-        for entry in data:
-            category_name = entry.pop("category_name")
-            variants_data = entry.pop("variants", [])
-            product_attribute_spec = entry.pop("attributes", None)
-
-            # 1. Get or create Category
-            category_obj, category_created = Category.objects.get_or_create(
-                name=category_name,
-                defaults={"slug": slugify(category_name)},
-            )
-            if category_created:
-                self.stdout.write(
-                    self.style.SUCCESS(f"Created category: {category_obj}"),
-                )
-
-            # 2. Create or update Product
-            product_lookup = {"slug": entry["slug"]}
-            product_defaults = {
-                "category": category_obj,
-                "name": entry["name"],
-                "short_description": entry.get("short_description", "") or "",
-                "full_description": entry.get("full_description", "") or "",
-                "is_active": bool(entry.get("is_active", True)),
-            }
-            product_obj, product_created = Product.objects.update_or_create(
-                defaults=product_defaults,
-                **product_lookup,
-            )
-            self.stdout.write(
-                self.style.SUCCESS(f"Created product: {product_obj}")
-                if product_created
-                else self.style.WARNING(f"Updated product: {product_obj}"),
-            )
-
-            attribute_obj = None
-            if isinstance(product_attribute_spec, dict) and product_attribute_spec.get(
-                "name",
-            ):
-                attr_name = product_attribute_spec["name"]
-                attr_type = product_attribute_spec.get("group") or "OTHER"
-
-                attribute_obj, attribute_created = Attribute.objects.get_or_create(
-                    name=attr_name,
-                    defaults={"group": attr_type},
-                )
-                if attribute_created:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  + Created attribute: {attr_name} ({attr_type})",
-                        ),
-                    )
-                product_obj.attributes.add(attribute_obj)
-
-            # 3) Variants
-            for variant_entry in variants_data:
-                variant_attr_map = (
-                    variant_entry.pop("attribute_values", None)
-                    or variant_entry.pop("attributes", None)
-                    or {}
-                )
-                variant_lookup = {"sku": variant_entry["sku"]}
-                variant_defaults = {
-                    k: v for k, v in variant_entry.items() if k not in variant_lookup
-                }
-
-                if (
-                    "price" in variant_defaults
-                    and variant_defaults["price"] is not None
-                ):
-                    variant_defaults["price"] = Decimal(
-                        str(variant_defaults["price"]),
-                    )
-
-                variant_defaults["product"] = product_obj
-
-                variant_obj, variant_created = ProductVariant.objects.update_or_create(
-                    **variant_lookup,
-                    defaults=variant_defaults,
-                )
-                self.stdout.write(
-                    self.style.SUCCESS(f"  - Created variant: {variant_obj}")
-                    if variant_created
-                    else self.style.WARNING(f"  - Updated variant: {variant_obj}"),
-                )
-
-                for attr_name, attr_value in (variant_attr_map or {}).items():
-                    if attribute_obj is not None and attribute_obj.name == attr_name:
-                        variant_attribute_obj = attribute_obj
-                    else:
-                        variant_attribute_obj, attribute_created = (
-                            Attribute.objects.get_or_create(
-                                name=attr_name,
-                                defaults={"group": "OTHER"},
-                            )
-                        )
-                        if attribute_created:
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f"    + Created attribute: {attr_name} (OTHER)",
-                                ),
-                            )
-                        product_obj.attributes.add(variant_attribute_obj)
-
-                    attribute_value_obj, attribute_value_created = (
-                        AttributeValue.objects.get_or_create(
-                            attribute=variant_attribute_obj,
-                            value=attr_value,
-                        )
-                    )
-                    if attribute_value_created:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                (
-                                    f"    + Created attribute value: {attr_value} "
-                                    f"for attribute: {attr_name}"
-                                ),
-                            ),
-                        )
-
-                    link = ProductVariantAttributeValue.objects.filter(
-                        product_variant=variant_obj,
-                        attribute=variant_attribute_obj,
-                    ).first()
-
-                    if link is None:
-                        ProductVariantAttributeValue.objects.create(
-                            product_variant=variant_obj,
-                            attribute_value=attribute_value_obj,
-                        )
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                (
-                                    f"    + Linked {attr_name}: {attr_value} "
-                                    f"to variant {variant_obj.sku}"
-                                ),
-                            ),
-                        )
-                    elif link.attribute_value_id != attribute_value_obj.id:
-                        link.attribute_value = attribute_value_obj
-                        link.save()
-                        self.stdout.write(
-                            self.style.WARNING(
-                                (
-                                    f"    ~ Updated {attr_name} on "
-                                    f"{variant_obj.sku} -> "
-                                    f"{attr_value}"
-                                ),
-                            ),
-                        )
+    def handle(self, *args, **kwargs):
+        importer = CatalogImporter()
+        importer.run(normalize_product(entry) for entry in data)
+        for line in importer.get_report():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS("Products created or updated."))
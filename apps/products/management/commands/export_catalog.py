@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.products.exporters import EXPORT_FORMATS
+from apps.products.exporters import export_catalog
+
+
+class Command(BaseCommand):
+    help = "Stream the catalog to a CSV, JSONL or columnar JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default="-",
+            help="Output path. Defaults to stdout.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default="csv",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of variants read and written per chunk.",
+        )
+
+    def handle(self, *args, **options):
+        pieces = export_catalog(options["format"], chunk_size=options["chunk_size"])
+        path = options["path"]
+        if path == "-":
+            for piece in pieces:
+                self.stdout.write(piece, ending="")
+            return
+        try:
+            with Path(path).open("w", encoding="utf-8", newline="") as stream:
+                for piece in pieces:
+                    stream.write(piece)
+        except OSError as exc:
+            raise CommandError(exc) from exc
+        self.stdout.write(self.style.SUCCESS(f"Catalog exported to {path}."))
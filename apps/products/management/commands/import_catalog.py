@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+
+from apps.products.importers import CATALOG_FORMATS
+from apps.products.importers import CatalogImporter
+from apps.products.importers import read_catalog
+
+
+class Command(BaseCommand):
+    help = "Import categories, products and variants from a CSV, JSON or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Path of the catalog file, or '-' to read from stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=CATALOG_FORMATS,
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of products diffed and written per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or Path(path).suffix.lstrip(".").lower()
+        if file_format not in CATALOG_FORMATS:
+            msg = "Could not infer the catalog format, pass --format."
+            raise CommandError(msg)
+        importer = CatalogImporter(chunk_size=options["chunk_size"])
+        try:
+            if path == "-":
+                importer.run(read_catalog(sys.stdin, file_format))
+            else:
+                with Path(path).open(encoding="utf-8", newline="") as stream:
+                    importer.run(read_catalog(stream, file_format))
+        except OSError as exc:
+            raise CommandError(exc) from exc
+        except (ValueError, ValidationError, IntegrityError) as exc:
+            msg = f"Import aborted: {exc}"
+            raise CommandError(msg) from exc
+        for line in importer.get_report():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS("Catalog import finished."))
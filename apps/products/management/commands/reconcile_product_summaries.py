@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.models import Product
+
+SUMMARY_FIELDS = ["min_price", "max_price", "total_stock", "active_variant_count"]
+
+
+class Command(BaseCommand):
+    help = "Recompute drifted product price and stock summaries in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products checked per batch.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        checked = reconciled = 0
+        last_pk = None
+        while True:
+            qs = Product.objects.order_by("pk").only("pk", *SUMMARY_FIELDS)
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            batch = list(qs.with_computed_variants_summary()[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            drifted = [product for product in batch if self.reconcile(product)]
+            Product.objects.bulk_update(drifted, SUMMARY_FIELDS)
+            checked += len(batch)
+            reconciled += len(drifted)
+            if drifted:
+                self.stdout.write(
+                    self.style.WARNING(f"Reconciled {len(drifted)} products"),
+                )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} products, reconciled {reconciled}.",
+            ),
+        )
+
+    def reconcile(self, product):
+        drifted = False
+        for field in SUMMARY_FIELDS:
+            computed = getattr(product, f"computed_{field}")
+            if getattr(product, field) != computed:
+                setattr(product, field, computed)
+                drifted = True
+        return drifted
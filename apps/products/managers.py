@@ -1,11 +1,40 @@
 from django.apps import apps
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connections
 from django.db import models
+from django.db import transaction
 from django.db.models import Count
 from django.db.models import Max
 from django.db.models import Min
+from django.db.models import OuterRef
 from django.db.models import Prefetch
 from django.db.models import Q
+from django.db.models import Subquery
 from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from apps.core.managers import OrderedQuerySet
+
+from .utils import SEARCH_CONFIG
+from .utils import invalidate_catalog_cache
+from .utils import invalidate_product_stock
+from .utils import invalidate_variant_matrices
+
+VARIANT_SUMMARY_FIELDS = {
+    "product",
+    "product_id",
+    "price",
+    "is_active",
+}
+VARIANT_SEARCH_FIELDS = {
+    "product",
+    "product_id",
+    "sku",
+}
+VARIANT_STOCK_FIELDS = {
+    "stock_quantity",
+}
 
 
 class ActiveQuerySet(models.QuerySet):
@@ -59,7 +88,7 @@ class AttributeManager(models.Manager.from_queryset(AttributeQuerySet)):
     pass
 
 
-class AttributeValueQuerySet(models.QuerySet):
+class AttributeValueQuerySet(OrderedQuerySet):
     def with_attribute(self):
         return self.select_related("attribute")
 
@@ -94,31 +123,182 @@ class ProductQuerySet(ActiveQuerySet):
             ),
         )
 
-    def with_variants_summary(self):
+    def with_computed_variants_summary(self):
         return self.annotate(
-            min_price=Min(
+            computed_min_price=Min(
                 "variants__price",
                 filter=Q(variants__is_active=True),
             ),
-            max_price=Max(
+            computed_max_price=Max(
                 "variants__price",
                 filter=Q(variants__is_active=True),
             ),
-            total_stock=Sum(
-                "variants__stock_quantity",
+            computed_total_stock=Coalesce(
+                Sum(
+                    "variants__stock_quantity",
+                    filter=Q(variants__is_active=True),
+                ),
+                0,
+            ),
+            computed_active_variant_count=Count(
+                "variants",
                 filter=Q(variants__is_active=True),
             ),
         )
 
+    def refresh_variants_summary(self):
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        variants = (
+            ProductVariant.objects.active()
+            .filter(product=OuterRef("pk"))
+            .order_by()
+            .values("product")
+        )
+        return self.update(
+            min_price=Subquery(
+                variants.annotate(value=Min("price")).values("value"),
+            ),
+            max_price=Subquery(
+                variants.annotate(value=Max("price")).values("value"),
+            ),
+            total_stock=Coalesce(
+                Subquery(
+                    variants.annotate(value=Sum("stock_quantity")).values("value"),
+                ),
+                0,
+            ),
+            active_variant_count=Coalesce(
+                Subquery(variants.annotate(value=Count("pk")).values("value")),
+                0,
+            ),
+        )
+
+    def refresh_stock_summary(self):
+        """
+        Recompute ``total_stock`` only, for writes that changed nothing but stock.
+        """
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        stock = (
+            ProductVariant.objects.active()
+            .filter(product=OuterRef("pk"))
+            .order_by()
+            .values("product")
+            .annotate(value=Sum("stock_quantity"))
+            .values("value")
+        )
+        return self.update(total_stock=Coalesce(Subquery(stock), 0))
+
+    def refresh_search_vector(self):
+        """
+        Recompute ``search_vector`` from the product, category and SKU texts.
+
+        Only PostgreSQL stores the vector; other databases use the in-process
+        index from ``apps.products.search`` and this is a no-op there.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return 0
+        Category = apps.get_model("products", "Category")
+        ProductVariant = apps.get_model("products", "ProductVariant")
+        category_name = Category.objects.filter(pk=OuterRef("category_id")).values(
+            "name",
+        )
+        skus = (
+            ProductVariant.objects.filter(product=OuterRef("pk"))
+            .order_by()
+            .values("product")
+            .annotate(value=StringAgg("sku", delimiter=" "))
+            .values("value")
+        )
+        return self.update(
+            search_vector=(
+                SearchVector("name", weight="A", config=SEARCH_CONFIG)
+                + SearchVector(Subquery(skus), weight="A", config=SEARCH_CONFIG)
+                + SearchVector(
+                    Subquery(category_name),
+                    weight="B",
+                    config=SEARCH_CONFIG,
+                )
+                + SearchVector("short_description", weight="C", config=SEARCH_CONFIG)
+                + SearchVector("full_description", weight="D", config=SEARCH_CONFIG)
+            ),
+        )
+
 
 class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
     pass
 
 
-class ProductVariantQuerySet(ActiveQuerySet):
+class ProductVariantQuerySet(OrderedQuerySet, ActiveQuerySet):
     def with_product(self):
         return self.select_related("product")
 
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._refresh_products_summary({obj.product_id for obj in objs})
+        return objs
+
+    def update(self, **kwargs):
+        fields = set(kwargs)
+        if fields.isdisjoint(VARIANT_SUMMARY_FIELDS | VARIANT_SEARCH_FIELDS):
+            if fields.isdisjoint(VARIANT_STOCK_FIELDS):
+                return super().update(**kwargs)
+            return self.update_stock(**kwargs)
+        with transaction.atomic(using=self.db):
+            variants = dict(self.values_list("pk", "product_id"))
+            rows = super().update(**kwargs)
+            product_ids = set(variants.values())
+            if "product" in kwargs or "product_id" in kwargs:
+                product_ids.update(
+                    self.model._base_manager.using(self.db)  # noqa: SLF001
+                    .filter(pk__in=variants)
+                    .values_list("product_id", flat=True),
+                )
+            self._refresh_products_summary(
+                product_ids,
+                search=not fields.isdisjoint(VARIANT_SEARCH_FIELDS),
+            )
+        return rows
+
+    def update_stock(self, **kwargs):
+        """
+        Update stock without touching what does not depend on it.
+
+        Stock moves on every checkout, so only the products' ``total_stock``,
+        variant matrices and stock cache entries are refreshed. The search
+        vector and the catalog-wide cache version are left alone.
+        """
+        with transaction.atomic(using=self.db):
+            product_ids = set(self.values_list("product_id", flat=True))
+            rows = super().update(**kwargs)
+            if product_ids:
+                Product = apps.get_model("products", "Product")
+                Product.objects.using(self.db).filter(
+                    pk__in=product_ids,
+                ).refresh_stock_summary()
+                invalidate_variant_matrices(product_ids)
+                invalidate_product_stock(product_ids)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            product_ids = set(self.values_list("product_id", flat=True))
+            result = super().delete()
+            self._refresh_products_summary(product_ids)
+        return result
+
+    def _refresh_products_summary(self, product_ids, *, search=True):
+        if not product_ids:
+            return
+        Product = apps.get_model("products", "Product")
+        products = Product.objects.using(self.db).filter(pk__in=product_ids)
+        products.refresh_variants_summary()
+        if search:
+            products.refresh_search_vector()
+        invalidate_catalog_cache()
+        invalidate_variant_matrices(product_ids)
+        invalidate_product_stock(product_ids)
+
 
 class ProductVariantManager(models.Manager.from_queryset(ProductVariantQuerySet)):
     pass
@@ -138,8 +318,34 @@ class ProductVariantAttributeValueManager(
     def get_queryset(self):
         return super().get_queryset().with_product_variant().with_attribute_value()
 
-
-class ProductImageQuerySet(ActiveQuerySet):
+    def bulk_link(self, variant_attr_pairs, batch_size=1000):
+        """
+        Link ``(variant, attribute_value)`` pairs, given as instances or pks.
+
+        Pairs are validated as a set instead of through ``full_clean()`` per row.
+        Pairs that are already linked are skipped, so re-running is a no-op.
+        """
+        links = [
+            self.model(
+                product_variant_id=getattr(variant, "pk", variant),
+                attribute_value_id=getattr(attribute_value, "pk", attribute_value),
+            )
+            for variant, attribute_value in variant_attr_pairs
+        ]
+        links = self.model.validate_links(links, batch_size=batch_size)
+        links = self.bulk_create(links, batch_size=batch_size)
+        invalidate_catalog_cache()
+        if links:
+            ProductVariant = apps.get_model("products", "ProductVariant")
+            invalidate_variant_matrices(
+                ProductVariant.objects.filter(
+                    pk__in={link.product_variant_id for link in links},
+                ).values_list("product_id", flat=True),
+            )
+        return links
+
+
+class ProductImageQuerySet(OrderedQuerySet, ActiveQuerySet):
     def with_product(self):
         return self.select_related("product")
 
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from .models import AttributeValue
+from .models import ProductImage
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+from .utils import VARIANT_MATRIX_TIMEOUT
+from .utils import get_variant_matrix_key
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixAxis:
+    attribute_id: int
+    name: str
+    group: str
+    values: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixImage:
+    id: int
+    url: str
+    alt_text: str
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixVariant:
+    id: UUID
+    sku: str
+    price: Decimal
+    stock_quantity: int
+    value_ids: tuple
+    image_ids: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class VariantMatrix:
+    """
+    Everything a product page needs to switch between active variants.
+
+    ``axes`` are the attributes the active variants vary on, with their values
+    in display order. ``combinations`` maps one value id per axis (``None``
+    where a variant has no value for it) to the variant.
+    """
+
+    product_id: UUID
+    axes: tuple
+    combinations: dict
+    images: dict
+    product_image_ids: tuple
+
+    @classmethod
+    def build(cls, product_id):
+        variants = list(
+            ProductVariant.objects.active()
+            .filter(product_id=product_id)
+            .order_by("sort_order", "sku")
+            .values_list("pk", "sku", "price", "stock_quantity"),
+        )
+        variant_ids = [row[0] for row in variants]
+        variant_values = defaultdict(dict)
+        value_ids = set()
+        for (
+            variant_id,
+            attribute_id,
+            value_id,
+        ) in ProductVariantAttributeValue.objects.filter(
+            product_variant_id__in=variant_ids,
+        ).values_list("product_variant_id", "attribute_id", "attribute_value_id"):
+            variant_values[variant_id][attribute_id] = value_id
+            value_ids.add(value_id)
+        axes = {}
+        for attribute_id, name, group, value_id, value in (
+            AttributeValue.objects.filter(pk__in=value_ids)
+            .order_by("attribute__group", "attribute__name", "sort_order", "value")
+            .values_list(
+                "attribute_id",
+                "attribute__name",
+                "attribute__group",
+                "pk",
+                "value",
+            )
+        ):
+            axis = axes.setdefault(attribute_id, (name, group, []))
+            axis[2].append((value_id, value))
+        variant_images = defaultdict(list)
+        product_image_ids = []
+        images = {}
+        for image_id, variant_id, name, alt_text in (
+            ProductImage.objects.active()
+            .filter(product_id=product_id)
+            .order_by("sort_order")
+            .values_list("pk", "variant_id", "image", "alt_text")
+        ):
+            images[image_id] = MatrixImage(
+                image_id,
+                default_storage.url(name),
+                alt_text,
+            )
+            if variant_id is None:
+                product_image_ids.append(image_id)
+            else:
+                variant_images[variant_id].append(image_id)
+        combinations = {}
+        for variant_id, sku, price, stock_quantity in variants:
+            key = tuple(
+                variant_values[variant_id].get(attribute_id) for attribute_id in axes
+            )
+            combinations.setdefault(
+                key,
+                MatrixVariant(
+                    id=variant_id,
+                    sku=sku,
+                    price=price,
+                    stock_quantity=stock_quantity,
+                    value_ids=key,
+                    image_ids=tuple(variant_images[variant_id]),
+                ),
+            )
+        return cls(
+            product_id=product_id,
+            axes=tuple(
+                MatrixAxis(attribute_id, name, group, tuple(values))
+                for attribute_id, (name, group, values) in axes.items()
+            ),
+            combinations=combinations,
+            images=images,
+            product_image_ids=tuple(product_image_ids),
+        )
+
+    @property
+    def variants(self):
+        return list(self.combinations.values())
+
+    def get_default_variant(self):
+        in_stock = [variant for variant in self.variants if variant.stock_quantity]
+        return (in_stock or self.variants or [None])[0]
+
+    def get_selection(self, value_ids):
+        """
+        Map the given value ids onto the axes, one value (or ``None``) per axis.
+        """
+        value_ids = set(value_ids)
+        return tuple(
+            next(
+                (value_id for value_id, _ in axis.values if value_id in value_ids),
+                None,
+            )
+            for axis in self.axes
+        )
+
+    def find_variant(self, value_ids):
+        return self.combinations.get(self.get_selection(value_ids))
+
+    def get_available_value_ids(self, selection):
+        """
+        Return the value ids that combine with the rest of ``selection``.
+
+        A value of one axis is available when some variant has it and agrees
+        with the selected values of every other axis.
+        """
+        available = set()
+        for key in self.combinations:
+            for index, value_id in enumerate(key):
+                if all(
+                    other is None or other == selected
+                    for position, (other, selected) in enumerate(
+                        zip(key, selection, strict=True),
+                    )
+                    if position != index and selected is not None
+                ):
+                    available.add(value_id)
+        available.discard(None)
+        return available
+
+    def get_images(self, variant=None):
+        image_ids = (variant.image_ids if variant else ()) + self.product_image_ids
+        return [self.images[image_id] for image_id in image_ids]
+
+
+def get_variant_matrix(product_id):
+    """
+    Return the product's matrix with a single cache read, building it on a miss.
+    """
+    key = get_variant_matrix_key(product_id)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = VariantMatrix.build(product_id)
+        cache.set(key, matrix, timeout=VARIANT_MATRIX_TIMEOUT)
+    return matrix
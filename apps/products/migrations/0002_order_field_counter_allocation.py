@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:56
+
+import apps.core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attributevalue',
+            name='sort_order',
+            field=apps.core.fields.OrderField(allocation='counter', blank=True, for_fields=['attribute'], null=True, verbose_name='Sort order'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='sort_order',
+            field=apps.core.fields.OrderField(allocation='counter', blank=True, for_fields=['product'], null=True, verbose_name='Sort order'),
+        ),
+        migrations.AlterField(
+            model_name='productvariant',
+            name='sort_order',
+            field=apps.core.fields.OrderField(allocation='counter', blank=True, for_fields=['product'], null=True, verbose_name='Sort order'),
+        ),
+    ]
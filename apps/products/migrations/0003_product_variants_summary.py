@@ -0,0 +1,66 @@
+# Generated by Django 5.2.10 on 2026-10-18 14:59
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_variants_summary(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductVariant = apps.get_model('products', 'ProductVariant')
+    variants = (
+        ProductVariant.objects.filter(product=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('product')
+    )
+    Product.objects.update(
+        min_price=Subquery(variants.annotate(value=Min('price')).values('value')),
+        max_price=Subquery(variants.annotate(value=Max('price')).values('value')),
+        total_stock=Coalesce(
+            Subquery(variants.annotate(value=Sum('stock_quantity')).values('value')),
+            0,
+        ),
+        active_variant_count=Coalesce(
+            Subquery(variants.annotate(value=Count('pk')).values('value')),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_order_field_counter_allocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='active_variant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Active variants'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Maximum price'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True, verbose_name='Minimum price'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='total_stock',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total stock'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'min_price'], name='products_pr_is_acti_11da28_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'max_price'], name='products_pr_is_acti_b5f8ee_idx'),
+        ),
+        migrations.RunPython(fill_variants_summary, migrations.RunPython.noop),
+    ]
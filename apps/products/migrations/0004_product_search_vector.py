@@ -0,0 +1,80 @@
+# Generated by Django 5.2.10 on 2026-10-18 15:06
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+CREATE_SEARCH_SQL = [
+    """
+    CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = pg_catalog.spanish)
+    """,
+    """
+    ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem
+    """,
+    """
+    CREATE FUNCTION products_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    """,
+    """
+    CREATE INDEX products_product_search_vector_gin
+        ON products_product USING gin (search_vector)
+    """,
+    """
+    CREATE INDEX products_product_name_trgm
+        ON products_product USING gin (products_unaccent(lower(name)) gin_trgm_ops)
+    """,
+    """
+    UPDATE products_product AS p SET search_vector =
+        setweight(to_tsvector('spanish_unaccent', coalesce(p.name, '')), 'A')
+        || setweight(to_tsvector('spanish_unaccent', coalesce((
+            SELECT string_agg(v.sku, ' ') FROM products_productvariant AS v
+            WHERE v.product_id = p.id
+        ), '')), 'A')
+        || setweight(to_tsvector('spanish_unaccent', coalesce((
+            SELECT c.name FROM products_category AS c WHERE c.id = p.category_id
+        ), '')), 'B')
+        || setweight(to_tsvector('spanish_unaccent', coalesce(p.short_description, '')), 'C')
+        || setweight(to_tsvector('spanish_unaccent', coalesce(p.full_description, '')), 'D')
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS products_product_name_trgm",
+    "DROP INDEX IF EXISTS products_product_search_vector_gin",
+    "DROP FUNCTION IF EXISTS products_unaccent(text)",
+    "DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in CREATE_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_SEARCH_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_variants_summary'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Search vector'),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
@@ -1,5 +1,6 @@
 from decimal import Decimal
 
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.core.validators import MinValueValidator
@@ -12,9 +13,12 @@ from model_utils.models import UUIDModel
 
 from apps.core.fields import OrderField
 from apps.core.utils import get_default_image_url
+from apps.core.utils import values_list_in_batches
 from apps.core.validators import FileSizeValidator
 
 from .choices import AttributeGroup
+from .managers import VARIANT_STOCK_FIELDS
+from .managers import VARIANT_SUMMARY_FIELDS
 from .managers import AttributeManager
 from .managers import AttributeValueManager
 from .managers import CategoryManager
@@ -22,6 +26,8 @@ from .managers import ProductImageManager
 from .managers import ProductManager
 from .managers import ProductVariantAttributeValueManager
 from .managers import ProductVariantManager
+from .utils import invalidate_product_stock
+from .utils import invalidate_variant_matrices
 from .utils import product_image_upload_to
 
 
@@ -132,6 +138,7 @@ class AttributeValue(TimeStampedModel):
     sort_order = OrderField(
         verbose_name=_("Sort order"),
         for_fields=["attribute"],
+        allocation=OrderField.COUNTER,
         blank=True,
         null=True,
     )
@@ -188,6 +195,37 @@ class Product(UUIDModel, TimeStampedModel):
         verbose_name=_("Active"),
         default=True,
     )
+    min_price = models.DecimalField(
+        verbose_name=_("Minimum price"),
+        max_digits=10,
+        decimal_places=2,
+        editable=False,
+        blank=True,
+        null=True,
+    )
+    max_price = models.DecimalField(
+        verbose_name=_("Maximum price"),
+        max_digits=10,
+        decimal_places=2,
+        editable=False,
+        blank=True,
+        null=True,
+    )
+    total_stock = models.PositiveIntegerField(
+        verbose_name=_("Total stock"),
+        editable=False,
+        default=0,
+    )
+    active_variant_count = models.PositiveIntegerField(
+        verbose_name=_("Active variants"),
+        editable=False,
+        default=0,
+    )
+    search_vector = SearchVectorField(
+        verbose_name=_("Search vector"),
+        editable=False,
+        null=True,
+    )
 
     objects = ProductManager()
 
@@ -198,6 +236,8 @@ class Product(UUIDModel, TimeStampedModel):
             models.Index(fields=["name"]),
             models.Index(fields=["is_active"]),
             models.Index(fields=["-created"]),
+            models.Index(fields=["is_active", "min_price"]),
+            models.Index(fields=["is_active", "max_price"]),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -247,6 +287,7 @@ class ProductVariant(UUIDModel, TimeStampedModel):
     sort_order = OrderField(
         verbose_name=_("Sort order"),
         for_fields=["product"],
+        allocation=OrderField.COUNTER,
         blank=True,
         null=True,
     )
@@ -268,6 +309,34 @@ class ProductVariant(UUIDModel, TimeStampedModel):
     def __str__(self):
         return f"{self.product.name} (SKU: {self.sku})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_product_id = instance.__dict__.get("product_id")  # noqa: SLF001
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        previous_product_id = getattr(self, "_loaded_product_id", None)
+        self._loaded_product_id = self.product_id
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or not (
+            VARIANT_SUMMARY_FIELDS | VARIANT_STOCK_FIELDS
+        ).isdisjoint(update_fields):
+            Product.objects.filter(
+                pk__in={self.product_id, previous_product_id} - {None},
+            ).refresh_variants_summary()
+        if previous_product_id not in {None, self.product_id}:
+            # The post_save handlers only see the product it moved to.
+            Product.objects.filter(pk=previous_product_id).refresh_search_vector()
+            invalidate_variant_matrices([previous_product_id])
+            invalidate_product_stock([previous_product_id])
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Product.objects.filter(pk=self.product_id).refresh_variants_summary()
+        return result
+
 
 class ProductVariantAttributeValue(models.Model):
     product_variant = models.ForeignKey(
@@ -359,6 +428,120 @@ class ProductVariantAttributeValue(models.Model):
                 },
             )
 
+    @classmethod
+    def validate_links(cls, links, batch_size=1000):
+        """
+        Validate unsaved links as a set and fill their ``attribute`` in memory.
+
+        Lookups are batched per ``batch_size`` ids instead of issued per link.
+        Links already stored with the same value are dropped, so the returned
+        list only holds the links that still need to be inserted.
+        """
+        variants, attributes, product_attributes, assigned = cls._get_link_lookups(
+            links,
+            batch_size,
+        )
+        errors = []
+        pending = []
+        for link in links:
+            variant = variants.get(link.product_variant_id)
+            attribute = attributes.get(link.attribute_value_id)
+            if variant is None or attribute is None:
+                errors.append(
+                    _(
+                        "The product variant '%(variant)s' or the attribute value "
+                        "'%(attribute_value)s' does not exist.",
+                    )
+                    % {
+                        "variant": link.product_variant_id,
+                        "attribute_value": link.attribute_value_id,
+                    },
+                )
+                continue
+            (product_id, product_name), (attribute_id, attribute_name) = (
+                variant,
+                attribute,
+            )
+            link.attribute_id = attribute_id
+            key = (link.product_variant_id, attribute_id)
+            if (product_id, attribute_id) not in product_attributes:
+                errors.append(
+                    _(
+                        "The attribute '%(attribute)s' is not associated "
+                        "with the product '%(product)s'.",
+                    )
+                    % {
+                        "attribute": attribute_name,
+                        "product": product_name,
+                    },
+                )
+            elif assigned.get(key, link.attribute_value_id) != link.attribute_value_id:
+                errors.append(
+                    _(
+                        "The attribute '%(attribute)s' is already assigned "
+                        "to this product variant.",
+                    )
+                    % {
+                        "attribute": attribute_name,
+                    },
+                )
+            elif key not in assigned:
+                assigned[key] = link.attribute_value_id
+                pending.append(link)
+        if errors:
+            raise ValidationError(errors)
+        return pending
+
+    @classmethod
+    def _get_link_lookups(cls, links, batch_size):
+        variants = {
+            pk: (product_id, product_name)
+            for pk, product_id, product_name in values_list_in_batches(
+                ProductVariant.objects.all(),
+                "pk",
+                {link.product_variant_id for link in links},
+                "pk",
+                "product_id",
+                "product__name",
+                batch_size=batch_size,
+            )
+        }
+        attributes = {
+            pk: (attribute_id, attribute_name)
+            for pk, attribute_id, attribute_name in values_list_in_batches(
+                AttributeValue.objects.all(),
+                "pk",
+                {link.attribute_value_id for link in links},
+                "pk",
+                "attribute_id",
+                "attribute__name",
+                batch_size=batch_size,
+            )
+        }
+        product_attributes = set(
+            values_list_in_batches(
+                Product.attributes.through.objects.all(),
+                "product_id",
+                {product_id for product_id, _ in variants.values()},
+                "product_id",
+                "attribute_id",
+                batch_size=batch_size,
+            ),
+        )
+        assigned = {
+            (variant_id, attribute_id): value_id
+            for variant_id, attribute_id, value_id in values_list_in_batches(
+                cls._base_manager.all(),
+                "product_variant_id",
+                variants.keys(),
+                "product_variant_id",
+                "attribute_id",
+                "attribute_value_id",
+                batch_size=batch_size,
+            )
+        }
+        return variants, attributes, product_attributes, assigned
+
 
 class ProductImage(TimeStampedModel):
     product = models.ForeignKey(
@@ -391,6 +574,7 @@ class ProductImage(TimeStampedModel):
     sort_order = OrderField(
         verbose_name=_("Sort order"),
         for_fields=["product"],
+        allocation=OrderField.COUNTER,
         blank=True,
         null=True,
     )
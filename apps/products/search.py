@@ -0,0 +1,300 @@
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import Q
+from django.db.models import TextField
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Lower
+
+from apps.core.cache import get_cache_version
+
+from .models import Product
+from .models import ProductVariant
+from .utils import CATALOG_CACHE_NAMESPACE
+from .utils import SEARCH_CONFIG
+
+SEARCH_INDEX_KEY = "products:search"
+SEARCH_INDEX_TIMEOUT = 60 * 60 * 24
+
+# Same defaults as PostgreSQL's ts_rank() and pg_trgm's similarity_threshold.
+SEARCH_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+TRIGRAM_THRESHOLD = 0.3
+
+TOKEN_RE = re.compile(r"\w+")
+
+SPANISH_STOPWORDS = frozenset(
+    [
+        "a",
+        "al",
+        "con",
+        "de",
+        "del",
+        "e",
+        "el",
+        "en",
+        "es",
+        "la",
+        "las",
+        "lo",
+        "los",
+        "o",
+        "para",
+        "por",
+        "que",
+        "se",
+        "sin",
+        "su",
+        "sus",
+        "un",
+        "una",
+        "uno",
+        "unos",
+        "unas",
+        "y",
+    ],
+)
+
+# Longest first, so the most specific suffix wins.
+SPANISH_SUFFIXES = (
+    "amientos",
+    "imientos",
+    "amiento",
+    "imiento",
+    "aciones",
+    "uciones",
+    "idades",
+    "adoras",
+    "adores",
+    "ancias",
+    "ismos",
+    "istas",
+    "ables",
+    "ibles",
+    "mente",
+    "acion",
+    "ucion",
+    "adora",
+    "ancia",
+    "ador",
+    "idad",
+    "ismo",
+    "ista",
+    "able",
+    "ible",
+    "es",
+    "os",
+    "as",
+    "s",
+    "a",
+    "o",
+    "e",
+)
+MIN_STEM_LENGTH = 3
+
+
+def fold(text):
+    """
+    Lowercase ``text`` and strip accents, so "Látex" and "latex" are equal.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+def stem(word):
+    """
+    Light Spanish stemmer: drop the longest known suffix, keeping a short stem.
+    """
+    if word.isdigit():
+        return word
+    for suffix in SPANISH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text):
+    return [
+        stem(token)
+        for token in TOKEN_RE.findall(fold(text or ""))
+        if token not in SPANISH_STOPWORDS
+    ]
+
+
+def get_trigrams(word):
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    In-process inverted index over the searchable product texts.
+
+    Terms are folded and stemmed, and each posting keeps the best field weight
+    a term has in a product. Query terms missing from the vocabulary fall back
+    to vocabulary terms with a similar set of trigrams.
+    """
+
+    def __init__(self, postings, trigrams):
+        self.postings = postings
+        self.trigrams = trigrams
+        self.product_count = len(
+            {product_id for postings in postings.values() for product_id in postings},
+        )
+
+    @classmethod
+    def build(cls):
+        postings = defaultdict(dict)
+
+        def add(product_id, text, weight):
+            for term in tokenize(text):
+                product_postings = postings[term]
+                product_postings[product_id] = max(
+                    product_postings.get(product_id, 0),
+                    SEARCH_WEIGHTS[weight],
+                )
+
+        products = Product.objects.values_list(
+            "pk",
+            "name",
+            "category__name",
+            "short_description",
+            "full_description",
+        )
+        for (
+            product_id,
+            name,
+            category_name,
+            short_description,
+            full_description,
+        ) in products:
+            add(product_id, name, "A")
+            add(product_id, category_name, "B")
+            add(product_id, short_description, "C")
+            add(product_id, full_description, "D")
+        for product_id, sku in ProductVariant.objects.values_list("product_id", "sku"):
+            add(product_id, sku, "A")
+        trigrams = defaultdict(set)
+        for term in postings:
+            for trigram in get_trigrams(term):
+                trigrams[trigram].add(term)
+        return cls(postings=dict(postings), trigrams=dict(trigrams))
+
+    def search(self, query):
+        """
+        Return ``(product_id, score)`` pairs matching every query term, best first.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for candidate, similarity in self.expand(term):
+                postings = self.postings[candidate]
+                idf = math.log(1 + self.product_count / len(postings))
+                for product_id, weight in postings.items():
+                    score = weight * similarity * idf
+                    if score > term_scores.get(product_id, 0):
+                        term_scores[product_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    product_id: score + term_scores[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in term_scores
+                }
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+
+    def expand(self, term):
+        if term in self.postings:
+            return [(term, 1.0)]
+        term_trigrams = get_trigrams(term)
+        candidates = set()
+        for trigram in term_trigrams:
+            candidates |= self.trigrams.get(trigram, set())
+        matches = []
+        for candidate in candidates:
+            candidate_trigrams = get_trigrams(candidate)
+            similarity = len(term_trigrams & candidate_trigrams) / len(
+                term_trigrams | candidate_trigrams,
+            )
+            if similarity >= TRIGRAM_THRESHOLD:
+                matches.append((candidate, similarity))
+        return matches
+
+
+class ImmutableUnaccent(Func):
+    """
+    ``products_unaccent()`` wrapper created by the search migration.
+    """
+
+    function = "products_unaccent"
+    output_field = TextField()
+
+
+def get_search_index():
+    version = get_cache_version(CATALOG_CACHE_NAMESPACE)
+    index = cache.get(SEARCH_INDEX_KEY, version=version)
+    if index is None:
+        index = SearchIndex.build()
+        cache.set(
+            SEARCH_INDEX_KEY,
+            index,
+            timeout=SEARCH_INDEX_TIMEOUT,
+            version=version,
+        )
+    return index
+
+
+def search_products(query, queryset=None):
+    """
+    Filter ``queryset`` to the products matching ``query``, best match first.
+
+    PostgreSQL matches against ``Product.search_vector`` and falls back to
+    trigram similarity on the name. Other databases use the cached in-process
+    ``SearchIndex``.
+    """
+    if queryset is None:
+        queryset = Product.objects.active()
+    if connections[queryset.db].vendor == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.annotate(search_name=ImmutableUnaccent(Lower("name")))
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), search_query)
+                + TrigramSimilarity("search_name", Value(fold(query))),
+            )
+            .filter(
+                Q(search_vector=search_query)
+                | Q(search_name__trigram_similar=fold(query)),
+            )
+            .order_by("-search_rank", "name")
+        )
+    matches = get_search_index().search(query)
+    if not matches:
+        return queryset.none()
+    product_ids = [product_id for product_id, _ in matches]
+    return queryset.filter(pk__in=product_ids).order_by(
+        Case(
+            *[
+                When(pk=product_id, then=position)
+                for position, product_id in enumerate(product_ids)
+            ],
+        ),
+    )
@@ -0,0 +1,77 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Attribute
+from .models import AttributeValue
+from .models import Category
+from .models import Product
+from .models import ProductImage
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+from .utils import invalidate_catalog_cache
+from .utils import invalidate_category_nav
+from .utils import invalidate_product_stock
+from .utils import invalidate_variant_matrices
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Attribute)
+@receiver([post_save, post_delete], sender=AttributeValue)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductVariantAttributeValue)
+def invalidate_catalog(sender, **kwargs):
+    invalidate_catalog_cache()
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.pk).refresh_search_vector()
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_search_vectors(sender, instance, **kwargs):
+    Product.objects.filter(category=instance).refresh_search_vector()
+
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+def refresh_variant_search_vector(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).refresh_search_vector()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_navigation(sender, **kwargs):
+    invalidate_category_nav()
+
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_product_variant_matrix(sender, instance, **kwargs):
+    invalidate_variant_matrices([instance.product_id])
+    if sender is ProductVariant:
+        invalidate_product_stock([instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=ProductVariantAttributeValue)
+def invalidate_link_variant_matrix(sender, instance, **kwargs):
+    invalidate_variant_matrices(
+        ProductVariant.objects.filter(pk=instance.product_variant_id).values_list(
+            "product_id",
+            flat=True,
+        ),
+    )
+
+
+@receiver(post_save, sender=Attribute)
+@receiver(post_save, sender=AttributeValue)
+def invalidate_attribute_variant_matrices(sender, instance, **kwargs):
+    lookup = (
+        "attribute_values__attribute" if sender is Attribute else "attribute_values"
+    )
+    invalidate_variant_matrices(
+        ProductVariant.objects.filter(**{lookup: instance}).values_list(
+            "product_id",
+            flat=True,
+        ),
+    )
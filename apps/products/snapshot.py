@@ -0,0 +1,226 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import AttributeValue
+from .models import Category
+from .models import Product
+from .models import ProductVariant
+from .models import ProductVariantAttributeValue
+from .utils import PRODUCT_STOCK_TIMEOUT
+from .utils import catalog_snapshot_cache
+from .utils import get_product_stock_key
+
+CATALOG_SNAPSHOT_KEY = "snapshot"
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryRecord:
+    id: UUID
+    name: str
+    slug: str
+    is_active: bool
+
+    def get_absolute_url(self):
+        return f"{reverse('products:product_list')}?category={self.slug}"
+
+
+@dataclass(frozen=True, slots=True)
+class AttributeValueRecord:
+    id: int
+    attribute_id: int
+    attribute_name: str
+    value: str
+
+
+@dataclass(frozen=True, slots=True)
+class ProductRecord:
+    id: UUID
+    category_id: UUID
+    name: str
+    slug: str
+    short_description: str
+    full_description: str
+    is_active: bool
+    min_price: Decimal | None
+    max_price: Decimal | None
+    variant_ids: tuple
+
+    def get_absolute_url(self):
+        return reverse("products:product_detail", kwargs={"slug": self.slug})
+
+
+@dataclass(frozen=True, slots=True)
+class VariantRecord:
+    id: UUID
+    product_id: UUID
+    sku: str
+    price: Decimal
+    is_active: bool
+    attribute_value_ids: tuple
+
+
+@dataclass(frozen=True, slots=True)
+class ProductStock:
+    product_id: UUID
+    total_stock: int
+    variants: dict
+
+
+class CatalogSnapshot:
+    """
+    Immutable, query-free view of the catalog.
+
+    Built from a handful of flat queries and indexed by primary key, slug, SKU
+    and category. A snapshot never changes after it is built; catalog writes
+    bump the catalog cache version and the next ``get_catalog_snapshot()``
+    call swaps in a newly built one. Stock is left out, since it changes with
+    every order; ``get_product_stock()`` serves it per product.
+    """
+
+    __slots__ = (
+        "attribute_values",
+        "categories",
+        "category_products",
+        "products",
+        "products_by_slug",
+        "variants",
+        "variants_by_sku",
+    )
+
+    def __init__(self, categories, attribute_values, products, variants):
+        self.categories = categories
+        self.attribute_values = attribute_values
+        self.products = products
+        self.variants = variants
+        self.products_by_slug = {product.slug: product for product in products.values()}
+        self.variants_by_sku = {variant.sku: variant for variant in variants.values()}
+        category_products = defaultdict(list)
+        for product in products.values():
+            category_products[product.category_id].append(product.id)
+        self.category_products = {
+            category_id: tuple(product_ids)
+            for category_id, product_ids in category_products.items()
+        }
+
+    @classmethod
+    def build(cls):
+        categories = {
+            row[0]: CategoryRecord(*row)
+            for row in Category.objects.values_list("pk", "name", "slug", "is_active")
+        }
+        attribute_values = {
+            row[0]: AttributeValueRecord(*row)
+            for row in AttributeValue.objects.values_list(
+                "pk",
+                "attribute_id",
+                "attribute__name",
+                "value",
+            )
+        }
+        variant_values = defaultdict(list)
+        for variant_id, value_id in ProductVariantAttributeValue.objects.order_by(
+            "attribute__name",
+        ).values_list("product_variant_id", "attribute_value_id"):
+            variant_values[variant_id].append(value_id)
+        variants = {}
+        product_variants = defaultdict(list)
+        for row in ProductVariant.objects.order_by("sort_order", "sku").values_list(
+            "pk",
+            "product_id",
+            "sku",
+            "price",
+            "is_active",
+        ):
+            variant = VariantRecord(*row, tuple(variant_values[row[0]]))
+            variants[variant.id] = variant
+            product_variants[variant.product_id].append(variant.id)
+        products = {
+            row[0]: ProductRecord(*row, tuple(product_variants[row[0]]))
+            for row in Product.objects.order_by("name").values_list(
+                "pk",
+                "category_id",
+                "name",
+                "slug",
+                "short_description",
+                "full_description",
+                "is_active",
+                "min_price",
+                "max_price",
+            )
+        }
+        return cls(categories, attribute_values, products, variants)
+
+    def get_product(self, product_id):
+        return self.products.get(product_id)
+
+    def get_product_by_slug(self, slug):
+        return self.products_by_slug.get(slug)
+
+    def get_variant(self, variant_id):
+        return self.variants.get(variant_id)
+
+    def get_variant_by_sku(self, sku):
+        return self.variants_by_sku.get(sku)
+
+    def get_category(self, category_id):
+        return self.categories.get(category_id)
+
+    def get_category_products(self, category_id, *, active=True):
+        products = (
+            self.products[product_id]
+            for product_id in self.category_products.get(category_id, ())
+        )
+        return [product for product in products if product.is_active or not active]
+
+    def get_product_variants(self, product_id, *, active=True):
+        product = self.products.get(product_id)
+        if product is None:
+            return []
+        variants = (self.variants[variant_id] for variant_id in product.variant_ids)
+        return [variant for variant in variants if variant.is_active or not active]
+
+    def get_variant_attribute_values(self, variant_id):
+        variant = self.variants.get(variant_id)
+        if variant is None:
+            return []
+        return [
+            self.attribute_values[value_id] for value_id in variant.attribute_value_ids
+        ]
+
+
+def get_catalog_snapshot():
+    """
+    Return the current snapshot, shared across workers through the cache.
+    """
+    return catalog_snapshot_cache.get_or_set(
+        CATALOG_SNAPSHOT_KEY,
+        CatalogSnapshot.build,
+    )
+
+
+def get_product_stock(product_id):
+    """
+    Return the stock of a product's variants, cached per product.
+    """
+    key = get_product_stock_key(product_id)
+    stock = cache.get(key)
+    if stock is None:
+        variants = dict(
+            ProductVariant.objects.filter(product_id=product_id).values_list(
+                "pk",
+                "stock_quantity",
+            ),
+        )
+        total_stock = (
+            Product.objects.filter(pk=product_id)
+            .values_list("total_stock", flat=True)
+            .first()
+        )
+        stock = ProductStock(product_id, total_stock or 0, variants)
+        cache.set(key, stock, timeout=PRODUCT_STOCK_TIMEOUT)
+    return stock
@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import Counter
+from apps.products.models import Product
+from apps.products.models import ProductVariant
+
+from .factories import ProductFactory
+from .factories import ProductVariantFactory
+
+VARIANT_COUNT = 1000
+
+
+def count_queries(context, table):
+    table = connection.ops.quote_name(table)
+    return sum(table in query["sql"] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSortOrderAllocationBenchmark:
+    def test_saving_variants_one_by_one_allocates_per_row(self):
+        product = ProductFactory()
+        variants = ProductVariantFactory.build_batch(VARIANT_COUNT, product=product)
+        with CaptureQueriesContext(connection) as context:
+            for variant in variants:
+                variant.save()
+        assert count_queries(context, Counter._meta.db_table) == VARIANT_COUNT  # noqa: SLF001
+        # Each save reserves a sort order, inserts the row and refreshes the
+        # product's summary columns.
+        assert count_queries(context, Product._meta.db_table) == VARIANT_COUNT  # noqa: SLF001
+        assert len(context.captured_queries) == 3 * VARIANT_COUNT
+        assert variants[-1].sort_order == VARIANT_COUNT - 1
+
+    def test_bulk_create_allocates_in_one_query(self):
+        product = ProductFactory()
+        variants = ProductVariantFactory.build_batch(VARIANT_COUNT, product=product)
+        with CaptureQueriesContext(connection) as context:
+            ProductVariant.objects.bulk_create(variants)
+        assert count_queries(context, Counter._meta.db_table) == 1  # noqa: SLF001
+        assert len(context.captured_queries) < VARIANT_COUNT / 50
+        sort_orders = sorted(variant.sort_order for variant in variants)
+        assert sort_orders == list(range(VARIANT_COUNT))
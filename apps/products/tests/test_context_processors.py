@@ -0,0 +1,51 @@
+import pytest
+from django.test import RequestFactory
+
+from apps.products.context_processors import categories_processor
+from apps.products.utils import category_nav_cache
+
+from .factories import CategoryFactory
+
+
+@pytest.fixture
+def category_nav():
+    category_nav_cache.clear()
+    category_nav_cache.reset_stats()
+    request = RequestFactory().get("/")
+    return lambda: list(categories_processor(request)["product_categories"])
+
+
+@pytest.mark.django_db
+class TestCategoriesProcessor:
+    def test_lists_active_categories(self, category_nav):
+        CategoryFactory(name="Sellos", slug="sellos")
+        CategoryFactory(name="Guantes", slug="guantes")
+        CategoryFactory(name="Hidden", slug="hidden", is_active=False)
+        assert [category["slug"] for category in category_nav()] == [
+            "guantes",
+            "sellos",
+        ]
+
+    def test_is_lazy(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            categories_processor(RequestFactory().get("/"))
+
+    def test_repeated_requests_skip_the_database(
+        self,
+        category_nav,
+        django_assert_num_queries,
+    ):
+        CategoryFactory()
+        category_nav()
+        with django_assert_num_queries(0):
+            category_nav()
+        assert category_nav_cache.get_stats()["local_hits"] == 1
+
+    def test_category_changes_invalidate_nav(self, category_nav):
+        category = CategoryFactory(name="Old")
+        category_nav()
+        category.name = "New"
+        category.save()
+        assert [item["name"] for item in category_nav()] == ["New"]
+        category.delete()
+        assert category_nav() == []
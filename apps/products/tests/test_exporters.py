@@ -0,0 +1,104 @@
+import io
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import resolve
+from django.urls import reverse
+
+from apps.products.exporters import export_catalog
+from apps.products.importers import CatalogImporter
+from apps.products.importers import read_catalog
+from apps.users.tests.factories import UserFactory
+
+from .test_importers import CATALOG
+from .test_importers import import_catalog
+
+
+def read_export(file_format, **kwargs):
+    return "".join(export_catalog(file_format, **kwargs))
+
+
+@pytest.mark.django_db
+class TestExportCatalog:
+    @pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+    def test_export_round_trips_through_importer(self, file_format):
+        import_catalog(CATALOG)
+        exported = read_export(file_format, chunk_size=1)
+        importer = CatalogImporter()
+        importer.run(read_catalog(io.StringIO(exported), file_format))
+        assert importer.stats["products"].unchanged == 1
+        assert importer.stats["variants"].unchanged == 2  # noqa: PLR2004
+        assert importer.stats["variant_attribute_values"].unchanged == 2  # noqa: PLR2004
+        assert all(
+            stats.created == stats.updated == 0 for stats in importer.stats.values()
+        )
+
+    def test_csv_has_one_row_per_variant(self):
+        import_catalog(CATALOG)
+        lines = read_export("csv").splitlines()
+        assert lines[0].endswith("attribute:SIZE:Talla")
+        assert len(lines) == 3  # noqa: PLR2004
+        assert lines[1].startswith("Guantes,guante-de-latex,")
+
+    def test_columnar_groups_rows_by_chunk(self):
+        import_catalog(CATALOG)
+        groups = [
+            json.loads(line)
+            for line in read_export("columnar", chunk_size=1).splitlines()
+        ]
+        assert [group["rows"] for group in groups] == [1, 1]
+        assert groups[0]["columns"]["sku"] == ["GL-S"]
+        assert groups[0]["columns"]["attribute:SIZE:Talla"] == ["S"]
+
+    def test_reads_attribute_values_once_per_chunk(self, django_assert_num_queries):
+        import_catalog(CATALOG)
+        with django_assert_num_queries(4):
+            read_export("csv", chunk_size=1)
+
+    def test_command_writes_file(self, tmp_path):
+        import_catalog(CATALOG)
+        path = tmp_path / "catalog.jsonl"
+        call_command(
+            "export_catalog",
+            str(path),
+            format="jsonl",
+            stdout=StringIO(),
+        )
+        assert json.loads(path.read_text())["slug"] == "guante-de-latex"
+
+
+@pytest.mark.django_db
+class TestCatalogExportView:
+    def test_staff_can_download_export(self, client):
+        import_catalog(CATALOG)
+        client.force_login(UserFactory(is_staff=True))
+        response = client.get(
+            reverse("products:catalog_export", kwargs={"file_format": "csv"}),
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        content = b"".join(response.streaming_content).decode()
+        assert "GL-S" in content
+
+    def test_non_staff_is_redirected(self, client):
+        client.force_login(UserFactory())
+        response = client.get(
+            reverse("products:catalog_export", kwargs={"file_format": "csv"}),
+        )
+        assert response.status_code == HTTPStatus.FOUND
+
+    def test_unknown_format_returns_404(self, client):
+        client.force_login(UserFactory(is_staff=True))
+        response = client.get(
+            reverse("products:catalog_export", kwargs={"file_format": "xml"}),
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @pytest.mark.parametrize("slug", ["export", "catalog"])
+    def test_does_not_shadow_product_urls(self, slug):
+        for name in ("product_detail", "product_variant_switch"):
+            url = reverse(f"products:{name}", kwargs={"slug": slug})
+            assert resolve(url).url_name == name
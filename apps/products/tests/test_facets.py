@@ -0,0 +1,159 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from apps.products.facets import FacetIndex
+from apps.products.facets import get_facet_index
+from apps.products.facets import iter_bits
+
+from .factories import AttributeFactory
+from .factories import AttributeValueFactory
+from .factories import CategoryFactory
+from .factories import ProductFactory
+from .factories import ProductVariantFactory
+
+
+def test_iter_bits_yields_set_positions():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b1010_0000_0001)) == [0, 9, 11]
+
+
+@pytest.fixture
+def catalog():
+    category = CategoryFactory()
+    color = AttributeFactory(name="Color")
+    size = AttributeFactory(name="Size")
+    red = AttributeValueFactory(attribute=color, value="Red")
+    blue = AttributeValueFactory(attribute=color, value="Blue")
+    small = AttributeValueFactory(attribute=size, value="S")
+    large = AttributeValueFactory(attribute=size, value="L")
+    shirt = ProductFactory(category=category, name="Shirt")
+    ProductVariantFactory(
+        product=shirt,
+        price=Decimal("10.00"),
+        attribute_values=[red, small],
+    )
+    ProductVariantFactory(
+        product=shirt,
+        price=Decimal("12.00"),
+        attribute_values=[blue, large],
+    )
+    hat = ProductFactory(category=category, name="Hat")
+    ProductVariantFactory(
+        product=hat,
+        price=Decimal("30.00"),
+        attribute_values=[red, large],
+    )
+    return {
+        "category": category,
+        "values": {"red": red, "blue": blue, "small": small, "large": large},
+        "products": {"shirt": shirt, "hat": hat},
+    }
+
+
+def get_counts(result):
+    return {
+        value.value: value.count for facet in result.facets for value in facet.values
+    }
+
+
+@pytest.mark.django_db
+class TestFacetIndex:
+    def test_build_uses_constant_number_of_queries(
+        self,
+        catalog,
+        django_assert_num_queries,
+    ):
+        with django_assert_num_queries(3):
+            FacetIndex.build(catalog["category"])
+
+    def test_search_without_filters_counts_products(self, catalog):
+        result = FacetIndex.build(catalog["category"]).search()
+        assert set(result.product_ids) == {
+            catalog["products"]["shirt"].pk,
+            catalog["products"]["hat"].pk,
+        }
+        assert get_counts(result) == {"Red": 2, "Blue": 1, "S": 1, "L": 2}
+
+    def test_values_of_same_attribute_are_or_ed(self, catalog):
+        values = catalog["values"]
+        result = FacetIndex.build().search([values["red"].pk, values["blue"].pk])
+        assert result.variant_count == 3  # noqa: PLR2004
+
+    def test_values_of_different_attributes_are_and_ed(self, catalog):
+        values = catalog["values"]
+        result = FacetIndex.build().search([values["blue"].pk, values["small"].pk])
+        assert result.product_ids == []
+
+    def test_facet_counts_ignore_own_attribute_selection(self, catalog):
+        values = catalog["values"]
+        result = FacetIndex.build().search([values["small"].pk])
+        assert result.product_ids == [catalog["products"]["shirt"].pk]
+        counts = get_counts(result)
+        assert counts["L"] == 2  # noqa: PLR2004
+        assert counts["Red"] == 1
+        assert counts["Blue"] == 0
+
+    def test_price_range_filters_variants(self, catalog):
+        index = FacetIndex.build()
+        result = index.search(min_price=Decimal("11"), max_price=Decimal("30"))
+        assert result.variant_count == 2  # noqa: PLR2004
+        assert index.search(min_price=Decimal("31")).product_ids == []
+
+    def test_inactive_variants_are_not_indexed(self, catalog):
+        ProductVariantFactory(
+            product=catalog["products"]["hat"],
+            price=Decimal("5.00"),
+            is_active=False,
+            attribute_values=[catalog["values"]["blue"]],
+        )
+        result = FacetIndex.build().search()
+        assert result.variant_count == 3  # noqa: PLR2004
+
+    def test_unknown_values_are_ignored(self, catalog):
+        result = FacetIndex.build().search([0])
+        assert result.variant_count == 3  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+class TestGetFacetIndex:
+    def test_index_is_cached(self, catalog, django_assert_num_queries):
+        get_facet_index(catalog["category"])
+        with django_assert_num_queries(0):
+            get_facet_index(catalog["category"])
+
+    def test_catalog_changes_invalidate_index(self, catalog):
+        index = get_facet_index(catalog["category"])
+        ProductVariantFactory(
+            product=catalog["products"]["hat"],
+            price=Decimal("50.00"),
+        )
+        assert get_facet_index(catalog["category"]) is not index
+        assert len(get_facet_index(catalog["category"]).prices) == 4  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+class TestProductListView:
+    def test_filters_products_by_facets(self, client, catalog):
+        response = client.get(
+            reverse("products:product_list"),
+            {
+                "category": catalog["category"].slug,
+                "values": [catalog["values"]["blue"].pk],
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert list(response.context["products"]) == [catalog["products"]["shirt"]]
+
+    def test_sorts_products_by_price(self, client, catalog):
+        response = client.get(reverse("products:product_list"), {"sort": "-price"})
+        assert list(response.context["products"]) == [
+            catalog["products"]["hat"],
+            catalog["products"]["shirt"],
+        ]
+
+    def test_unknown_category_returns_404(self, client):
+        response = client.get(reverse("products:product_list"), {"category": "nope"})
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,143 @@
+import io
+import json
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.products.importers import CatalogImporter
+from apps.products.importers import normalize_product
+from apps.products.importers import read_catalog
+from apps.products.models import Attribute
+from apps.products.models import Category
+from apps.products.models import Product
+from apps.products.models import ProductVariant
+
+CATALOG = [
+    {
+        "category_name": "Guantes",
+        "name": "Guante de látex",
+        "slug": "guante-de-latex",
+        "short_description": "Guante desechable.",
+        "attributes": {"name": "Talla", "group": "SIZE"},
+        "variants": [
+            {
+                "sku": "GL-S",
+                "price": "4.50",
+                "stock_quantity": 10,
+                "attribute_values": {"Talla": "S"},
+            },
+            {
+                "sku": "GL-M",
+                "price": "4.75",
+                "stock_quantity": 5,
+                "attribute_values": {"Talla": "M"},
+            },
+        ],
+    },
+]
+
+CSV_CATALOG = """\
+category,product_slug,product_name,short_description,full_description,\
+product_is_active,sku,price,stock_quantity,sort_order,is_active,attribute:COLOR:Color
+Sellos,anillo,Anillo,,,true,AN-R,1.00,3,,true,Rojo
+Sellos,anillo,Anillo,,,true,AN-N,1.10,0,,false,Negro
+"""
+
+
+def import_catalog(entries, **kwargs):
+    importer = CatalogImporter(**kwargs)
+    importer.run(normalize_product(entry) for entry in entries)
+    return importer.stats
+
+
+def get_writes(queries):
+    return [
+        query["sql"]
+        for query in queries
+        if query["sql"].split(None, 1)[0].upper() in {"INSERT", "UPDATE", "DELETE"}
+    ]
+
+
+@pytest.mark.django_db
+class TestCatalogImporter:
+    def test_creates_catalog(self):
+        stats = import_catalog(CATALOG)
+        product = Product.objects.get(slug="guante-de-latex")
+        assert product.category.name == "Guantes"
+        assert product.min_price == Decimal("4.50")
+        assert product.total_stock == 15  # noqa: PLR2004
+        assert Attribute.objects.get(name="Talla").group == "SIZE"
+        variant = ProductVariant.objects.get(sku="GL-M")
+        assert [value.value for value in variant.attribute_values.all()] == ["M"]
+        assert stats["variants"].created == 2  # noqa: PLR2004
+        assert stats["variant_attribute_values"].created == 2  # noqa: PLR2004
+
+    def test_rerun_with_unchanged_data_only_reads(self):
+        import_catalog(CATALOG)
+        with CaptureQueriesContext(connection) as context:
+            stats = import_catalog(CATALOG)
+        assert get_writes(context.captured_queries) == []
+        assert stats["products"].unchanged == 1
+        assert stats["variants"].unchanged == 2  # noqa: PLR2004
+
+    def test_updates_changed_rows(self):
+        import_catalog(CATALOG)
+        changed = json.loads(json.dumps(CATALOG))
+        changed[0]["variants"][0]["price"] = "5.00"
+        changed[0]["variants"][1]["attribute_values"] = {"Talla": "L"}
+        stats = import_catalog(changed)
+        assert stats["variants"].updated == 1
+        assert stats["variant_attribute_values"].updated == 1
+        assert Product.objects.get().min_price == Decimal("4.75")
+        variant = ProductVariant.objects.get(sku="GL-M")
+        assert [value.value for value in variant.attribute_values.all()] == ["L"]
+
+    def test_matches_categories_case_insensitively(self):
+        Category.objects.create(name="GUANTES", slug="guantes")
+        import_catalog(CATALOG)
+        assert Category.objects.count() == 1
+
+    def test_keeps_existing_sort_order_when_not_given(self):
+        import_catalog(CATALOG)
+        ProductVariant.objects.filter(sku="GL-S").update(sort_order=7)
+        stats = import_catalog(CATALOG)
+        assert stats["variants"].unchanged == 2  # noqa: PLR2004
+        assert ProductVariant.objects.get(sku="GL-S").sort_order == 7  # noqa: PLR2004
+
+    def test_reads_csv_rows_grouped_by_product(self):
+        products = list(read_catalog(io.StringIO(CSV_CATALOG), "csv"))
+        assert len(products) == 1
+        assert products[0]["attributes"] == [{"name": "Color", "group": "COLOR"}]
+        assert [variant["is_active"] for variant in products[0]["variants"]] == [
+            True,
+            False,
+        ]
+
+
+@pytest.mark.django_db
+class TestImportCatalogCommand:
+    def test_imports_jsonl_file(self, tmp_path):
+        path = tmp_path / "catalog.jsonl"
+        path.write_text("\n".join(json.dumps(entry) for entry in CATALOG))
+        stdout = StringIO()
+        call_command("import_catalog", str(path), stdout=stdout)
+        assert ProductVariant.objects.count() == 2  # noqa: PLR2004
+        assert "variants: 2 created" in stdout.getvalue()
+
+    def test_imports_csv_file(self, tmp_path):
+        path = tmp_path / "catalog.csv"
+        path.write_text(CSV_CATALOG)
+        call_command("import_catalog", str(path), stdout=StringIO())
+        assert Attribute.objects.get(name="Color").group == "COLOR"
+        assert not ProductVariant.objects.get(sku="AN-N").is_active
+
+    def test_invalid_record_aborts(self, tmp_path):
+        path = tmp_path / "catalog.json"
+        path.write_text(json.dumps([{"name": "No slug"}]))
+        with pytest.raises(CommandError):
+            call_command("import_catalog", str(path), stdout=StringIO())
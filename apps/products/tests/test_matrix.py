@@ -0,0 +1,175 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.products.matrix import VariantMatrix
+from apps.products.matrix import get_variant_matrix
+from apps.products.models import ProductVariantAttributeValue
+from apps.products.utils import get_variant_matrix_key
+
+from .factories import AttributeFactory
+from .factories import AttributeValueFactory
+from .factories import ProductFactory
+from .factories import ProductImageFactory
+from .factories import ProductVariantFactory
+
+
+@pytest.fixture
+def catalog():
+    product = ProductFactory(name="Guante", slug="guante")
+    size = AttributeFactory(name="Talla", group="SIZE")
+    color = AttributeFactory(name="Color", group="COLOR")
+    small = AttributeValueFactory(attribute=size, value="S", sort_order=1)
+    medium = AttributeValueFactory(attribute=size, value="M", sort_order=2)
+    blue = AttributeValueFactory(attribute=color, value="Azul")
+    black = AttributeValueFactory(attribute=color, value="Negro")
+    small_blue = ProductVariantFactory(
+        product=product,
+        sku="GU-S-AZ",
+        price=Decimal("4.50"),
+        stock_quantity=0,
+        attribute_values=[small, blue],
+    )
+    medium_black = ProductVariantFactory(
+        product=product,
+        sku="GU-M-NE",
+        price=Decimal("4.75"),
+        stock_quantity=3,
+        attribute_values=[medium, black],
+    )
+    ProductVariantFactory(
+        product=product,
+        sku="GU-OFF",
+        is_active=False,
+        attribute_values=[small, black],
+    )
+    cache.delete(get_variant_matrix_key(product.pk))
+    return {
+        "product": product,
+        "small": small,
+        "medium": medium,
+        "blue": blue,
+        "black": black,
+        "small_blue": small_blue,
+        "medium_black": medium_black,
+    }
+
+
+@pytest.mark.django_db
+class TestVariantMatrix:
+    def test_build_uses_constant_number_of_queries(
+        self,
+        catalog,
+        django_assert_num_queries,
+    ):
+        with django_assert_num_queries(4):
+            VariantMatrix.build(catalog["product"].pk)
+
+    def test_maps_combinations_to_active_variants(self, catalog):
+        matrix = VariantMatrix.build(catalog["product"].pk)
+        assert [axis.name for axis in matrix.axes] == ["Color", "Talla"]
+        assert [value for _, value in matrix.axes[1].values] == ["S", "M"]
+        variant = matrix.find_variant([catalog["small"].pk, catalog["blue"].pk])
+        assert variant.sku == "GU-S-AZ"
+        assert variant.price == Decimal("4.50")
+        assert matrix.find_variant([catalog["small"].pk, catalog["black"].pk]) is None
+
+    def test_default_variant_prefers_stock(self, catalog):
+        matrix = VariantMatrix.build(catalog["product"].pk)
+        assert matrix.get_default_variant().sku == "GU-M-NE"
+
+    def test_available_values_follow_selection(self, catalog):
+        matrix = VariantMatrix.build(catalog["product"].pk)
+        selection = matrix.get_selection([catalog["small"].pk])
+        assert matrix.get_available_value_ids(selection) == {
+            catalog["small"].pk,
+            catalog["medium"].pk,
+            catalog["blue"].pk,
+        }
+
+    def test_collects_variant_and_product_images(self, catalog):
+        product_image = ProductImageFactory(product=catalog["product"], sort_order=2)
+        variant_image = ProductImageFactory(
+            product=catalog["product"],
+            variant=catalog["small_blue"],
+            sort_order=1,
+        )
+        matrix = VariantMatrix.build(catalog["product"].pk)
+        variant = matrix.find_variant([catalog["small"].pk, catalog["blue"].pk])
+        assert [image.id for image in matrix.get_images(variant)] == [
+            variant_image.pk,
+            product_image.pk,
+        ]
+
+
+@pytest.mark.django_db
+class TestGetVariantMatrix:
+    def test_is_served_with_single_cache_read(
+        self,
+        catalog,
+        django_assert_num_queries,
+    ):
+        get_variant_matrix(catalog["product"].pk)
+        with django_assert_num_queries(0):
+            matrix = get_variant_matrix(catalog["product"].pk)
+        assert len(matrix.combinations) == 2  # noqa: PLR2004
+
+    def test_is_rebuilt_when_variant_changes(self, catalog):
+        get_variant_matrix(catalog["product"].pk)
+        catalog["small_blue"].price = Decimal("5.00")
+        catalog["small_blue"].save()
+        matrix = get_variant_matrix(catalog["product"].pk)
+        variant = matrix.find_variant([catalog["small"].pk, catalog["blue"].pk])
+        assert variant.price == Decimal("5.00")
+
+    def test_is_rebuilt_when_link_changes(self, catalog):
+        get_variant_matrix(catalog["product"].pk)
+        ProductVariantAttributeValue.objects.get(
+            product_variant=catalog["small_blue"],
+            attribute_value=catalog["blue"],
+        ).delete()
+        matrix = get_variant_matrix(catalog["product"].pk)
+        assert matrix.find_variant([catalog["small"].pk]).sku == "GU-S-AZ"
+
+    def test_is_rebuilt_when_image_changes(self, catalog):
+        get_variant_matrix(catalog["product"].pk)
+        image = ProductImageFactory(product=catalog["product"])
+        matrix = get_variant_matrix(catalog["product"].pk)
+        assert [image.id for image in matrix.get_images()] == [image.pk]
+
+    def test_is_rebuilt_when_attribute_value_is_renamed(self, catalog):
+        get_variant_matrix(catalog["product"].pk)
+        catalog["blue"].value = "Celeste"
+        catalog["blue"].save()
+        matrix = get_variant_matrix(catalog["product"].pk)
+        assert [value for _, value in matrix.axes[0].values] == ["Celeste", "Negro"]
+
+
+@pytest.mark.django_db
+class TestProductVariantSwitchView:
+    def test_detail_selects_default_variant(self, client, catalog):
+        response = client.get(catalog["product"].get_absolute_url())
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["selected_variant"].sku == "GU-M-NE"
+
+    def test_renders_selected_variant_summary(self, client, catalog):
+        response = client.get(
+            reverse("products:product_variant_switch", kwargs={"slug": "guante"}),
+            {"values": [catalog["small"].pk, catalog["blue"].pk]},
+            headers={"hx-request": "true"},
+        )
+        assert response.status_code == HTTPStatus.OK
+        content = response.content.decode()
+        assert content.lstrip().startswith('<form id="variant-summary"')
+        assert "GU-S-AZ" in content
+        assert "<html" not in content
+
+    def test_unavailable_combination(self, client, catalog):
+        response = client.get(
+            reverse("products:product_variant_switch", kwargs={"slug": "guante"}),
+            {"values": [catalog["small"].pk, catalog["black"].pk]},
+        )
+        assert "This combination is not available." in response.content.decode()
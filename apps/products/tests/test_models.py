@@ -1,8 +1,23 @@
+from decimal import Decimal
+from io import StringIO
+
 import pytest
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.db import IntegrityError
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 
+from apps.core.cache import get_cache_version
 from apps.core.utils import get_default_image_url
+from apps.products.models import Product
+from apps.products.models import ProductVariant
+from apps.products.models import ProductVariantAttributeValue
+from apps.products.snapshot import get_product_stock
+from apps.products.utils import CATALOG_CACHE_NAMESPACE
+from apps.products.utils import get_variant_matrix_key
 
 from .factories import AttributeFactory
 from .factories import AttributeValueFactory
@@ -135,6 +150,119 @@ class TestProductVariant:
         assert variant.attribute_values.count() == 2  # noqa: PLR2004
 
 
+@pytest.mark.django_db
+class TestProductVariantsSummary:
+    def test_variant_save_updates_product_summary(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product, price="10.00", stock_quantity=3)
+        ProductVariantFactory(product=product, price="25.00", stock_quantity=7)
+        product.refresh_from_db()
+        assert product.min_price == Decimal("10.00")
+        assert product.max_price == Decimal("25.00")
+        assert product.total_stock == 10  # noqa: PLR2004
+        assert product.active_variant_count == 2  # noqa: PLR2004
+
+    def test_inactive_variants_are_excluded(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product, price="10.00", stock_quantity=3)
+        variant = ProductVariantFactory(product=product, price="5.00")
+        variant.is_active = False
+        variant.save()
+        product.refresh_from_db()
+        assert product.min_price == Decimal("10.00")
+        assert product.total_stock == 3  # noqa: PLR2004
+        assert product.active_variant_count == 1
+
+    def test_variant_delete_updates_product_summary(self):
+        product = ProductFactory()
+        variant = ProductVariantFactory(product=product)
+        variant.delete()
+        product.refresh_from_db()
+        assert product.min_price is None
+        assert product.total_stock == 0
+        assert product.active_variant_count == 0
+
+    def test_queryset_update_and_delete_update_product_summary(self):
+        product = ProductFactory()
+        ProductVariantFactory.create_batch(3, product=product, stock_quantity=1)
+        ProductVariant.objects.filter(product=product).update(stock_quantity=4)
+        product.refresh_from_db()
+        assert product.total_stock == 12  # noqa: PLR2004
+        ProductVariant.objects.filter(product=product).delete()
+        product.refresh_from_db()
+        assert product.active_variant_count == 0
+
+    def test_bulk_update_updates_product_summary(self):
+        product = ProductFactory()
+        variants = ProductVariantFactory.create_batch(2, product=product)
+        for variant in variants:
+            variant.price = Decimal("1.50")
+        ProductVariant.objects.bulk_update(variants, ["price"])
+        product.refresh_from_db()
+        assert product.max_price == Decimal("1.50")
+
+    def test_bulk_create_updates_product_summary(self):
+        product = ProductFactory()
+        ProductVariant.objects.bulk_create(
+            ProductVariantFactory.build_batch(4, product=product, stock_quantity=2),
+        )
+        product.refresh_from_db()
+        assert product.total_stock == 8  # noqa: PLR2004
+
+    def test_moving_variant_refreshes_both_products(self):
+        source, target = ProductFactory.create_batch(2)
+        variant = ProductVariantFactory(product=source, stock_quantity=4)
+        variant = ProductVariant.objects.get(pk=variant.pk)
+        variant.product = target
+        variant.save()
+        source.refresh_from_db()
+        target.refresh_from_db()
+        assert (source.active_variant_count, source.total_stock) == (0, 0)
+        assert (target.active_variant_count, target.total_stock) == (1, 4)
+
+    def test_stock_update_only_refreshes_affected_products(
+        self,
+        django_capture_on_commit_callbacks,
+    ):
+        product, other = ProductFactory.create_batch(2)
+        variant = ProductVariantFactory(product=product, stock_quantity=5)
+        ProductVariantFactory(product=other, stock_quantity=5)
+        get_product_stock(product.pk)
+        cache.set(get_variant_matrix_key(product.pk), "matrix")
+        cache.set(get_variant_matrix_key(other.pk), "matrix")
+        version = get_cache_version(CATALOG_CACHE_NAMESPACE)
+        with (
+            django_capture_on_commit_callbacks(execute=True),
+            CaptureQueriesContext(connection) as context,
+        ):
+            ProductVariant.objects.filter(pk=variant.pk).update(
+                stock_quantity=F("stock_quantity") - 2,
+            )
+        queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        # Product ids, the stock write and the total_stock refresh.
+        assert len(queries) == 3  # noqa: PLR2004
+        assert "search_vector" not in queries[-1]
+        assert get_cache_version(CATALOG_CACHE_NAMESPACE) == version
+        assert cache.get(get_variant_matrix_key(product.pk)) is None
+        assert cache.get(get_variant_matrix_key(other.pk)) == "matrix"
+        assert get_product_stock(product.pk).variants == {variant.pk: 3}
+        product.refresh_from_db()
+        assert product.total_stock == 3  # noqa: PLR2004
+
+    def test_reconcile_command_fixes_drifted_rows(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product, price="9.99", stock_quantity=5)
+        Product.objects.filter(pk=product.pk).update(min_price=None, total_stock=0)
+        call_command("reconcile_product_summaries", batch_size=1, stdout=StringIO())
+        product.refresh_from_db()
+        assert product.min_price == Decimal("9.99")
+        assert product.total_stock == 5  # noqa: PLR2004
+
+
 @pytest.mark.django_db
 class TestProductVariantAttributeValue:
     def test_str_method_returns_product_variant_sku_and_attribute_value(self):
@@ -223,6 +351,73 @@ class TestProductVariantAttributeValue:
             duplicate_link.save()
 
 
+@pytest.mark.django_db
+class TestProductVariantAttributeValueBulkLink:
+    def test_bulk_link_creates_links_and_sets_attribute(self):
+        attribute = AttributeFactory(name="Color")
+        value = AttributeValueFactory(attribute=attribute, value="Red")
+        product = ProductFactory(attributes=[attribute])
+        variants = ProductVariantFactory.create_batch(3, product=product)
+        links = ProductVariantAttributeValue.objects.bulk_link(
+            [(variant, value) for variant in variants],
+        )
+        assert len(links) == 3  # noqa: PLR2004
+        assert {link.attribute_id for link in links} == {attribute.pk}
+        assert ProductVariantAttributeValue.objects.count() == 3  # noqa: PLR2004
+
+    def test_bulk_link_accepts_primary_keys(self):
+        attribute = AttributeFactory(name="Size")
+        value = AttributeValueFactory(attribute=attribute, value="Small")
+        product = ProductFactory(attributes=[attribute])
+        variant = ProductVariantFactory(product=product)
+        ProductVariantAttributeValue.objects.bulk_link([(variant.pk, value.pk)])
+        assert list(variant.attribute_values.all()) == [value]
+
+    def test_bulk_link_skips_existing_links(self):
+        attribute = AttributeFactory(name="Color")
+        value = AttributeValueFactory(attribute=attribute, value="Blue")
+        product = ProductFactory(attributes=[attribute])
+        variant = ProductVariantFactory(product=product, attribute_values=[value])
+        links = ProductVariantAttributeValue.objects.bulk_link(
+            [(variant, value), (variant, value)],
+        )
+        assert links == []
+        assert variant.attribute_values.count() == 1
+
+    def test_bulk_link_rejects_attribute_not_on_product(self):
+        value = AttributeValueFactory(value="Cotton")
+        variant = ProductVariantFactory()
+        with pytest.raises(ValidationError):
+            ProductVariantAttributeValue.objects.bulk_link([(variant, value)])
+        assert not ProductVariantAttributeValue.objects.exists()
+
+    def test_bulk_link_rejects_second_value_for_same_attribute(self):
+        attribute = AttributeFactory(name="Size")
+        value1 = AttributeValueFactory(attribute=attribute, value="Medium")
+        value2 = AttributeValueFactory(attribute=attribute, value="Large")
+        product = ProductFactory(attributes=[attribute])
+        variant = ProductVariantFactory(product=product)
+        with pytest.raises(ValidationError):
+            ProductVariantAttributeValue.objects.bulk_link(
+                [(variant, value1), (variant, value2)],
+            )
+
+    def test_bulk_link_query_count_does_not_grow_per_link(
+        self,
+        django_assert_max_num_queries,
+    ):
+        attributes = AttributeFactory.create_batch(2)
+        values = [
+            AttributeValueFactory(attribute=attribute) for attribute in attributes
+        ]
+        product = ProductFactory(attributes=attributes)
+        variants = ProductVariantFactory.create_batch(100, product=product)
+        pairs = [(variant, value) for variant in variants for value in values]
+        with django_assert_max_num_queries(10):
+            ProductVariantAttributeValue.objects.bulk_link(pairs)
+        assert ProductVariantAttributeValue.objects.count() == len(pairs)
+
+
 @pytest.mark.django_db
 class TestProductImage:
     def test_str_method_returns_product_name_and_variant_sku_or_just_product_name(self):
@@ -243,3 +438,51 @@ class TestProductImage:
         )
         with pytest.raises(ValidationError):
             image_invalid.save()
+
+
+@pytest.mark.django_db
+class TestOrderField:
+    def test_save_assigns_consecutive_sort_order_per_product(self):
+        product = ProductFactory()
+        variants = ProductVariantFactory.create_batch(3, product=product)
+        other = ProductVariantFactory()
+        assert [variant.sort_order for variant in variants] == [0, 1, 2]
+        assert other.sort_order == 0
+
+    def test_save_keeps_explicit_sort_order(self):
+        variant = ProductVariantFactory(sort_order=7)
+        variant.refresh_from_db()
+        assert variant.sort_order == 7  # noqa: PLR2004
+
+    def test_counter_continues_after_explicit_sort_order(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product)
+        ProductVariantFactory(product=product, sort_order=10)
+        variant = ProductVariantFactory(product=product)
+        assert variant.sort_order == 11  # noqa: PLR2004
+
+    def test_counter_seeds_from_existing_rows(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product, sort_order=4)
+        variant = ProductVariantFactory(product=product)
+        assert variant.sort_order == 5  # noqa: PLR2004
+
+    def test_bulk_create_reserves_consecutive_sort_orders(self):
+        product = ProductFactory()
+        ProductVariantFactory(product=product)
+        variants = ProductVariant.objects.bulk_create(
+            ProductVariantFactory.build_batch(5, product=product),
+        )
+        assert [variant.sort_order for variant in variants] == [1, 2, 3, 4, 5]
+
+    def test_bulk_create_allocates_per_scope(self):
+        product1 = ProductFactory()
+        product2 = ProductFactory()
+        variants = ProductVariant.objects.bulk_create(
+            [
+                ProductVariantFactory.build(product=product1),
+                ProductVariantFactory.build(product=product2),
+                ProductVariantFactory.build(product=product1),
+            ],
+        )
+        assert [variant.sort_order for variant in variants] == [0, 0, 1]
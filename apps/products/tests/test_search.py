@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from apps.products.models import Product
+from apps.products.models import ProductVariant
+from apps.products.search import SearchIndex
+from apps.products.search import fold
+from apps.products.search import search_products
+from apps.products.search import tokenize
+
+from .factories import CategoryFactory
+from .factories import ProductFactory
+from .factories import ProductVariantFactory
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("Látex ÑANDÚ") == "latex nandu"
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("Guantes de Látex") == tokenize("guante latex")
+
+
+@pytest.fixture
+def catalog():
+    gloves = CategoryFactory(name="Guantes")
+    seals = CategoryFactory(name="Sellos")
+    latex = ProductFactory(
+        category=gloves,
+        name="Guante de Látex",
+        short_description="Guante desechable",
+        full_description="Uso médico.",
+    )
+    nitrile = ProductFactory(
+        category=gloves,
+        name="Guante de nitrilo",
+        short_description="Resistente a químicos",
+        full_description="Alternativa al látex.",
+    )
+    oring = ProductFactory(
+        category=seals,
+        name="Anillo tórico",
+        short_description="Sello de caucho",
+        full_description="",
+    )
+    ProductVariantFactory(product=latex)
+    ProductVariantFactory(product=nitrile)
+    ProductVariantFactory(product=oring, sku="ORING-042")
+    return {"latex": latex, "nitrile": nitrile, "oring": oring}
+
+
+def get_ids(matches):
+    return [product_id for product_id, _ in matches]
+
+
+@pytest.mark.django_db
+class TestSearchIndex:
+    def test_build_uses_two_queries(self, catalog, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            SearchIndex.build()
+
+    def test_matches_without_accents(self, catalog):
+        matches = SearchIndex.build().search("latex")
+        assert set(get_ids(matches)) == {catalog["latex"].pk, catalog["nitrile"].pk}
+
+    def test_ranks_name_matches_first(self, catalog):
+        matches = SearchIndex.build().search("látex")
+        assert get_ids(matches)[0] == catalog["latex"].pk
+
+    def test_matches_plural_forms(self, catalog):
+        matches = SearchIndex.build().search("guantes")
+        assert set(get_ids(matches)) == {catalog["latex"].pk, catalog["nitrile"].pk}
+
+    def test_tolerates_typos(self, catalog):
+        matches = SearchIndex.build().search("nitrlo")
+        assert get_ids(matches) == [catalog["nitrile"].pk]
+
+    def test_requires_every_term(self, catalog):
+        matches = SearchIndex.build().search("guante caucho")
+        assert matches == []
+
+    def test_matches_category_and_sku(self, catalog):
+        index = SearchIndex.build()
+        assert get_ids(index.search("sellos")) == [catalog["oring"].pk]
+        assert get_ids(index.search("oring-042")) == [catalog["oring"].pk]
+
+    def test_empty_query_matches_nothing(self, catalog):
+        assert SearchIndex.build().search("de la") == []
+
+
+@pytest.mark.django_db
+class TestSearchProducts:
+    def test_orders_by_relevance(self, catalog):
+        products = search_products("latex")
+        assert list(products) == [catalog["latex"], catalog["nitrile"]]
+
+    def test_filters_given_queryset(self, catalog):
+        Product.objects.filter(pk=catalog["latex"].pk).update(is_active=False)
+        products = search_products("latex", Product.objects.active())
+        assert list(products) == [catalog["nitrile"]]
+
+    def test_reflects_catalog_changes(self, catalog):
+        assert not search_products("silicona").exists()
+        ProductFactory(name="Manguera de silicona")
+        assert search_products("silicona").count() == 1
+
+    def test_reflects_bulk_sku_updates(self, catalog):
+        assert not search_products("SEAL-777").exists()
+        ProductVariant.objects.filter(product=catalog["oring"]).update(sku="SEAL-777")
+        assert list(search_products("SEAL-777")) == [catalog["oring"]]
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="search_vector is only stored on PostgreSQL",
+    )
+    def test_search_vector_is_kept_current(self, catalog):
+        catalog["oring"].refresh_from_db()
+        assert catalog["oring"].search_vector is not None
+
+
+@pytest.mark.django_db
+class TestProductListViewSearch:
+    def test_filters_products_by_query(self, client, catalog):
+        response = client.get(reverse("products:product_list"), {"q": "guantes"})
+        assert response.status_code == HTTPStatus.OK
+        assert set(response.context["products"]) == {
+            catalog["latex"],
+            catalog["nitrile"],
+        }
+
+    def test_no_matches_lists_no_products(self, client, catalog):
+        response = client.get(reverse("products:product_list"), {"q": "zzzz"})
+        assert list(response.context["products"]) == []
@@ -0,0 +1,113 @@
+import pickle
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from apps.products.snapshot import CatalogSnapshot
+from apps.products.snapshot import get_catalog_snapshot
+from apps.products.utils import catalog_snapshot_cache
+
+from .factories import AttributeValueFactory
+from .factories import ProductFactory
+from .factories import ProductVariantFactory
+
+
+@pytest.fixture
+def catalog():
+    product = ProductFactory(name="Guante", slug="guante")
+    size = AttributeValueFactory(value="M")
+    variant = ProductVariantFactory(
+        product=product,
+        sku="GU-M",
+        price=Decimal("4.50"),
+        attribute_values=[size],
+    )
+    ProductVariantFactory(product=product, sku="GU-OFF", is_active=False)
+    return {"product": product, "variant": variant, "size": size}
+
+
+@pytest.mark.django_db
+class TestCatalogSnapshot:
+    def test_build_uses_constant_number_of_queries(
+        self,
+        catalog,
+        django_assert_num_queries,
+    ):
+        with django_assert_num_queries(5):
+            CatalogSnapshot.build()
+
+    def test_indexes_by_slug_sku_and_category(self, catalog):
+        snapshot = CatalogSnapshot.build()
+        product = snapshot.get_product_by_slug("guante")
+        variant = snapshot.get_variant_by_sku("GU-M")
+        assert product.id == catalog["product"].pk
+        assert variant.id == catalog["variant"].pk
+        assert variant.price == Decimal("4.50")
+        assert snapshot.get_variant(variant.id) is variant
+        assert snapshot.get_category_products(catalog["product"].category_id) == [
+            product,
+        ]
+
+    def test_filters_inactive_variants(self, catalog):
+        snapshot = CatalogSnapshot.build()
+        skus = [
+            variant.sku
+            for variant in snapshot.get_product_variants(catalog["product"].pk)
+        ]
+        all_skus = [
+            variant.sku
+            for variant in snapshot.get_product_variants(
+                catalog["product"].pk,
+                active=False,
+            )
+        ]
+        assert skus == ["GU-M"]
+        assert set(all_skus) == {"GU-M", "GU-OFF"}
+
+    def test_resolves_variant_attribute_values(self, catalog):
+        snapshot = CatalogSnapshot.build()
+        values = snapshot.get_variant_attribute_values(catalog["variant"].pk)
+        assert [value.value for value in values] == ["M"]
+
+    def test_is_picklable(self, catalog):
+        snapshot = pickle.loads(pickle.dumps(CatalogSnapshot.build()))  # noqa: S301
+        assert snapshot.get_variant_by_sku("GU-M").id == catalog["variant"].pk
+
+
+@pytest.mark.django_db
+class TestGetCatalogSnapshot:
+    def test_is_served_from_cache(self, catalog, django_assert_num_queries):
+        get_catalog_snapshot()
+        catalog_snapshot_cache.clear()
+        with django_assert_num_queries(0):
+            assert get_catalog_snapshot().get_variant_by_sku("GU-M") is not None
+
+    def test_is_rebuilt_when_catalog_changes(self, catalog):
+        snapshot = get_catalog_snapshot()
+        catalog["variant"].price = Decimal("5.00")
+        catalog["variant"].save()
+        rebuilt = get_catalog_snapshot()
+        assert rebuilt is not snapshot
+        assert rebuilt.get_variant_by_sku("GU-M").price == Decimal("5.00")
+        assert snapshot.get_variant_by_sku("GU-M").price == Decimal("4.50")
+
+
+@pytest.mark.django_db
+class TestProductDetailView:
+    def test_renders_product_from_snapshot(self, client, catalog):
+        response = client.get(catalog["product"].get_absolute_url())
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["product"].id == catalog["product"].pk
+        assert [variant.sku for variant, *_ in response.context["variants"]] == [
+            "GU-M",
+        ]
+
+    def test_inactive_product_returns_404(self, client, catalog):
+        catalog["product"].is_active = False
+        catalog["product"].save()
+        response = client.get(
+            reverse("products:product_detail", kwargs={"slug": "guante"}),
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,5 +1,32 @@
 from django.urls import path
 
+from .views import CatalogExportView
+from .views import ProductDetailView
+from .views import ProductListView
+from .views import ProductVariantSwitchView
+
 app_name = "products"
 
-urlpatterns = []
+urlpatterns = [
+    path(
+        route="",
+        view=ProductListView.as_view(),
+        name="product_list",
+    ),
+    path(
+        route="<slug:slug>/",
+        view=ProductDetailView.as_view(),
+        name="product_detail",
+    ),
+    path(
+        route="<slug:slug>/variant/",
+        view=ProductVariantSwitchView.as_view(),
+        name="product_variant_switch",
+    ),
+    # Three segments deep, so no product slug can shadow it or be shadowed.
+    path(
+        route="catalog/export/<str:file_format>/",
+        view=CatalogExportView.as_view(),
+        name="catalog_export",
+    ),
+]
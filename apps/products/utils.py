@@ -1,2 +1,62 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.cache import TieredCache
+
+CATALOG_CACHE_NAMESPACE = "products:catalog"
+CATEGORY_NAV_CACHE_NAMESPACE = "products:category_nav"
+
+SEARCH_CONFIG = "spanish_unaccent"
+
+VARIANT_MATRIX_CACHE_PREFIX = "products:matrix"
+VARIANT_MATRIX_TIMEOUT = 60 * 60 * 24
+
+PRODUCT_STOCK_CACHE_PREFIX = "products:stock"
+PRODUCT_STOCK_TIMEOUT = 60 * 60 * 24
+
+catalog_snapshot_cache = TieredCache(
+    CATALOG_CACHE_NAMESPACE,
+    maxsize=1,
+    timeout=60 * 60 * 24,
+)
+category_nav_cache = TieredCache(CATEGORY_NAV_CACHE_NAMESPACE, maxsize=8)
+
+
 def product_image_upload_to(instance, filename):
     return f"products/{instance.product.slug}/{filename}"
+
+
+def invalidate_catalog_cache():
+    # Bump again on commit, so values cached from the pre-commit data by
+    # other processes in the meantime are not served.
+    catalog_snapshot_cache.invalidate()
+    transaction.on_commit(catalog_snapshot_cache.invalidate)
+
+
+def invalidate_category_nav():
+    category_nav_cache.invalidate()
+    transaction.on_commit(category_nav_cache.invalidate)
+
+
+def get_variant_matrix_key(product_id):
+    return f"{VARIANT_MATRIX_CACHE_PREFIX}:{product_id}"
+
+
+def invalidate_variant_matrices(product_ids):
+    keys = [get_variant_matrix_key(product_id) for product_id in set(product_ids)]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_product_stock_key(product_id):
+    return f"{PRODUCT_STOCK_CACHE_PREFIX}:{product_id}"
+
+
+def invalidate_product_stock(product_ids):
+    keys = [get_product_stock_key(product_id) for product_id in set(product_ids)]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
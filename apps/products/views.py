@@ -0,0 +1,153 @@
+from braces.views import StaffuserRequiredMixin
+from django.http import Http404
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.generic import ListView
+from django.views.generic import TemplateView
+from django.views.generic import View
+
+from .choices import ProductSort
+from .exporters import EXPORT_CONTENT_TYPES
+from .exporters import export_catalog
+from .facets import get_facet_index
+from .forms import ProductFilterForm
+from .matrix import get_variant_matrix
+from .models import Category
+from .models import Product
+from .search import search_products
+from .snapshot import get_catalog_snapshot
+from .snapshot import get_product_stock
+
+PRODUCT_ORDERINGS = {
+    ProductSort.NAME: ["name"],
+    ProductSort.PRICE_ASC: ["min_price", "name"],
+    ProductSort.PRICE_DESC: ["-max_price", "name"],
+    ProductSort.NEWEST: ["-created"],
+}
+
+
+def get_variant_context(matrix, value_ids=None):
+    if value_ids is None:
+        variant = matrix.get_default_variant()
+        selection = variant.value_ids if variant else ()
+    else:
+        selection = matrix.get_selection(value_ids)
+        variant = matrix.combinations.get(selection)
+    available = matrix.get_available_value_ids(selection)
+    return {
+        "matrix": matrix,
+        "selected_variant": variant,
+        "variant_axes": [
+            (
+                axis,
+                [
+                    (value_id, value, value_id in selection, value_id in available)
+                    for value_id, value in axis.values
+                ],
+            )
+            for axis in matrix.axes
+        ],
+        "variant_images": matrix.get_images(variant),
+    }
+
+
+class ProductListView(ListView):
+    template_name = "products/product_list.html"
+    context_object_name = "products"
+    paginate_by = 12
+
+    def get(self, request, *args, **kwargs):
+        self.category = None
+        if category_slug := request.GET.get("category"):
+            self.category = get_object_or_404(
+                Category.objects.active(),
+                slug=category_slug,
+            )
+        facet_index = get_facet_index(self.category)
+        self.form = ProductFilterForm(request.GET, facet_index=facet_index)
+        self.products = Product.objects.active().with_category()
+        search_ids = None
+        if query := self.form.get_query():
+            self.products = search_products(query, self.products)
+            search_ids = list(self.products.values_list("pk", flat=True))
+        self.facet_result = facet_index.search(
+            **self.form.get_filters(),
+            product_ids=search_ids,
+        )
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = self.products.filter(pk__in=self.facet_result.product_ids)
+        if ordering := PRODUCT_ORDERINGS.get(self.form.get_sort()):
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["category"] = self.category
+        context["form"] = self.form
+        context["facets"] = self.facet_result.facets
+        return context
+
+
+class ProductDetailView(TemplateView):
+    template_name = "products/product_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        snapshot = get_catalog_snapshot()
+        product = snapshot.get_product_by_slug(self.kwargs["slug"])
+        if product is None or not product.is_active:
+            raise Http404
+        context["product"] = product
+        context["category"] = snapshot.get_category(product.category_id)
+        stock = get_product_stock(product.id)
+        context["variants"] = [
+            (
+                variant,
+                snapshot.get_variant_attribute_values(variant.id),
+                stock.variants.get(variant.id, 0),
+            )
+            for variant in snapshot.get_product_variants(product.id)
+        ]
+        context.update(get_variant_context(get_variant_matrix(product.id)))
+        return context
+
+
+class ProductVariantSwitchView(TemplateView):
+    """
+    Render the variant summary for the selected ``values``, for HTMX swaps.
+
+    Answers from the cached variant matrix alone.
+    """
+
+    template_name = "products/product_detail.html#variant-summary"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        product = get_catalog_snapshot().get_product_by_slug(self.kwargs["slug"])
+        if product is None or not product.is_active:
+            raise Http404
+        value_ids = [
+            int(value_id)
+            for value_id in self.request.GET.getlist("values")
+            if value_id.isdigit()
+        ]
+        context["product"] = product
+        context.update(get_variant_context(get_variant_matrix(product.id), value_ids))
+        return context
+
+
+class CatalogExportView(StaffuserRequiredMixin, View):
+    def get(self, request, file_format):
+        if file_format not in EXPORT_CONTENT_TYPES:
+            raise Http404
+        extension = "csv" if file_format == "csv" else "jsonl"
+        filename = f"catalog-{timezone.localdate():%Y%m%d}-{file_format}.{extension}"
+        response = StreamingHttpResponse(
+            export_catalog(file_format),
+            content_type=EXPORT_CONTENT_TYPES[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -3,6 +3,7 @@ import ssl
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 from django.contrib.messages import constants as messages
 from django.utils.translation import gettext_lazy as _
 
@@ -66,6 +67,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.humanize",
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -201,6 +203,7 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "apps.users.context_processors.allauth_settings",
                 "apps.products.context_processors.categories_processor",
+                "apps.cart.context_processors.mini_cart_processor",
             ],
             "builtins": [
                 "django_cotton.templatetags.cotton",
@@ -274,6 +277,24 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+CELERY_BEAT_SCHEDULE = {
+    "sweep-carts": {
+        "task": "apps.cart.tasks.sweep_carts",
+        "schedule": crontab(minute=15),
+    },
+    "reap-stock-reservations": {
+        "task": "apps.cart.tasks.reap_stock_reservations",
+        "schedule": crontab(minute="*/5"),
+    },
+    "flush-hot-carts": {
+        "task": "apps.cart.tasks.flush_hot_carts",
+        "schedule": crontab(),
+    },
+    "purge-idempotency-keys": {
+        "task": "apps.orders.tasks.purge_idempotency_keys",
+        "schedule": crontab(minute=45),
+    },
+}
 
 # -----------------------------------------------------------------------------
 # django-allauth
@@ -308,3 +329,26 @@ COTTON_DIR = "components"
 # -----------------------------------------------------------------------------
 PHONENUMBER_DEFAULT_FORMAT = "NATIONAL"
 PHONENUMBER_DEFAULT_REGION = "EC"
+
+# -----------------------------------------------------------------------------
+# cart
+# -----------------------------------------------------------------------------
+CART_SESSION_KEY = "cart"
+CART_SESSION_MAX_LINES = env.int("CART_SESSION_MAX_LINES", 20)
+CART_ABANDON_AFTER_DAYS = env.int("CART_ABANDON_AFTER_DAYS", 7)
+CART_PURGE_AFTER_DAYS = env.int("CART_PURGE_AFTER_DAYS", 30)
+CART_SWEEP_BATCH_SIZE = env.int("CART_SWEEP_BATCH_SIZE", 500)
+CART_SWEEP_TIME_BUDGET = env.int("CART_SWEEP_TIME_BUDGET", 45)
+CART_RESERVATION_MINUTES = env.int("CART_RESERVATION_MINUTES", 15)
+CART_SERVICE = env("CART_SERVICE", default="apps.cart.services.CartService")
+CART_HOT_KEY_PREFIX = "cart:hot"
+CART_HOT_FLUSH_DELAY = env.int("CART_HOT_FLUSH_DELAY", 5)
+CART_HOT_FLUSH_BATCH_SIZE = env.int("CART_HOT_FLUSH_BATCH_SIZE", 200)
+
+# -----------------------------------------------------------------------------
+# orders
+# -----------------------------------------------------------------------------
+IDEMPOTENCY_KEY_TTL_HOURS = env.int("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+ORDER_NUMBER_PREFIX = env("ORDER_NUMBER_PREFIX", default="EE")
+# Order numbers each process reserves per round trip.
+ORDER_NUMBER_BLOCK_SIZE = env.int("ORDER_NUMBER_BLOCK_SIZE", 20)